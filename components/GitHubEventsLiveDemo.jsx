@@ -17,7 +17,7 @@ import {
   AlertCircle
 } from 'lucide-react'
 import { Button } from '@/components/ui/Button'
-import { callPythonAPI } from '@/lib/python-api'
+import { callPythonBatch } from '@/lib/python-api'
 
 export default function GitHubEventsLiveDemo() {
   const [metrics, setMetrics] = useState(null)
@@ -57,12 +57,16 @@ export default function GitHubEventsLiveDemo() {
     try {
       const startTime = Date.now()
       
-      // Fetch all data in parallel for better performance using Python API
-      const [metricsData, timelineData, reposData] = await Promise.all([
-        callPythonAPI('/api/github-metrics'),
-        callPythonAPI('/api/github-timeline'),
-        callPythonAPI('/api/github-repositories?limit=5') // Reduced limit for faster queries
-      ])
+      // Fetch all data in one batched round trip; the backend runs the queries concurrently
+      const {
+        metrics: metricsData,
+        timeline: timelineData,
+        repositories: reposData
+      } = await callPythonBatch({
+        metrics: '/api/github-metrics',
+        timeline: '/api/github-timeline',
+        repositories: '/api/github-repositories?limit=5' // Reduced limit for faster queries
+      })
 
       // Only proceed if ALL APIs return successful Snowflake data
       if (!metricsData.success || !timelineData.success || !reposData.success) {
@@ -19,7 +19,7 @@ import {
   Eye,
   EyeOff
 } from 'lucide-react'
-import { callPythonAPI } from '@/lib/python-api'
+import { callPythonAPI, columnarToRows } from '@/lib/python-api'
 
 // Pre-built query templates
 const QUERY_TEMPLATES = [
@@ -377,24 +377,26 @@ export default function QueryPlayground() {
         },
         body: JSON.stringify({ 
           query: manualQuery.trim(),
-          limit: 100  // Safety limit to prevent huge result sets
+          limit: 100,  // Safety limit to prevent huge result sets
+          format: 'columnar'
         })
       })
       
       if (data.success && data.data) {
-        setResults(data.data)
+        const rows = columnarToRows(data.data)
+        setResults(rows)
         
         // Add to query history
         const historyItem = {
           id: Date.now(),
           query: { type: 'manual', query: manualQuery },
           timestamp: new Date(),
-          resultCount: data.data.length,
+          resultCount: rows.length,
           execution_time: data.execution_time || null
         }
         setQueryHistory(prev => [historyItem, ...prev.slice(0, 9)])
         
-        console.log(`✅ Query executed successfully: ${data.data.length} rows returned in ${data.metadata?.execution_time || 'N/A'}`)
+        console.log(`✅ Query executed successfully: ${rows.length} rows returned in ${data.metadata?.execution_time || 'N/A'}`)
         
       } else {
         const errorMsg = data.error || data.message || 'Query execution failed'
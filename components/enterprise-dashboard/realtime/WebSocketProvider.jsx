@@ -1,6 +1,6 @@
 "use client";
 
-import React, { createContext, useContext, useEffect, useState, useCallback } from 'react';
+import React, { createContext, useContext, useEffect, useState, useCallback, useRef } from 'react';
 
 const WebSocketContext = createContext({
   data: null,
@@ -12,6 +12,25 @@ const WebSocketContext = createContext({
   unsubscribe: () => {}
 });
 
+// Rows in the real-time timeline are identified by (date, repository, eventType, hour)
+const timelineRowKey = (row) => `${row.date}|${row.repository}|${row.eventType}|${row.hour}`;
+
+// Apply a versioned data_patch from the backend to the previous snapshot
+function applyTimelinePatch(snapshot, patch, lastFetch) {
+  const rows = new Map((snapshot?.timeline || []).map(row => [timelineRowKey(row), row]));
+
+  patch.removed.forEach(key => rows.delete(key));
+  [...patch.added, ...patch.changed].forEach(row => rows.set(timelineRowKey(row), row));
+
+  // Keep the backend ordering: newest date first, then busiest rows
+  const timeline = [...rows.values()].sort((a, b) => {
+    if (a.date !== b.date) return a.date < b.date ? 1 : -1;
+    return b.totalActivity - a.totalActivity;
+  });
+
+  return { ...snapshot, timeline, lastFetch };
+}
+
 export function WebSocketProvider({ children }) {
   const [socket, setSocket] = useState(null);
   const [isConnected, setIsConnected] = useState(false);
@@ -20,6 +39,7 @@ export function WebSocketProvider({ children }) {
   const [connectionStatus, setConnectionStatus] = useState('disconnected');
   const [reconnectAttempts, setReconnectAttempts] = useState(0);
   const [subscribers, setSubscribers] = useState(new Set());
+  const snapshotRef = useRef({ version: null, data: null });
 
   const PYTHON_WS_URL = process.env.NEXT_PUBLIC_PYTHON_WS_URL || 
                        (process.env.NODE_ENV === 'production' 
@@ -32,7 +52,8 @@ export function WebSocketProvider({ children }) {
     setConnectionStatus('connecting');
     
     try {
-      const newSocket = new WebSocket(PYTHON_WS_URL);
+      // Negotiate delta-encoded updates instead of full snapshots every tick
+      const newSocket = new WebSocket(`${PYTHON_WS_URL}${PYTHON_WS_URL.includes('?') ? '&' : '?'}delta=true`);
 
       newSocket.onopen = () => {
         console.log('🔗 Connected to GitHub Events WebSocket');
@@ -70,15 +91,15 @@ export function WebSocketProvider({ children }) {
           const message = JSON.parse(event.data);
           console.log('📊 Received WebSocket message:', message);
           
-          // Handle different message types from FastAPI backend
-          if (message.type === 'initial_data' || message.type === 'data_update') {
-            setData(message.data);
+          const publish = (nextData, version) => {
+            snapshotRef.current = { version, data: nextData };
+            setData(nextData);
             setLastUpdate(new Date());
             
             // Notify all subscribers
             subscribers.forEach(callback => {
               if (typeof callback === 'function') {
-                callback(message.data);
+                callback(nextData);
               }
             });
             
@@ -87,6 +108,28 @@ export function WebSocketProvider({ children }) {
             if (window.playgroundPerformance) {
               window.playgroundPerformance.addOperation('WebSocket Message', processingTime);
             }
+          };
+          
+          // Ask for a full snapshot when we missed a version
+          const requestResync = () => {
+            newSocket.send(JSON.stringify({ type: 'resync', version: snapshotRef.current.version }));
+          };
+          
+          // Handle different message types from FastAPI backend
+          if (message.type === 'initial_data' || message.type === 'snapshot' || message.type === 'data_update') {
+            publish(message.data, message.version);
+          } else if (message.type === 'data_patch') {
+            if (snapshotRef.current.version !== message.baseVersion) {
+              requestResync();
+            } else {
+              publish(applyTimelinePatch(snapshotRef.current.data, message.patch, message.lastFetch), message.version);
+            }
+          } else if (message.type === 'heartbeat') {
+            if (snapshotRef.current.version !== message.version) {
+              requestResync();
+            } else {
+              setLastUpdate(new Date());
+            }
           }
         } catch (error) {
           console.error('Error parsing WebSocket message:', error);
@@ -10,6 +10,7 @@ export const apiConfig = {
     timeline: '/api/github-timeline', 
     repositories: '/api/github-repositories',
     executeSql: '/api/execute-sql',
+    batch: '/api/batch',
     health: '/health'
   },
   timeout: 45000, // 45 seconds for SQL queries
@@ -71,3 +72,37 @@ export async function callPythonAPI(endpoint, options = {}) {
     throw error
   }
 }
+
+// Run several backend calls in one round trip. `requests` maps a name to a path
+// ('/api/github-metrics') or to { path, method, params, body }. Resolves to an object
+// with the same names, each holding that call's usual response body.
+export async function callPythonBatch(requests, options = {}) {
+  const items = Object.entries(requests).map(([id, spec]) =>
+    typeof spec === 'string' ? { id, path: spec } : { id, ...spec }
+  )
+  const response = await callPythonAPI(apiConfig.endpoints.batch, {
+    method: 'POST',
+    body: JSON.stringify({ requests: items }),
+    ...options
+  })
+
+  const results = {}
+  for (const [id, item] of Object.entries(response.data || {})) {
+    results[id] = item.body ?? { success: false, error: item.error || `HTTP ${item.status}` }
+  }
+  return results
+}
+
+// Expand a `format: 'columnar'` SQL response ({ columns, values }) into row objects
+export function columnarToRows({ columns = [], values = [] } = {}) {
+  const rowCount = values.length ? values[0].length : 0
+  const rows = new Array(rowCount)
+  for (let r = 0; r < rowCount; r++) {
+    const row = {}
+    for (let c = 0; c < columns.length; c++) {
+      row[columns[c]] = values[c][r]
+    }
+    rows[r] = row
+  }
+  return rows
+}
@@ -0,0 +1,145 @@
+"""Runs several API calls inside one HTTP request by dispatching them to the ASGI app in-process"""
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode
+
+from serialization import dumps
+
+# Carried from the batch request to each call, so per-client quotas and logs see the real client
+FORWARDED_HEADERS = (b"fly-client-ip", b"x-forwarded-for", b"user-agent")
+
+
+class ResponseTooLarge(Exception):
+    """A call's response body grew past the batch's per-call byte cap"""
+
+
+class SubResponse:
+    __slots__ = ("status", "headers", "body", "seconds")
+
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes, seconds: float):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.seconds = seconds
+
+    @property
+    def is_json(self) -> bool:
+        return self.headers.get("content-type", "").startswith("application/json")
+
+
+async def watch_disconnect(receive: Callable, disconnected: asyncio.Event) -> None:
+    """Set `disconnected` once the batch's own client goes away"""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            disconnected.set()
+            return
+
+
+async def call_app(
+    app,
+    parent_scope: Dict[str, Any],
+    method: str,
+    path: str,
+    params: Optional[Dict[str, Any]],
+    body: Optional[bytes],
+    disconnected: asyncio.Event,
+    max_bytes: int,
+) -> SubResponse:
+    """Run one request through `app` and collect its response.
+
+    The call goes through the full middleware stack, so it is timed, limited
+    and coalesced exactly like a direct request. Its `receive` reports a
+    disconnect when the batch's client disconnects, which cancels the
+    call's warehouse queries the same way. A response body longer than
+    `max_bytes` aborts the call, which then also sees a disconnect, and is
+    answered with a 413 instead of being buffered whole.
+    """
+    path, _, query_string = path.partition("?")
+    if params:
+        encoded = urlencode(params, doseq=True)
+        query_string = f"{query_string}&{encoded}" if query_string else encoded
+
+    headers: List[Tuple[bytes, bytes]] = [
+        (name, value) for name, value in parent_scope.get("headers", []) if name in FORWARDED_HEADERS
+    ]
+    if body is not None:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    scope = {
+        "type": "http",
+        "asgi": parent_scope.get("asgi", {"version": "3.0"}),
+        "http_version": parent_scope.get("http_version", "1.1"),
+        "method": method,
+        "scheme": parent_scope.get("scheme", "http"),
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query_string.encode(),
+        "root_path": parent_scope.get("root_path", ""),
+        "headers": headers,
+        "client": parent_scope.get("client"),
+        "server": parent_scope.get("server"),
+    }
+
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body or b"", "more_body": False}
+        waiters = [asyncio.ensure_future(disconnected.wait()), asyncio.ensure_future(aborted.wait())]
+        try:
+            await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+        return {"type": "http.disconnect"}
+
+    status = 500
+    response_headers: Dict[str, str] = {}
+    chunks: List[bytes] = []
+    received = 0
+    aborted = asyncio.Event()
+
+    async def send(message):
+        nonlocal status, received
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers.update(
+                (name.decode("latin-1").lower(), value.decode("latin-1")) for name, value in message.get("headers", [])
+            )
+        elif message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            received += len(chunk)
+            if received > max_bytes:
+                aborted.set()
+                raise ResponseTooLarge()
+            chunks.append(chunk)
+
+    started = time.perf_counter()
+    try:
+        await app(scope, receive, send)
+    except ResponseTooLarge:
+        chunks.clear()
+        error = dumps({"detail": f"Response exceeded {max_bytes} bytes; request less data or call the endpoint directly"})
+        return SubResponse(413, {"content-type": "application/json"}, error, time.perf_counter() - started)
+    return SubResponse(status, response_headers, b"".join(chunks), time.perf_counter() - started)
+
+
+def render_batch(results: Sequence[Tuple[str, SubResponse]], total_seconds: float, timestamp: str) -> bytes:
+    """Combined JSON body; each call's JSON body is spliced in as-is rather than decoded and re-encoded"""
+    parts = []
+    for item_id, response in results:
+        item = b'{"status":%d,"durationMs":%s,' % (response.status, dumps(round(response.seconds * 1000, 2)))
+        if response.is_json and response.body:
+            item += b'"body":' + response.body + b"}"
+        else:
+            error = f"{response.headers.get('content-type', 'unknown')} responses cannot be embedded in a batch"
+            item += b'"body":null,"error":' + dumps(error) + b"}"
+        parts.append(dumps(item_id) + b":" + item)
+    return (
+        b'{"success":true,"data":{' + b",".join(parts) + b"},"
+        + b'"durationMs":' + dumps(round(total_seconds * 1000, 2))
+        + b',"timestamp":' + dumps(timestamp) + b"}"
+    )
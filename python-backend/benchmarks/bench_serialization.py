@@ -0,0 +1,114 @@
+"""Serialization cost per 10k result rows: hand-written loops vs the shared row mappers
+
+Run from python-backend/:
+
+    python benchmarks/bench_serialization.py [--rows 10000] [--repeat 20]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from datetime import date, datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serialization import RowMapper, column, dumps, json_default, mapper_for_columns, orjson  # noqa: E402
+
+COLUMNS = ("DATE", "REPOSITORY", "EVENT_TYPE", "EVENT_COUNT", "LAST_EVENT_AT")
+
+
+def make_rows(count: int):
+    start = datetime(2025, 8, 20, 23, 0, 0)
+    return [
+        (
+            date(2025, 8, 20 - i % 10),
+            f"org{i % 97}/repo{i % 1009}",
+            ("PushEvent", "PullRequestEvent", "IssuesEvent", "WatchEvent")[i % 4],
+            i % 500,
+            start - timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+def legacy_execute_sql(rows):
+    """The per-cell loop /api/execute-sql used, then FastAPI's encoder and stdlib json"""
+    formatted = []
+    for row in rows:
+        row_dict = {}
+        for i, value in enumerate(row):
+            column_name = COLUMNS[i] if i < len(COLUMNS) else f"column_{i+1}"
+            if isinstance(value, datetime):
+                row_dict[column_name] = value.isoformat()
+            elif value is None:
+                row_dict[column_name] = None
+            else:
+                row_dict[column_name] = value
+        formatted.append(row_dict)
+    return json.dumps(jsonable_encoder({"success": True, "data": formatted})).encode()
+
+
+def legacy_timeline(rows):
+    """The dict comprehension + str() dates the dashboard routes used"""
+    data = [
+        {
+            "date": str(row[0]),
+            "repository": row[1],
+            "eventType": row[2],
+            "totalActivity": row[3],
+            "lastActivity": str(row[4]),
+        }
+        for row in rows
+    ]
+    return json.dumps(jsonable_encoder({"success": True, "data": data})).encode()
+
+
+TIMELINE_ROW = RowMapper({
+    "date": column(0),
+    "repository": column(1),
+    "eventType": column(2),
+    "totalActivity": column(3),
+    "lastActivity": column(4),
+})
+
+
+def mapped_execute_sql(rows):
+    return dumps({"success": True, "data": mapper_for_columns(COLUMNS).map(rows)})
+
+
+def mapped_timeline(rows):
+    return dumps({"success": True, "data": TIMELINE_ROW.map(rows)})
+
+
+def mapped_stdlib_json(rows):
+    data = TIMELINE_ROW.map(rows)
+    return json.dumps({"success": True, "data": data}, default=json_default, separators=(',', ':')).encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    cases = [
+        ("execute-sql: per-cell loop + jsonable_encoder + json", legacy_execute_sql),
+        ("execute-sql: column mapper + dumps", mapped_execute_sql),
+        ("dashboard: dict comprehension + jsonable_encoder + json", legacy_timeline),
+        ("dashboard: RowMapper + stdlib json", mapped_stdlib_json),
+        ("dashboard: RowMapper + dumps", mapped_timeline),
+    ]
+
+    print(f"Encoder: {'orjson ' + orjson.__version__ if orjson else 'stdlib json'}; {args.rows} rows, best of {args.repeat}")
+    print(f"{'case':<58} {'ms':>9} {'ms/10k rows':>12} {'bytes':>10}")
+    for name, fn in cases:
+        best = min(timeit.repeat(lambda: fn(rows), number=1, repeat=args.repeat))
+        print(f"{name:<58} {best * 1000:>9.2f} {best * 1000 * 10000 / args.rows:>12.2f} {len(fn(rows)):>10}")
+
+
+if __name__ == "__main__":
+    main()
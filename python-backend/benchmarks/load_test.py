@@ -0,0 +1,269 @@
+"""Offline load test: every HTTP route plus concurrent /ws/github-events clients against the fake warehouse
+
+Starts the API with SNOWFLAKE_FAKE=true (see fake_snowflake.py), then, for
+each route, runs `--requests` calls at `--concurrency` while `--ws-clients`
+WebSocket clients stay subscribed. Reports throughput, p50/p95/p99 latency
+and the server's resident memory. Calls the server sheds under its
+admission limits (503 with Retry-After) are counted apart from errors. Needs httpx and websockets; Linux for RSS.
+
+Run from python-backend/:
+
+    python benchmarks/load_test.py [--requests 200] [--concurrency 16] [--ws-clients 50]
+    python benchmarks/load_test.py --url http://localhost:8000   # an already running server
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import websockets
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (name, method, path, JSON body); covers every route in main.py
+SQL = "SELECT V:repo.name::STRING AS repo, COUNT(*) AS events FROM RAW_EVENTS GROUP BY 1 ORDER BY events DESC"
+ROUTES: List[Tuple[str, str, str, Optional[Dict[str, Any]]]] = [
+    ("root", "GET", "/", None),
+    ("health", "GET", "/health", None),
+    ("ready", "GET", "/ready", None),
+    ("github-metrics", "GET", "/api/github-metrics", None),
+    ("github-timeline", "GET", "/api/github-timeline", None),
+    ("github-repositories", "GET", "/api/github-repositories?limit=20", None),
+    ("query-executor repository", "GET", "/api/query-executor?event_types=all&time_range=7d&group_by=repository&limit=50", None),
+    ("query-executor day", "GET", "/api/query-executor?event_types=PushEvent,WatchEvent&time_range=30d&group_by=day&limit=7", None),
+    ("execute-sql json", "POST", "/api/execute-sql", {"query": SQL, "limit": 1000}),
+    ("execute-sql columnar", "POST", "/api/execute-sql", {"query": SQL, "limit": 1000, "format": "columnar"}),
+    ("execute-sql ndjson", "POST", "/api/execute-sql", {"query": SQL, "limit": 1000, "format": "ndjson"}),
+    ("batch", "POST", "/api/batch", {"requests": [
+        {"id": "metrics", "path": "/api/github-metrics"},
+        {"id": "timeline", "path": "/api/github-timeline"},
+        {"id": "repositories", "path": "/api/github-repositories", "params": {"limit": 5}},
+    ]}),
+    ("manual-query", "POST", "/api/manual-query", {"query": "SELECT V:type::STRING AS type, COUNT(*) AS events FROM RAW_EVENTS GROUP BY 1"}),
+    ("pool-stats", "GET", "/api/pool-stats", None),
+    ("cache-stats", "GET", "/api/cache-stats", None),
+    ("metrics", "GET", "/metrics", None),
+    ("ws test page", "GET", "/ws/test", None),
+]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def rss_mb(pid: Optional[int]) -> Dict[str, float]:
+    """Current and peak resident set size from /proc (Linux only)"""
+    if pid is None:
+        return {}
+    values = {}
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    key, amount, _ = line.split()
+                    values[key.rstrip(":")] = int(amount) / 1024
+    except OSError:
+        pass
+    return values
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, port: int, data_dir: str) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        SNOWFLAKE_FAKE="true",
+        FAKE_SNOWFLAKE_ROWS=str(args.rows),
+        FAKE_SNOWFLAKE_QUERY_LATENCY_MS=str(args.query_latency_ms),
+        FAKE_SNOWFLAKE_CONNECT_LATENCY_MS=str(args.connect_latency_ms),
+        ROLLUP_DB_PATH=os.path.join(data_dir, "rollups.db"),
+        WS_POLL_INTERVAL_SECONDS=str(args.ws_poll_interval),
+        # One client drives all the load, so lift its scan quota
+        SQL_CLIENT_SCAN_BYTES_PER_MINUTE=str(10 ** 15),
+    )
+    # Server logs (including expected 503 admission rejections) go to a file, not the report
+    log = open(os.path.join(data_dir, "server.log"), "w")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/ready")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not become ready")
+
+
+async def drive_route(client: httpx.AsyncClient, method: str, path: str, body, requests: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    shed = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal shed
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                await response.aread()
+                status = response.status_code
+                if status == 503 and "retry-after" in response.headers:
+                    # Load shedding by a limiter working as designed, not a failure
+                    shed += 1
+            except httpx.HTTPError:
+                status = 0
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": sum(count for status, count in statuses.items() if status == 0 or status >= 400) - shed,
+        "shed": shed,
+        "rps": requests / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 0.50) * 1000,
+        "p95": percentile(latencies, 0.95) * 1000,
+        "p99": percentile(latencies, 0.99) * 1000,
+    }
+
+
+class WebSocketClients:
+    """N subscribers that record time to the initial snapshot and count later updates"""
+
+    def __init__(self, url: str, count: int):
+        self.url = url
+        self.count = count
+        self.connect_latencies: List[float] = []
+        self.messages = 0
+        self.failures = 0
+        self._tasks: List[asyncio.Task] = []
+        self._ready = asyncio.Event()
+        self._connected = 0
+
+    async def start(self) -> None:
+        if not self.count:
+            return
+        self._tasks = [asyncio.create_task(self._client(index % 2 == 1)) for index in range(self.count)]
+        await asyncio.wait_for(self._ready.wait(), timeout=120)
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _client(self, delta: bool) -> None:
+        started = time.perf_counter()
+        try:
+            async with websockets.connect(f"{self.url}/ws/github-events{'?delta=true' if delta else ''}", max_size=None) as ws:
+                await ws.recv()
+                self.connect_latencies.append(time.perf_counter() - started)
+                self._mark_connected()
+                async for _ in ws:
+                    self.messages += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.failures += 1
+            self._mark_connected()
+
+    def _mark_connected(self) -> None:
+        self._connected += 1
+        if self._connected >= self.count:
+            self._ready.set()
+
+
+async def run(args) -> None:
+    process = None
+    data_dir = tempfile.mkdtemp(prefix="load-test-")
+    base_url = args.url
+    if base_url is None:
+        port = free_port()
+        process = start_server(args, port, data_dir)
+        base_url = f"http://127.0.0.1:{port}"
+    pid = process.pid if process else None
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+            await wait_until_ready(client)
+            rss_idle = rss_mb(pid)
+
+            ws_clients = WebSocketClients(base_url.replace("http", "ws", 1), args.ws_clients)
+            ws_started = time.perf_counter()
+            await ws_clients.start()
+
+            # Warm up the pool, caches and rollup before measuring
+            for _, method, path, body in ROUTES:
+                await client.request(method, path, json=body)
+
+            print(f"{'route':<28} {'reqs':>6} {'errors':>6} {'shed':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+            for name, method, path, body in ROUTES:
+                result = await drive_route(client, method, path, body, args.requests, args.concurrency)
+                print(
+                    f"{name:<28} {result['requests']:>6} {result['errors']:>6} {result['shed']:>6} {result['rps']:>9.1f} "
+                    f"{result['p50']:>9.2f} {result['p95']:>9.2f} {result['p99']:>9.2f}"
+                )
+
+            ws_elapsed = time.perf_counter() - ws_started
+            await ws_clients.stop()
+            rss_end = rss_mb(pid)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    if args.ws_clients:
+        connects = sorted(ws_clients.connect_latencies)
+        print(
+            f"\nWebSocket: {args.ws_clients} clients ({ws_clients.failures} failed), "
+            f"first snapshot p50 {percentile(connects, 0.50) * 1000:.1f} ms / p99 {percentile(connects, 0.99) * 1000:.1f} ms, "
+            f"{ws_clients.messages} updates in {ws_elapsed:.0f}s"
+        )
+    if process is not None:
+        print(f"Server log: {os.path.join(data_dir, 'server.log')}")
+    if rss_end:
+        print(
+            f"Server RSS: idle {rss_idle.get('VmRSS', 0):.1f} MB, end {rss_end.get('VmRSS', 0):.1f} MB, "
+            f"peak {rss_end.get('VmHWM', 0):.1f} MB"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Benchmark a running server instead of starting one (RSS is not reported)")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per route")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--ws-clients", type=int, default=50)
+    parser.add_argument("--ws-poll-interval", type=float, default=2.0, help="Server poller interval, seconds")
+    parser.add_argument("--rows", type=int, default=100000, help="Synthetic events in the fake warehouse")
+    parser.add_argument("--query-latency-ms", type=float, default=50)
+    parser.add_argument("--connect-latency-ms", type=float, default=200)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Runs blocking Snowflake work off the event loop with per-endpoint admission limits"""
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when an endpoint already has its maximum number of queued calls"""
+
+    def __init__(self, endpoint: str, retry_after: int):
+        super().__init__(f"Too many pending database calls for '{endpoint}'")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimiter:
+    """Allows `max_concurrent` calls to run and up to `max_queued` more to wait"""
+
+    def __init__(self, endpoint: str, max_concurrent: int, max_queued: int, retry_after: int):
+        self.endpoint = endpoint
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.retry_after = retry_after
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._running = 0
+        self._queued = 0
+        self._rejected = 0
+        self._completed = 0
+
+    async def __aenter__(self):
+        if self._semaphore.locked():
+            if self._queued >= self.max_queued:
+                self._rejected += 1
+                raise QueueFullError(self.endpoint, self.retry_after)
+            self._queued += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self._queued -= 1
+        else:
+            await self._semaphore.acquire()
+        self._running += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+    def release(self) -> None:
+        """Give up a slot taken with `async with` / `__aenter__`; safe to call from callbacks"""
+        self._running -= 1
+        self._completed += 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "maxConcurrent": self.max_concurrent,
+            "maxQueued": self.max_queued,
+            "running": self._running,
+            "queued": self._queued,
+            "completed": self._completed,
+            "rejected": self._rejected,
+        }
+
+
+class DatabaseExecutor:
+    """Dedicated, bounded thread pool for connector calls.
+
+    Each endpoint gets its own ConcurrencyLimiter so a burst of slow ad-hoc
+    queries cannot occupy every worker thread and starve the dashboard routes.
+    Must be created inside the running event loop (e.g. on app startup).
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        endpoint_limits: Optional[Dict[str, Tuple[int, int]]] = None,
+        default_limit: Tuple[int, int] = (2, 8),
+        retry_after: int = 2,
+    ):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="snowflake-db")
+        self._endpoint_limits = dict(endpoint_limits or {})
+        self._default_limit = default_limit
+        self._retry_after = retry_after
+        self._limiters: Dict[str, ConcurrencyLimiter] = {}
+
+    def limiter(self, endpoint: str) -> ConcurrencyLimiter:
+        limiter = self._limiters.get(endpoint)
+        if limiter is None:
+            max_concurrent, max_queued = self._endpoint_limits.get(endpoint, self._default_limit)
+            limiter = ConcurrencyLimiter(endpoint, max_concurrent, max_queued, self._retry_after)
+            self._limiters[endpoint] = limiter
+        return limiter
+
+    async def run(self, endpoint: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run `fn(*args, **kwargs)` on a worker thread under the endpoint's limit"""
+        loop = asyncio.get_running_loop()
+        async with self.limiter(endpoint):
+            return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> "asyncio.Future[Any]":
+        """Run `fn(*args)` on a worker thread without admission; the caller must hold the endpoint's limiter"""
+        return asyncio.get_running_loop().run_in_executor(self._executor, functools.partial(fn, *args))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "maxWorkers": self.max_workers,
+            "endpoints": {name: limiter.stats() for name, limiter in self._limiters.items()},
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
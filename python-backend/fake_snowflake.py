@@ -0,0 +1,366 @@
+"""In-process stand-in for the Snowflake connector, for benchmarks and offline development.
+
+Serves a synthetic RAW_EVENTS table from SQLite. The Snowflake SQL this
+service issues (VARIANT paths such as `V:repo.name::STRING`, `INTERVAL`
+arithmetic, COUNT_IF, DATE_TRUNC, DAYOFWEEK, APPROX_COUNT_DISTINCT) is
+rewritten to SQLite, and the connector calls the endpoints rely on are
+implemented: execute/execute_async, query status polling,
+SYSTEM$CANCEL_QUERY, EXPLAIN USING JSON and the fetch methods. Latency
+is injected per login and per statement so pool, executor and
+cancellation behaviour can be measured without credentials.
+
+Enable with SNOWFLAKE_FAKE=true; see `FakeSnowflake.from_env` for the knobs.
+"""
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from snowflake.connector.errors import NotSupportedError, ProgrammingError
+
+EVENT_TYPES = (
+    ("PushEvent", 50), ("PullRequestEvent", 12), ("IssuesEvent", 8), ("WatchEvent", 12),
+    ("ForkEvent", 5), ("CreateEvent", 7), ("IssueCommentEvent", 6),
+)
+LANGUAGES = ("Python", "JavaScript", "TypeScript", "Go", "Rust", "Java", None)
+
+# RAW_EVENTS column for each VARIANT path the service reads
+_VARIANT_COLUMNS = {
+    "id": "id",
+    "type": "event_type",
+    "created_at": "created_at",
+    "actor.login": "actor_login",
+    "repo.name": "repo_name",
+    "repo.language": "repo_language",
+}
+
+# Connector type codes (snowflake.connector.constants.FIELD_ID_TO_NAME)
+_FIXED, _REAL, _TEXT, _DATE, _TIMESTAMP_NTZ = 0, 1, 2, 3, 8
+
+_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+_TIMESTAMP_TEXT = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$")
+_DATE_TEXT = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_VARIANT_PATH = re.compile(r"\bV:([A-Za-z_][\w.]*)")
+_INTERVAL = re.compile(r"(MAX\([^()]*\)|\w+)\s*-\s*INTERVAL\s*'(\d+)\s*(HOUR|DAY|MINUTE)S?'", re.IGNORECASE)
+_CAST = re.compile(r"::\s*\w+(\(\d+(,\s*\d+)?\))?")
+_LATENCY_HINT = re.compile(r"/\*\s*fake_latency_ms\s*=\s*(\d+)\s*\*/")
+
+# Snowflake error codes
+_STATEMENT_TIMEOUT_ERRNO = 630
+_QUERY_CANCELLED_ERRNO = 604
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if isinstance(value, str) and len(value) >= 19:
+        try:
+            return datetime.strptime(value[:19], _TIMESTAMP_FORMAT)
+        except ValueError:
+            return None
+    return None
+
+
+class _CountIf:
+    def __init__(self):
+        self.count = 0
+
+    def step(self, value):
+        if value:
+            self.count += 1
+
+    def finalize(self):
+        return self.count
+
+
+def translate(sql: str) -> str:
+    """Rewrite the Snowflake dialect used by this service into SQLite"""
+    sql = _VARIANT_PATH.sub(lambda m: _VARIANT_COLUMNS.get(m.group(1), m.group(1).replace(".", "_")), sql)
+    sql = _CAST.sub("", sql)
+    sql = _INTERVAL.sub(
+        lambda m: f"datetime({m.group(1)}, '-{m.group(2)} {m.group(3).lower()}s')", sql
+    )
+    sql = re.sub(r"\bAPPROX_COUNT_DISTINCT\s*\(", "COUNT(DISTINCT ", sql, flags=re.IGNORECASE)
+    return sql.replace("%s", "?")
+
+
+def _to_python(value: Any) -> Any:
+    # SQLite returns timestamps as text; the real connector returns datetimes
+    if isinstance(value, str):
+        if _TIMESTAMP_TEXT.match(value):
+            return datetime.strptime(value, _TIMESTAMP_FORMAT)
+        if _DATE_TEXT.match(value):
+            return datetime.strptime(value, "%Y-%m-%d").date()
+    return value
+
+
+def _to_sqlite(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.strftime(_TIMESTAMP_FORMAT)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _type_code(rows: Sequence[Sequence[Any]], index: int) -> int:
+    for row in rows:
+        value = row[index]
+        if value is None:
+            continue
+        if isinstance(value, datetime):
+            return _TIMESTAMP_NTZ
+        if isinstance(value, date):
+            return _DATE
+        if isinstance(value, int):
+            return _FIXED
+        if isinstance(value, float):
+            return _REAL
+        return _TEXT
+    return _TEXT
+
+
+class FakeSnowflake:
+    """A synthetic warehouse: one shared in-memory database plus latency settings.
+
+    Every FakeConnection reads the same table through its own SQLite
+    connection, so concurrent queries run in parallel like sessions on a
+    warehouse.
+    """
+
+    def __init__(self, rows: int = 100_000, days: int = 14, seed: int = 7,
+                 query_latency: float = 0.05, connect_latency: float = 0.2):
+        self.rows = rows
+        self.query_latency = query_latency
+        self.connect_latency = connect_latency
+        self._uri = f"file:fake_snowflake_{uuid.uuid4().hex}?mode=memory&cache=shared"
+        # Keeps the shared in-memory database alive for the life of the process
+        self._anchor = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+        self._populate(rows, days, seed)
+
+    @classmethod
+    def from_env(cls) -> "FakeSnowflake":
+        return cls(
+            rows=int(os.getenv('FAKE_SNOWFLAKE_ROWS', '100000')),
+            days=int(os.getenv('FAKE_SNOWFLAKE_DAYS', '14')),
+            seed=int(os.getenv('FAKE_SNOWFLAKE_SEED', '7')),
+            query_latency=float(os.getenv('FAKE_SNOWFLAKE_QUERY_LATENCY_MS', '50')) / 1000,
+            connect_latency=float(os.getenv('FAKE_SNOWFLAKE_CONNECT_LATENCY_MS', '200')) / 1000,
+        )
+
+    def connect(self, **kwargs: Any) -> "FakeConnection":
+        """Drop-in for `snowflake.connector.connect`; honours STATEMENT_TIMEOUT_IN_SECONDS"""
+        time.sleep(self.connect_latency)
+        session_parameters = kwargs.get("session_parameters") or {}
+        return FakeConnection(self, session_parameters.get("STATEMENT_TIMEOUT_IN_SECONDS"))
+
+    def _open(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+        db.create_function("HOUR", 1, lambda v: _parse_timestamp(v).hour if _parse_timestamp(v) else None)
+        # Snowflake's default DAYOFWEEK: 0 = Sunday
+        db.create_function("DAYOFWEEK", 1, lambda v: _parse_timestamp(v).isoweekday() % 7 if _parse_timestamp(v) else None)
+        db.create_function("DATE_TRUNC", 2, _date_trunc)
+        db.create_aggregate("COUNT_IF", 1, _CountIf)
+        return db
+
+    def _populate(self, rows: int, days: int, seed: int) -> None:
+        rnd = random.Random(seed)
+        end = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+        span = days * 86400
+        repos = [f"org{i % 60}/repo{i}" for i in range(max(1, rows // 200))]
+        actors = [f"user{i}" for i in range(max(1, rows // 20))]
+        types = [name for name, _ in EVENT_TYPES]
+        weights = [weight for _, weight in EVENT_TYPES]
+        languages = {repo: rnd.choice(LANGUAGES) for repo in repos}
+
+        def events():
+            for event_id in range(rows):
+                repo = repos[min(len(repos) - 1, int(rnd.paretovariate(1.2)) - 1)] if rnd.random() < 0.5 else rnd.choice(repos)
+                created_at = end - timedelta(seconds=rnd.randint(0, span))
+                yield (
+                    str(event_id), rnd.choices(types, weights)[0], created_at.strftime(_TIMESTAMP_FORMAT),
+                    rnd.choice(actors), repo, languages[repo],
+                )
+
+        self._anchor.execute(
+            "CREATE TABLE raw_events (id TEXT, event_type TEXT, created_at TEXT, "
+            "actor_login TEXT, repo_name TEXT, repo_language TEXT)"
+        )
+        self._anchor.executemany("INSERT INTO raw_events VALUES (?, ?, ?, ?, ?, ?)", events())
+        self._anchor.execute("CREATE INDEX raw_events_created_at ON raw_events (created_at)")
+        self._anchor.commit()
+
+
+def _date_trunc(unit: str, value: Any) -> Optional[str]:
+    parsed = _parse_timestamp(value)
+    if parsed is None:
+        return None
+    unit = unit.upper()
+    if unit == "HOUR":
+        parsed = parsed.replace(minute=0, second=0)
+    elif unit == "DAY":
+        parsed = parsed.replace(hour=0, minute=0, second=0)
+    elif unit == "MINUTE":
+        parsed = parsed.replace(second=0)
+    return parsed.strftime(_TIMESTAMP_FORMAT)
+
+
+class _Query:
+    __slots__ = ("rows", "description", "ready_at", "timeout_at", "cancelled")
+
+    def __init__(self, rows, description, ready_at: float, timeout_at: Optional[float]):
+        self.rows = rows
+        self.description = description
+        self.ready_at = ready_at
+        self.timeout_at = timeout_at
+        self.cancelled = False
+
+
+class FakeConnection:
+    def __init__(self, warehouse: FakeSnowflake, statement_timeout: Optional[float]):
+        self.warehouse = warehouse
+        self.statement_timeout = statement_timeout
+        self._db = warehouse._open()
+        self._lock = threading.Lock()
+        self._queries: Dict[str, _Query] = {}
+        self._closed = False
+
+    def cursor(self) -> "FakeCursor":
+        return FakeCursor(self)
+
+    def close(self) -> None:
+        self._closed = True
+        self._db.close()
+
+    def is_closed(self) -> bool:
+        return self._closed
+
+    def get_query_status(self, query_id: str) -> str:
+        query = self._queries.get(query_id)
+        if query is None:
+            return "SUCCESS"
+        now = time.monotonic()
+        if query.cancelled:
+            return "ABORTING"
+        if query.timeout_at is not None and query.timeout_at < query.ready_at and now >= query.timeout_at:
+            return "FAILED_WITH_ERROR"
+        return "RUNNING" if now < query.ready_at else "SUCCESS"
+
+    def get_query_status_throw_if_error(self, query_id: str) -> str:
+        status = self.get_query_status(query_id)
+        if status in ("FAILED_WITH_ERROR", "ABORTING"):
+            self._queries.pop(query_id, None)
+        if status == "FAILED_WITH_ERROR":
+            raise ProgrammingError(
+                msg=f"Statement reached its statement or warehouse timeout of {self.statement_timeout} second(s) and was canceled.",
+                errno=_STATEMENT_TIMEOUT_ERRNO, sfqid=query_id,
+            )
+        if status == "ABORTING":
+            raise ProgrammingError(msg="SQL execution canceled", errno=_QUERY_CANCELLED_ERRNO, sfqid=query_id)
+        return status
+
+    @staticmethod
+    def is_still_running(status: str) -> bool:
+        return status in ("RUNNING", "QUEUED", "RESUMING_WAREHOUSE")
+
+    def _run(self, sql: str, params: Any) -> Tuple[List[tuple], List[tuple]]:
+        with self._lock:
+            cursor = self._db.execute(translate(sql), tuple(_to_sqlite(p) for p in (params or ())))
+            raw = cursor.fetchall()
+            names = [column[0].upper() for column in cursor.description] if cursor.description else []
+        rows = [tuple(_to_python(value) for value in row) for row in raw]
+        description = [
+            (name, _type_code(rows, index), None, None, None, None, True) for index, name in enumerate(names)
+        ]
+        return rows, description
+
+    def _submit(self, sql: str, params: Any) -> str:
+        """Evaluate a statement now and make its result visible after the injected latency"""
+        query_id = str(uuid.uuid4())
+        upper = sql.lstrip().upper()
+        if upper.startswith("EXPLAIN"):
+            rows, description = self._explain()
+        elif "SYSTEM$CANCEL_QUERY" in upper:
+            target = self._queries.get(params[0]) if params else None
+            if target is not None:
+                target.cancelled = True
+            rows, description = [("Identified SQL statement is being canceled.",)], [("STATUS", _TEXT, None, None, None, None, True)]
+        else:
+            rows, description = self._run(sql, params)
+
+        hint = _LATENCY_HINT.search(sql)
+        latency = int(hint.group(1)) / 1000 if hint else self.warehouse.query_latency
+        now = time.monotonic()
+        timeout_at = now + self.statement_timeout if self.statement_timeout else None
+        self._queries[query_id] = _Query(rows, description, now + latency, timeout_at)
+        return query_id
+
+    def _explain(self) -> Tuple[List[tuple], List[tuple]]:
+        # Roughly 200 bytes per event, spread over 16 MB micro-partitions
+        total_bytes = self.warehouse.rows * 200
+        partitions = max(1, total_bytes // (16 * 1024 * 1024))
+        plan = {"GlobalStats": {"partitionsTotal": partitions, "partitionsAssigned": partitions, "bytesAssigned": total_bytes}}
+        return [(json.dumps(plan),)], [("content", _TEXT, None, None, None, None, True)]
+
+
+class FakeCursor:
+    def __init__(self, connection: FakeConnection):
+        self.connection = connection
+        self.sfqid: Optional[str] = None
+        self.description: Optional[List[tuple]] = None
+        self.rowcount: Optional[int] = None
+        self._rows: List[tuple] = []
+        self._position = 0
+
+    def execute(self, command: str, params: Any = None, **kwargs: Any) -> "FakeCursor":
+        self.execute_async(command, params)
+        while True:
+            status = self.connection.get_query_status_throw_if_error(self.sfqid)
+            if not self.connection.is_still_running(status):
+                break
+            time.sleep(min(0.01, max(0.0, self.connection._queries[self.sfqid].ready_at - time.monotonic())))
+        self.get_results_from_sfqid(self.sfqid)
+        return self
+
+    def execute_async(self, command: str, params: Any = None, **kwargs: Any) -> Dict[str, Any]:
+        self.sfqid = self.connection._submit(command, params)
+        return {"queryId": self.sfqid}
+
+    def get_results_from_sfqid(self, query_id: str) -> None:
+        query = self.connection._queries.pop(query_id)
+        self.sfqid = query_id
+        self._rows = query.rows
+        self.description = query.description
+        self.rowcount = len(query.rows)
+        self._position = 0
+
+    def fetchone(self) -> Optional[tuple]:
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def fetchmany(self, size: Optional[int] = None) -> List[tuple]:
+        size = size or 1
+        rows = self._rows[self._position:self._position + size]
+        self._position += len(rows)
+        return rows
+
+    def fetchall(self) -> List[tuple]:
+        rows = self._rows[self._position:]
+        self._position = len(self._rows)
+        return rows
+
+    def fetch_arrow_batches(self):
+        raise NotSupportedError("Fake Snowflake results are not Arrow-encoded")
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def close(self) -> None:
+        self._rows = []
@@ -0,0 +1,72 @@
+"""HyperLogLog distinct-count sketches, mergeable across days"""
+import math
+from hashlib import blake2b
+from typing import Iterable, Optional
+
+# 2^12 registers (4 KiB per sketch), the precision Snowflake uses for APPROX_COUNT_DISTINCT
+DEFAULT_PRECISION = 12
+
+
+def relative_standard_error(precision: int = DEFAULT_PRECISION) -> float:
+    """Expected relative error of an estimate, one standard deviation (about 1.6% at precision 12)"""
+    return 1.04 / math.sqrt(1 << precision)
+
+
+class HyperLogLog:
+    """Fixed-size distinct-count sketch.
+
+    Each value is hashed to 64 bits; the first `precision` bits pick a
+    register that keeps the longest run of leading zeros seen in the rest.
+    Sketches of the same precision merge by taking the register-wise
+    maximum, so the sketch of a union of days is the merge of the daily
+    sketches and never needs the underlying values again. Hashing uses
+    blake2b rather than `hash()` so serialized sketches stay comparable
+    across processes.
+    """
+
+    __slots__ = ("precision", "registers")
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, registers: Optional[bytes] = None):
+        self.precision = precision
+        size = 1 << precision
+        if registers is not None and len(registers) != size:
+            raise ValueError(f"Expected {size} registers, got {len(registers)}")
+        self.registers = bytearray(registers) if registers is not None else bytearray(size)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        return cls(int(math.log2(len(data))), data)
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.registers)
+
+    def add(self, value: str) -> None:
+        hashed = int.from_bytes(blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+        index = hashed >> (64 - self.precision)
+        remaining_bits = 64 - self.precision
+        rest = hashed & ((1 << remaining_bits) - 1)
+        rank = remaining_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values: Iterable[str]) -> "HyperLogLog":
+        for value in values:
+            self.add(value)
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """Fold `other` into this sketch in place"""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def estimate(self) -> int:
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        raw = alpha * size * size / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * size and zeros:
+            # Small cardinalities: linear counting over the empty registers is more accurate
+            return int(round(size * math.log(size / zeros)))
+        return int(round(raw))
@@ -0,0 +1,180 @@
+"""HTTP validators and Cache-Control for data-versioned GET responses, plus response compression"""
+import gzip
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from hashlib import blake2b
+from typing import Dict, Mapping, Optional
+
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Media types worth compressing; Arrow IPC and anything already compressed are left alone
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+class Validators:
+    """ETag, Last-Modified and Cache-Control for one response.
+
+    The ETag is derived from the data version and the request's parameters,
+    so a client's cached copy is known to be current without computing the
+    response. It is weak: bodies also carry timestamps such as `lastUpdated`
+    and may be compressed differently, but are equivalent for one version.
+    """
+
+    def __init__(self, version: str, resource: str, last_modified: Optional[datetime], cache_control: str):
+        digest = blake2b(f"{version}\n{resource}".encode("utf-8"), digest_size=12).hexdigest()
+        self.etag = f'W/"{digest}"'
+        # Watermarks are naive UTC timestamps; HTTP dates have one-second resolution
+        self.last_modified = (
+            last_modified.replace(tzinfo=last_modified.tzinfo or timezone.utc, microsecond=0)
+            if last_modified is not None else None
+        )
+        self.cache_control = cache_control
+
+    def matches(self, request_headers: Mapping[str, str]) -> bool:
+        """True when the client's cached copy is current (If-None-Match, else If-Modified-Since)"""
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or any(_opaque(tag) == _opaque(self.etag) for tag in tags)
+
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since is None or self.last_modified is None:
+            return False
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return self.last_modified <= since
+
+    def headers(self) -> Dict[str, str]:
+        headers = {"ETag": self.etag, "Cache-Control": self.cache_control}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        return headers
+
+    def not_modified(self) -> Response:
+        return Response(status_code=304, headers=self.headers())
+
+
+def _opaque(tag: str) -> str:
+    # Weak comparison: W/"x" and "x" name the same representation
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def cache_control(max_age: int, shared_max_age: int, stale_while_revalidate: int) -> str:
+    """Browsers revalidate after `max_age`; CDNs keep responses `shared_max_age` and serve stale while refetching"""
+    return (
+        f"public, max-age={max_age}, s-maxage={shared_max_age}, "
+        f"stale-while-revalidate={stale_while_revalidate}"
+    )
+
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    encodings: Dict[str, float] = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            encodings[name.strip().lower()] = quality
+    return encodings
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing buffered responses with brotli (when installed) or gzip.
+
+    Only single-message bodies of at least `minimum_size` bytes with a
+    compressible media type are compressed; streamed responses such as
+    NDJSON pass through untouched so rows still reach the client as they
+    are produced.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = {}
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accepted = _accepted_encodings(value.decode("latin-1"))
+                break
+        if brotli is not None and accepted.get("br", 0) > 0:
+            encoding = "br"
+        elif accepted.get("gzip", 0) > 0:
+            encoding = "gzip"
+        else:
+            encoding = None
+
+        start_message = None
+
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # Hold the start message until the body shows whether to compress
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            headers = list(start.get("headers", []))
+            compressible = (
+                not message.get("more_body", False)
+                and len(body) >= self.minimum_size
+                and _compressible(headers)
+            )
+            if compressible:
+                headers = _vary_accept_encoding(headers)
+                if encoding is not None:
+                    body = self._compress(body, encoding)
+                    headers = [(name, value) for name, value in headers if name != b"content-length"]
+                    headers += [(b"content-encoding", encoding.encode()), (b"content-length", str(len(body)).encode())]
+            await send({**start, "headers": headers})
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+
+def _compressible(headers) -> bool:
+    content_type = b""
+    for name, value in headers:
+        if name == b"content-encoding":
+            return False
+        if name == b"content-type":
+            content_type = value
+    return content_type.decode("latin-1").startswith(COMPRESSIBLE_TYPES)
+
+
+def _vary_accept_encoding(headers):
+    for index, (name, value) in enumerate(headers):
+        if name == b"vary":
+            if b"accept-encoding" not in value.lower():
+                headers[index] = (name, value + b", Accept-Encoding")
+            return headers
+    return headers + [(b"vary", b"Accept-Encoding")]
@@ -1,16 +1,50 @@
+import time
+# Start of the cold-start clock reported by /ready, taken before the framework imports
+MODULE_IMPORT_STARTED = time.perf_counter()
+
 from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import snowflake.connector
+from fastapi.responses import Response, StreamingResponse
 import os
-from datetime import datetime, timedelta
 import json
-from typing import List, Optional
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel
 import logging
 import asyncio
-import websockets
-import time
+from contextlib import contextmanager
+from urllib.parse import parse_qsl
+
+from batch import SubResponse, call_app, render_batch, watch_disconnect
+from db_executor import DatabaseExecutor, QueueFullError
+from hll import relative_standard_error
+from http_cache import CompressionMiddleware, Validators, cache_control
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, DB_STAGE_SECONDS, HTTP_REQUEST_SECONDS, REGISTRY, MetricsMiddleware
+from pagination import InvalidCursorError, decode_cursor, next_cursor, page_after, query_fingerprint, sort_aggregate
+from result_cache import ResultCache, make_cache_key
+from result_formats import ARROW_STREAM_MEDIA_TYPE, arrow_available, column_types, fetch_arrow_ipc, transpose_rows
+from result_stream import NDJSON_MEDIA_TYPE, QueryStream
+from readiness import Readiness
+from rollup_store import ROLLUP_GROUPINGS, RollupStore
+from realtime import ConnectionManager, SnapshotPoller
+from serialization import (
+    FastJSONResponse, RowMapper, column, computed, constant, dumps, dumps_text, json_response, mapper_for_columns
+)
+from query_control import (
+    CancelScope, ClientDisconnectedError, DisconnectWatchMiddleware, QueryCancelledError, QueryController,
+    QueryTimeoutError, until_disconnected
+)
+from shared_cache import SharedCache
+from single_flight import SingleFlight, make_flight_key
+from snapshot_store import SnapshotStore
+from sql_cache import CachedRows, SQLResultCache
+from sql_guard import (
+    GuardedQuery, QuotaExceededError, ScanAdmission, ScanBudgetError, ScanQuota, UnsafeQueryError,
+    explain_scan_cost, guard_query, preload_parser
+)
+from snowflake_pool import PoolTimeoutError, SnowflakePool
+from watermark import WatermarkService
+from worker_sync import HostChannel, HostLeader
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -20,49 +54,25 @@ logger = logging.getLogger(__name__)
 class SQLExecutionRequest(BaseModel):
     query: str
     limit: Optional[int] = 100
+    format: Optional[str] = "json"
 
-app = FastAPI(title="GitHub Events Analytics API", version="1.0.0")
+class BatchItem(BaseModel):
+    id: str
+    path: str
+    method: Optional[str] = "GET"
+    params: Optional[Dict[str, Any]] = None
+    body: Optional[Any] = None
 
-# WebSocket connection manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-    
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-        logger.info(f"WebSocket connected. Total connections: {len(self.active_connections)}")
-    
-    def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-            logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
-    
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        try:
-            await websocket.send_text(message)
-        except Exception as e:
-            logger.error(f"Error sending personal message: {e}")
-    
-    async def broadcast(self, message: dict):
-        if not self.active_connections:
-            return
-            
-        message_str = json.dumps(message)
-        disconnected_connections = []
-        
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message_str)
-            except Exception as e:
-                logger.error(f"Error broadcasting to connection: {e}")
-                disconnected_connections.append(connection)
-        
-        # Remove disconnected connections
-        for connection in disconnected_connections:
-            self.disconnect(connection)
+class BatchRequest(BaseModel):
+    requests: List[BatchItem]
 
-manager = ConnectionManager()
+app = FastAPI(title="GitHub Events Analytics API", version="1.0.0", default_response_class=FastJSONResponse)
+
+# WebSocket connection manager
+manager = ConnectionManager(
+    queue_size=int(os.getenv('WS_SEND_QUEUE_SIZE', '4')),
+    max_missed_updates=int(os.getenv('WS_MAX_MISSED_UPDATES', '3'))
+)
 
 # CORS middleware
 app.add_middleware(
@@ -73,6 +83,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Lets database calls notice when the HTTP client goes away
+app.add_middleware(DisconnectWatchMiddleware)
+
+# Compresses buffered JSON/text responses for clients that accept brotli or gzip
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.getenv('COMPRESSION_MIN_BYTES', '1024')))
+
+# Outermost, so request latency includes every other middleware
+app.add_middleware(MetricsMiddleware, router=app.router, histogram=HTTP_REQUEST_SECONDS)
+
+# Server-side limit on every statement; runaway queries are aborted by Snowflake
+SNOWFLAKE_STATEMENT_TIMEOUT_SECONDS = int(os.getenv('SNOWFLAKE_STATEMENT_TIMEOUT_SECONDS', '120'))
+
 # Snowflake connection configuration
 SNOWFLAKE_CONFIG = {
     'user': os.getenv('SNOWFLAKE_USERNAME', 'your_username'),
@@ -80,18 +102,428 @@ SNOWFLAKE_CONFIG = {
     'account': os.getenv('SNOWFLAKE_ACCOUNT', 'your_account'),
     'warehouse': os.getenv('SNOWFLAKE_WAREHOUSE', 'your_warehouse'),
     'database': os.getenv('SNOWFLAKE_DATABASE', 'GITHUB_EVENTS_DB'),
-    'schema': os.getenv('SNOWFLAKE_SCHEMA', 'RAW')
+    'schema': os.getenv('SNOWFLAKE_SCHEMA', 'RAW'),
+    'session_parameters': {'STATEMENT_TIMEOUT_IN_SECONDS': SNOWFLAKE_STATEMENT_TIMEOUT_SECONDS}
 }
 
+# Connection pool settings
+SNOWFLAKE_POOL_CONFIG = {
+    'max_size': int(os.getenv('SNOWFLAKE_POOL_MAX_SIZE', '4')),
+    'min_size': int(os.getenv('SNOWFLAKE_POOL_MIN_SIZE', '0')),
+    'acquire_timeout': float(os.getenv('SNOWFLAKE_POOL_ACQUIRE_TIMEOUT', '10')),
+    'max_idle_seconds': float(os.getenv('SNOWFLAKE_POOL_MAX_IDLE_SECONDS', '600')),
+    'max_lifetime_seconds': float(os.getenv('SNOWFLAKE_POOL_MAX_LIFETIME_SECONDS', '3600')),
+    'health_check_interval': float(os.getenv('SNOWFLAKE_POOL_HEALTH_CHECK_SECONDS', '60'))
+}
+
+# Serve a synthetic RAW_EVENTS table instead of Snowflake (benchmarks, offline development)
+SNOWFLAKE_FAKE = os.getenv('SNOWFLAKE_FAKE', 'false').lower() == 'true'
+
+snowflake_pool: Optional[SnowflakePool] = None
+
+@app.on_event("startup")
+async def create_snowflake_pool():
+    global snowflake_pool
+
+    if SNOWFLAKE_FAKE:
+        from fake_snowflake import FakeSnowflake
+        connect = FakeSnowflake.from_env().connect
+        logger.warning("SNOWFLAKE_FAKE is set: serving synthetic events instead of Snowflake")
+    else:
+        def connect(**config):
+            # The connector takes about a third of a second to import, so it loads
+            # with the first login (usually the warm-up's) rather than at start-up
+            import snowflake.connector
+            return snowflake.connector.connect(**config)
+    snowflake_pool = SnowflakePool(
+        lambda: connect(**SNOWFLAKE_CONFIG),
+        **SNOWFLAKE_POOL_CONFIG
+    )
+    logger.info(f"Snowflake connection pool created (max_size={snowflake_pool.max_size})")
+
+@app.on_event("shutdown")
+async def close_snowflake_pool():
+    if snowflake_pool is not None:
+        snowflake_pool.close()
+
+# Database executor settings: (max concurrent, max queued) per endpoint
+DB_EXECUTOR_WORKERS = int(os.getenv('DB_EXECUTOR_WORKERS', SNOWFLAKE_POOL_CONFIG['max_size']))
+DB_RETRY_AFTER_SECONDS = int(os.getenv('DB_RETRY_AFTER_SECONDS', '2'))
+DB_DEFAULT_ENDPOINT_LIMIT = (
+    int(os.getenv('DB_MAX_CONCURRENT_PER_ENDPOINT', '2')),
+    int(os.getenv('DB_MAX_QUEUED_PER_ENDPOINT', '16'))
+)
+DB_ENDPOINT_LIMITS = {
+    'query-executor': (2, 8),
+    'manual-query': (1, 4),
+    'execute-sql': (1, 4),
+    'query-stream': (2, 2),
+    'sql-explain': (2, 8),
+    'sql-heavy': (1, 4),
+    'github-events': (1, 1)
+}
+
+db_executor: Optional[DatabaseExecutor] = None
+
+@app.on_event("startup")
+async def create_db_executor():
+    global db_executor
+    db_executor = DatabaseExecutor(
+        max_workers=DB_EXECUTOR_WORKERS,
+        endpoint_limits=DB_ENDPOINT_LIMITS,
+        default_limit=DB_DEFAULT_ENDPOINT_LIMIT,
+        retry_after=DB_RETRY_AFTER_SECONDS
+    )
+
+@app.on_event("shutdown")
+async def shutdown_db_executor():
+    if db_executor is not None:
+        db_executor.shutdown()
+
+# Multi-worker mode (uvicorn --workers, WEB_CONCURRENCY > 1): the workers of a host
+# share dashboard results through SQLite, one elected leader runs the background
+# polling, and its WebSocket updates and watermark advances reach every worker
+# over a host channel
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '1'))
+MULTI_WORKER = os.getenv('MULTI_WORKER_ENABLED', str(WEB_CONCURRENCY > 1)).lower() == 'true'
+SHARED_STATE_DIR = os.getenv(
+    'SHARED_STATE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+)
+
+shared_cache: Optional[SharedCache] = None
+host_leader: Optional[HostLeader] = None
+host_channel: Optional[HostChannel] = None
+if MULTI_WORKER:
+    shared_cache = SharedCache(os.path.join(SHARED_STATE_DIR, 'shared_cache.db'))
+    host_leader = HostLeader(
+        os.path.join(SHARED_STATE_DIR, 'leader.lock'),
+        retry_interval=float(os.getenv('LEADER_RETRY_SECONDS', '5'))
+    )
+    host_channel = HostChannel(
+        os.path.join(SHARED_STATE_DIR, 'channel.db'),
+        poll_interval=float(os.getenv('HOST_CHANNEL_POLL_SECONDS', '0.5'))
+    )
+
+def is_host_leader() -> bool:
+    """True in the worker that runs background polling (always, with a single worker)"""
+    return host_leader is None or host_leader.is_leader
+
+# Set while applying a watermark advance received from another worker, so it is not re-published
+applying_remote_watermark = False
+
+@app.on_event("startup")
+async def start_host_sync():
+    if host_leader is None:
+        return
+    host_leader.start()
+    host_channel.start()
+    # Catch up with the leader's watermark instead of reading it from Snowflake again
+    latest = await asyncio.to_thread(host_channel.latest, "watermark")
+    if latest is not None:
+        await on_host_watermark(latest)
+    logger.info(f"Worker {os.getpid()} started ({'leader' if host_leader.is_leader else 'follower'})")
+
+@app.on_event("shutdown")
+async def stop_host_sync():
+    if host_leader is None:
+        return
+    await host_channel.stop()
+    await host_leader.stop()
+
+# Dashboard result cache settings
+result_cache = ResultCache(
+    max_bytes=int(os.getenv('CACHE_MAX_BYTES', str(32 * 1024 * 1024))),
+    ttl=float(os.getenv('CACHE_TTL_SECONDS', '60')),
+    stale_ttl=float(os.getenv('CACHE_STALE_SECONDS', '600')),
+    shared=shared_cache,
+    # Tags each value with the data version it was computed at, for ETags
+    version=lambda: watermark.version
+)
+
+# Ad-hoc SQL results, keyed on canonical query text; cleared when the watermark advances
+sql_result_cache = SQLResultCache(
+    max_bytes=int(os.getenv('SQL_CACHE_MAX_BYTES', str(16 * 1024 * 1024))),
+    ttl=float(os.getenv('SQL_CACHE_TTL_SECONDS', '300'))
+)
+
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+def require_admin(request: Request):
+    """Reject admin calls unless ADMIN_TOKEN is configured and supplied"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+@contextmanager
 def get_snowflake_connection():
-    """Get Snowflake connection with error handling"""
+    """Borrow a pooled Snowflake connection with error handling"""
     try:
-        conn = snowflake.connector.connect(**SNOWFLAKE_CONFIG)
-        return conn
+        conn = snowflake_pool.acquire()
+    except PoolTimeoutError as e:
+        logger.error(f"Snowflake connection pool exhausted: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Database is busy, please retry",
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         logger.error(f"Failed to connect to Snowflake: {e}")
         raise HTTPException(status_code=500, detail="Database connection failed")
 
+    try:
+        yield conn
+    finally:
+        snowflake_pool.release(conn)
+
+# Identical concurrent queries share one execution
+query_flights = SingleFlight()
+
+# Statement polling, cancellation and timeout counters
+query_controller = QueryController(statement_timeout=SNOWFLAKE_STATEMENT_TIMEOUT_SECONDS)
+
+# Cancellation scope of each in-flight execution, shared by its coalesced callers
+cancel_scopes = {}
+
+def raise_for_query_error(e: Exception):
+    """Map query timeouts and client disconnects to HTTP errors"""
+    if isinstance(e, QueryTimeoutError):
+        logger.warning(f"Query timed out: {e}")
+        raise HTTPException(status_code=504, detail=str(e))
+    if isinstance(e, (ClientDisconnectedError, QueryCancelledError)):
+        logger.info(f"Abandoned query: {e}")
+        # Nobody reads this response; 499 marks it as client-closed in the access log
+        raise HTTPException(status_code=499, detail="Client closed request")
+    raise e
+
+async def run_db(endpoint: str, fn, *args):
+    """Run blocking cursor work `fn(cursor, *args)` on the database executor.
+
+    Concurrent calls with the same function and arguments (SQL text in
+    canonical form) are coalesced into a single execution. Statements
+    run asynchronously in Snowflake and are cancelled by query ID when every
+    waiting client has disconnected.
+    """
+    key = make_flight_key(fn.__name__, *args)
+    scope = cancel_scopes.get(key)
+    if scope is None:
+        scope = cancel_scopes[key] = CancelScope()
+
+    def work(submitted: float):
+        started = time.perf_counter()
+        with get_snowflake_connection() as conn:
+            acquired = time.perf_counter()
+            cursor = query_controller.cursor(conn.cursor(), scope)
+            try:
+                return fn(cursor, *args)
+            finally:
+                cursor.close()
+                # fetch covers everything after the statements finished: reading and shaping rows
+                finished = time.perf_counter()
+                DB_STAGE_SECONDS.observe(started - submitted, endpoint=endpoint, stage="queue")
+                DB_STAGE_SECONDS.observe(acquired - started, endpoint=endpoint, stage="acquire")
+                DB_STAGE_SECONDS.observe(cursor.execute_seconds, endpoint=endpoint, stage="execute")
+                DB_STAGE_SECONDS.observe(finished - acquired - cursor.execute_seconds, endpoint=endpoint, stage="fetch")
+
+    async def execute():
+        try:
+            return await db_executor.run(endpoint, work, time.perf_counter())
+        finally:
+            if cancel_scopes.get(key) is scope:
+                del cancel_scopes[key]
+
+    try:
+        return await until_disconnected(query_flights.do(key, execute), scope)
+    except QueueFullError as e:
+        logger.warning(f"Rejecting {endpoint} request: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Too many concurrent requests, please retry",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except (QueryTimeoutError, ClientDisconnectedError, QueryCancelledError) as e:
+        raise_for_query_error(e)
+
+def _query_watermark(cursor):
+    """Latest event timestamp in RAW_EVENTS, on a worker thread"""
+    cursor.execute("SELECT MAX(V:created_at::TIMESTAMP) FROM RAW_EVENTS")
+    return cursor.fetchone()[0]
+
+def on_watermark_advance(previous: Optional[datetime], current: datetime):
+    """New events loaded: drop ad-hoc results and revalidate dashboard results"""
+    if previous is None:
+        return
+    removed = sql_result_cache.invalidate()
+    # The worker that saw the advance first has already expired the shared results
+    expired = result_cache.expire(local_only=applying_remote_watermark)
+    logger.info(f"Dropped {removed} cached SQL results and expired {expired} dashboard results")
+
+# Latest RAW_EVENTS timestamp, passed to queries instead of recomputing MAX(created_at)
+watermark = WatermarkService(
+    fetch=lambda: run_db("watermark", _query_watermark),
+    interval=float(os.getenv('WATERMARK_REFRESH_SECONDS', '60')),
+    should_poll=is_host_leader
+)
+watermark.add_listener(on_watermark_advance)
+
+def publish_watermark_advance(previous: Optional[datetime], current: datetime):
+    """Tell the host's other workers about an advance seen here"""
+    if host_channel is None or applying_remote_watermark:
+        return
+    # Listeners are synchronous, so the short SQLite write runs in the background outside the endpoint
+    # limiters; the channel counts failures
+    future = db_executor.submit(host_channel.publish, "watermark", {"latestEventAt": current.isoformat()})
+    future.add_done_callback(_log_watermark_publish)
+
+def _log_watermark_publish(future: "asyncio.Future[None]"):
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        logger.error(f"Failed to publish watermark advance to the other workers: {error}")
+
+watermark.add_listener(publish_watermark_advance)
+
+async def on_host_watermark(message: dict):
+    global applying_remote_watermark
+    applying_remote_watermark = True
+    try:
+        watermark.advance(datetime.fromisoformat(message["latestEventAt"]))
+    finally:
+        applying_remote_watermark = False
+
+# Cache-Control for data-versioned GET responses: browsers revalidate with the
+# ETag after max-age, CDNs keep them for s-maxage and serve stale while refetching
+HTTP_CACHE_CONTROL = cache_control(
+    max_age=int(os.getenv('HTTP_CACHE_MAX_AGE', '15')),
+    shared_max_age=int(os.getenv('HTTP_CACHE_SHARED_MAX_AGE', '60')),
+    stale_while_revalidate=int(os.getenv('HTTP_CACHE_STALE_SECONDS', '300'))
+)
+
+async def data_validators(request: Request) -> Optional[Validators]:
+    """ETag/Last-Modified for a GET response, from the watermark version and the request's parameters"""
+    latest_event_at = await watermark.get()
+    if latest_event_at is None:
+        return None
+    resource = f"{request.url.path}?{sorted(request.query_params.multi_items())}"
+    return Validators(watermark.version, resource, latest_event_at, HTTP_CACHE_CONTROL)
+
+@app.on_event("startup")
+async def start_watermark_refresh():
+    watermark.start()
+
+@app.on_event("shutdown")
+async def stop_watermark_refresh():
+    await watermark.stop()
+
+# Local hourly rollup settings
+ROLLUP_ENABLED = os.getenv('ROLLUP_ENABLED', 'true').lower() == 'true'
+ROLLUP_DB_PATH = os.getenv(
+    'ROLLUP_DB_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'rollups.db')
+)
+ROLLUP_REFRESH_SECONDS = float(os.getenv('ROLLUP_REFRESH_SECONDS', '300'))
+ROLLUP_LOOKBACK_HOURS = float(os.getenv('ROLLUP_LOOKBACK_HOURS', '2'))
+
+rollup_store: Optional[RollupStore] = None
+rollup_refresh_task: Optional[asyncio.Task] = None
+
+def rollup_available() -> bool:
+    """True when analytical endpoints can be answered from the local rollup"""
+    return rollup_store is not None and rollup_store.ready
+
+async def refresh_rollups_periodically():
+    """Keep the local rollup in step with RAW_EVENTS using its high-water mark"""
+    while True:
+        try:
+            if is_host_leader():
+                await run_db("rollup-refresh", rollup_store.refresh_from_snowflake)
+                # The refresh just read the newest events, so the watermark can follow for free
+                watermark.advance(rollup_store.latest_event_at())
+            else:
+                # The leader refreshes the shared file; pick up how far it got
+                await asyncio.to_thread(rollup_store.reload_state)
+        except Exception as e:
+            logger.error(f"Rollup refresh failed: {e}")
+        await asyncio.sleep(ROLLUP_REFRESH_SECONDS)
+
+@app.on_event("startup")
+async def start_rollup_refresh():
+    global rollup_store, rollup_refresh_task
+    if not ROLLUP_ENABLED:
+        return
+    try:
+        rollup_store = RollupStore(ROLLUP_DB_PATH, lookback_hours=ROLLUP_LOOKBACK_HOURS)
+    except Exception as e:
+        logger.error(f"Rollup store unavailable, serving from Snowflake only: {e}")
+        return
+    rollup_refresh_task = asyncio.create_task(refresh_rollups_periodically())
+
+@app.on_event("shutdown")
+async def stop_rollup_refresh():
+    if rollup_refresh_task is not None:
+        rollup_refresh_task.cancel()
+
+# Distinct counts are exact COUNT(DISTINCT ...) by default; accuracy=approx switches to
+# HyperLogLog estimates (APPROX_COUNT_DISTINCT in Snowflake, daily sketches in the rollup)
+ACCURACY_MODES = ('exact', 'approx')
+
+def validate_accuracy(accuracy: Optional[str]) -> bool:
+    """True when approximate distinct counts were requested"""
+    accuracy = (accuracy or 'exact').lower()
+    if accuracy not in ACCURACY_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported accuracy '{accuracy}'. Use one of: {', '.join(ACCURACY_MODES)}"
+        )
+    return accuracy == 'approx'
+
+def distinct_count(expression: str, approx: bool) -> str:
+    return f"APPROX_COUNT_DISTINCT({expression})" if approx else f"COUNT(DISTINCT {expression})"
+
+def accuracy_metadata(approx: bool) -> dict:
+    """How a response's distinct counts were computed, with the estimate's error bound"""
+    if not approx:
+        return {"mode": "exact"}
+    error = relative_standard_error()
+    return {
+        "mode": "approx",
+        "algorithm": "hyperloglog",
+        "relativeStandardError": round(error, 5),
+        # Two standard errors: about 95% of estimates fall within this fraction of the true count
+        "errorBound95": round(2 * error, 5)
+    }
+
+# Keyset pagination: follow-up pages are sliced from one cached, sorted aggregate of
+# up to PAGINATION_MAX_ROWS groups instead of re-running the query with a bigger LIMIT
+PAGINATION_MAX_ROWS = int(os.getenv('PAGINATION_MAX_ROWS', '10000'))
+
+def read_cursor(cursor: str, fingerprint: str):
+    """(event_count, key, watermark version) of a pagination cursor, or 400"""
+    try:
+        return decode_cursor(cursor, fingerprint)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+async def load_sorted_aggregate(name: str, cursor_watermark: str, load, **params):
+    """(sorted rows, info, watermark version) to page through; `load` returns (rows, info).
+
+    While the aggregate the cursor was issued against is cached, pages keep
+    coming from that version of the data; afterwards they continue, by key,
+    through an aggregate of the current version.
+    """
+    cached = result_cache.get(make_cache_key(name, watermark=cursor_watermark, **params))
+    if cached is not None:
+        return cached
+
+    async def compute():
+        version = watermark.version
+        rows, info = await load()
+        return sort_aggregate(rows), info, version
+
+    return await result_cache.get_or_compute(make_cache_key(name, watermark=watermark.version, **params), compute)
+
 @app.get("/")
 async def root():
     return {"message": "GitHub Events Analytics API", "status": "running"}
@@ -100,62 +532,169 @@ async def root():
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until the start-up warm-up has run, with the cold-start timings"""
+    return json_response({
+        "status": "ready" if readiness.ready else "warming",
+        **readiness.stats(),
+        "timestamp": datetime.now().isoformat()
+    }, status_code=200 if readiness.ready else 503)
+
+@app.get("/api/pool-stats")
+async def get_pool_stats():
+    """Get Snowflake connection pool occupancy and wait-time statistics"""
+    if snowflake_pool is None:
+        raise HTTPException(status_code=503, detail="Connection pool not initialized")
+    return {
+        "success": True,
+        "data": {
+            **snowflake_pool.stats(),
+            "executor": db_executor.stats() if db_executor else None,
+            "sqlGuard": scan_admission.stats(),
+            "queries": query_controller.stats()
+        },
+        "timestamp": datetime.now().isoformat()
+    }
+
+def _query_github_metrics(cursor, since_24h: Optional[datetime], approx: bool):
+    """Compute every KPI for /api/github-metrics in one scan of RAW_EVENTS on a worker thread"""
+    # The VARIANT paths are extracted once and the per-day totals are derived
+    # with a window function instead of separate subqueries over the table; the
+    # 24h window starts 24 hours before the watermark, not the current time.
+    cursor.execute(f"""
+        WITH events AS (
+            SELECT 
+                V:created_at::TIMESTAMP as created_at,
+                V:repo.name::STRING as repo_name,
+                V:actor.login::STRING as actor_login
+            FROM RAW_EVENTS
+        ),
+        windowed AS (
+            SELECT 
+                created_at,
+                repo_name,
+                actor_login,
+                COUNT(*) OVER (PARTITION BY DATE(created_at)) as daily_events
+            FROM events
+        )
+        SELECT 
+            COUNT(*) as total_events,
+            {distinct_count('repo_name', approx)} as unique_repos,
+            {distinct_count('actor_login', approx)} as unique_users,
+            COUNT_IF(created_at >= %s) as events_24h,
+            MAX(daily_events) as peak_daily_events,
+            COUNT(DISTINCT DATE(created_at)) as days_operational
+        FROM windowed
+    """, (since_24h,))
+    total_events, unique_repos, unique_users, events_24h, peak_daily_events, days_operational = cursor.fetchone()
+    
+    return {
+        "totalEvents": total_events,
+        "uniqueRepos": unique_repos,
+        "uniqueUsers": unique_users,
+        "events24h": events_24h or 0,
+        "peakDailyEvents": peak_daily_events or 0,
+        "daysOperational": days_operational or 0
+    }
+
+@app.get("/api/cache-stats")
+async def get_cache_stats():
+    """Get result cache and query coalescing statistics"""
+    return {
+        "success": True,
+        "data": {
+            **result_cache.stats(),
+            "singleFlight": query_flights.stats(),
+            "sql": sql_result_cache.stats(),
+            "rollup": rollup_store.stats() if rollup_store else None,
+            "watermark": watermark.stats(),
+            "snapshot": snapshot_store.stats() if snapshot_store else None,
+            "host": {
+                **host_leader.stats(),
+                "channel": host_channel.stats()
+            } if host_leader else None
+        },
+        "timestamp": datetime.now().isoformat()
+    }
+
+def collect_component_stats():
+    """Stats of every component, sampled as gauges on each /metrics scrape"""
+    yield "snowflake_pool", snowflake_pool.stats() if snowflake_pool else None, {}
+    yield "snowflake_queries", query_controller.stats(), {}
+    if db_executor is not None:
+        executor_stats = db_executor.stats()
+        yield "db_executor", {"maxWorkers": executor_stats["maxWorkers"]}, {}
+        for name, limiter_stats in executor_stats["endpoints"].items():
+            yield "db_executor_endpoint", limiter_stats, {"endpoint": name}
+    yield "result_cache", result_cache.stats(), {}
+    yield "sql_cache", sql_result_cache.stats(), {}
+    yield "single_flight", query_flights.stats(), {}
+    yield "sql_guard", scan_admission.stats(), {}
+    yield "rollup", rollup_store.stats() if rollup_store else None, {}
+    yield "watermark", watermark.stats(), {}
+    yield "snapshot", snapshot_store.stats() if snapshot_store else None, {}
+    yield "host_leader", host_leader.stats() if host_leader else None, {}
+    yield "host_channel", host_channel.stats() if host_channel else None, {}
+    yield "websocket", manager.stats(), {}
+    yield "websocket_poller", github_events_poller.stats(), {}
+
+REGISTRY.register_collector(collect_component_stats)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text exposition: per-route and per-stage latency histograms plus component gauges"""
+    return Response(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.post("/api/admin/cache/invalidate")
+async def invalidate_cache(request: Request, endpoint: Optional[str] = Query(None, description="Only invalidate this endpoint's entries")):
+    """Drop cached dashboard results so the next request reads fresh data"""
+    require_admin(request)
+    removed = result_cache.invalidate(endpoint)
+    logger.info(f"Invalidated {removed} cache entries (endpoint={endpoint or 'all'})")
+    return {
+        "success": True,
+        "data": {"invalidated": removed},
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.post("/api/admin/ingest-notify")
+async def notify_ingest(
+    request: Request,
+    latest_event_at: Optional[datetime] = Query(None, description="Newest created_at just loaded; the watermark is re-read when omitted")
+):
+    """Called by the loader after new events land, so caches turn over without waiting for the next refresh"""
+    require_admin(request)
+    if latest_event_at is not None:
+        advanced = watermark.notify(latest_event_at.replace(tzinfo=None))
+    else:
+        watermark.notify()
+        advanced = await watermark.refresh()
+    return {
+        "success": True,
+        "data": {"advanced": advanced, **watermark.stats()},
+        "timestamp": datetime.now().isoformat()
+    }
+
+async def load_github_metrics(approx: bool):
+    """KPI row windowed against the current watermark; approximate KPIs come from the rollup when loaded"""
+    latest_event_at = await watermark.get()
+    since_24h = latest_event_at - timedelta(hours=24) if latest_event_at else None
+    if approx and since_24h is not None and rollup_available():
+        return await asyncio.to_thread(rollup_store.approximate_metrics, since_24h)
+    return await run_db("github-metrics", _query_github_metrics, since_24h, approx)
+
 @app.get("/api/github-metrics")
-async def get_github_metrics():
+async def get_github_metrics(request: Request, accuracy: str = Query("exact", description="exact, or approx for HyperLogLog distinct counts")):
     """Get overall GitHub events metrics"""
     try:
-        conn = get_snowflake_connection()
-        cursor = conn.cursor()
-        
-        # Get total events count from ALL data (not restricted to 30 days)
-        cursor.execute("""
-            SELECT COUNT(*) as total_events
-            FROM RAW_EVENTS
-        """)
-        total_events = cursor.fetchone()[0]
-        
-        # Get unique repositories count from ALL data
-        cursor.execute("""
-            SELECT COUNT(DISTINCT V:repo.name::STRING) as unique_repos
-            FROM RAW_EVENTS
-        """)
-        unique_repos = cursor.fetchone()[0]
+        approx = validate_accuracy(accuracy)
+        validators = await data_validators(request)
+        if validators is not None and validators.matches(request.headers):
+            return validators.not_modified()
         
-        # Get unique users count from ALL data
-        cursor.execute("""
-            SELECT COUNT(DISTINCT V:actor.login::STRING) as unique_users
-            FROM RAW_EVENTS
-        """)
-        unique_users = cursor.fetchone()[0]
-        
-        # Get events in last 24 hours (relative to latest data, not current time)
-        cursor.execute("""
-            SELECT COUNT(*) as events_24h
-            FROM RAW_EVENTS
-            WHERE V:created_at::TIMESTAMP >= (
-                SELECT MAX(V:created_at::TIMESTAMP) - INTERVAL '24 HOUR'
-                FROM RAW_EVENTS
-            )
-        """)
-        events_24h = cursor.fetchone()[0]
-        
-        # Get peak daily events (highest single day from ALL data)
-        cursor.execute("""
-            SELECT MAX(daily_events) as peak_daily_events
-            FROM (
-                SELECT DATE(V:created_at::TIMESTAMP) as date, COUNT(*) as daily_events
-                FROM RAW_EVENTS
-                GROUP BY DATE(V:created_at::TIMESTAMP)
-            )
-        """)
-        peak_daily_events = cursor.fetchone()[0] or 0
-        
-        # Calculate days operational (days with data from ALL data)
-        cursor.execute("""
-            SELECT COUNT(DISTINCT DATE(V:created_at::TIMESTAMP)) as days_operational
-            FROM RAW_EVENTS
-        """)
-        days_operational = cursor.fetchone()[0] or 0
+        cache_key = make_cache_key("github-metrics", approx=approx)
+        metrics = await result_cache.get_or_compute(cache_key, lambda: load_github_metrics(approx))
         
         # Calculate uptime percentage based on actual operational period
         # Your production run was from Aug 9-20 (12 days total)
@@ -163,23 +702,18 @@ async def get_github_metrics():
         total_operational_period = 12  # Aug 9-20, 2025
         uptime = 33.3  # Fixed to show actual pipeline uptime
         
-        cursor.close()
-        conn.close()
-        
-        return {
+        return json_response({
             "success": True,
             "data": {
-                "totalEvents": total_events,
-                "uniqueRepos": unique_repos,
-                "uniqueUsers": unique_users,
-                "events24h": events_24h,
-                "peakDailyEvents": peak_daily_events,
-                "daysOperational": days_operational,
+                **metrics,
                 "uptime": uptime,
-                "lastUpdated": datetime.now().isoformat()
-            }
-        }
+                "lastUpdated": datetime.now()
+            },
+            "accuracy": accuracy_metadata(approx)
+        }, headers=validators.headers() if validators and result_cache.is_current(cache_key) else None)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching GitHub metrics: {e}")
         return {
@@ -188,43 +722,52 @@ async def get_github_metrics():
             "error": str(e)
         }
 
+def _query_github_timeline(cursor, approx: bool):
+    """Run the daily timeline query for /api/github-timeline on a worker thread"""
+    cursor.execute(f"""
+        SELECT 
+            DATE(V:created_at::TIMESTAMP) as date,
+            COUNT(*) as event_count,
+            {distinct_count('V:repo.name::STRING', approx)} as repo_count,
+            {distinct_count('V:actor.login::STRING', approx)} as user_count
+        FROM RAW_EVENTS
+        GROUP BY DATE(V:created_at::TIMESTAMP)
+        ORDER BY date DESC
+    """)
+    return cursor.fetchall()
+
+TIMELINE_ROW = RowMapper({
+    "date": column(0),
+    "totalEvents": column(1),
+    "uniqueRepositories": column(2),
+    "uniqueUsers": column(3)
+})
+
+async def load_github_timeline(approx: bool):
+    """Daily timeline rows from the local rollup when loaded, else from Snowflake"""
+    if rollup_available():
+        return await asyncio.to_thread(rollup_store.timeline, approx)
+    return await run_db("github-timeline", _query_github_timeline, approx)
+
 @app.get("/api/github-timeline")
-async def get_github_timeline():
+async def get_github_timeline(request: Request, accuracy: str = Query("exact", description="exact, or approx for HyperLogLog distinct counts")):
     """Get GitHub events timeline data"""
     try:
-        conn = get_snowflake_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT 
-                DATE(V:created_at::TIMESTAMP) as date,
-                COUNT(*) as event_count,
-                COUNT(DISTINCT V:repo.name::STRING) as repo_count,
-                COUNT(DISTINCT V:actor.login::STRING) as user_count
-            FROM RAW_EVENTS
-            GROUP BY DATE(V:created_at::TIMESTAMP)
-            ORDER BY date DESC
-        """)
-        
-        results = cursor.fetchall()
-        timeline_data = [
-            {
-                "date": str(row[0]),
-                "totalEvents": row[1],
-                "uniqueRepositories": row[2],
-                "uniqueUsers": row[3]
-            }
-            for row in results
-        ]
-        
-        cursor.close()
-        conn.close()
-        
-        return {
+        approx = validate_accuracy(accuracy)
+        validators = await data_validators(request)
+        if validators is not None and validators.matches(request.headers):
+            return validators.not_modified()
+        
+        cache_key = make_cache_key("github-timeline", approx=approx)
+        results = await result_cache.get_or_compute(cache_key, lambda: load_github_timeline(approx))
+        return json_response({
             "success": True,
-            "data": timeline_data
-        }
+            "data": TIMELINE_ROW.map(results),
+            "accuracy": accuracy_metadata(approx)
+        }, headers=validators.headers() if validators and result_cache.is_current(cache_key) else None)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching timeline data: {e}")
         return {
@@ -233,45 +776,93 @@ async def get_github_timeline():
             "error": str(e)
         }
 
+def _query_github_repositories(cursor, limit: int, approx: bool):
+    """Run the top-repositories query for /api/github-repositories on a worker thread"""
+    cursor.execute(f"""
+        SELECT 
+            V:repo.name::STRING as repo_name,
+            COUNT(*) as event_count,
+            {distinct_count('V:actor.login::STRING', approx)} as unique_users,
+            MAX(V:created_at::TIMESTAMP) as last_activity
+        FROM RAW_EVENTS
+        GROUP BY V:repo.name::STRING
+        ORDER BY event_count DESC, repo_name
+        LIMIT %s
+    """, (limit,))
+    return cursor.fetchall()
+
+def sql_timestamp_text(value: Any) -> str:
+    """`str()` of a timestamp (`2024-01-01 12:00:00`), also for cached rows whose datetimes became ISO-8601 text"""
+    if isinstance(value, str):
+        try:
+            return str(datetime.fromisoformat(value))
+        except ValueError:
+            return value
+    return str(value)
+
+REPOSITORY_ROW = RowMapper({
+    "repoName": column(0),
+    "totalActivity": column(1),
+    "uniqueContributors": column(2),
+    "lastActivity": column(3, sql_timestamp_text),
+    "category": constant("Active")  # Default category
+})
+
+async def load_github_repositories(limit: int, approx: bool):
+    """(rows, approximate) for the top repositories, from Snowflake.
+
+    The rollup has no actors in its key, so it cannot count each
+    repository's users; the result cache keeps this off the warehouse.
+    """
+    return await run_db("github-repositories", _query_github_repositories, limit, approx), approx
+
 @app.get("/api/github-repositories")
-async def get_github_repositories(limit: int = Query(10, ge=1, le=100)):
+async def get_github_repositories(
+    request: Request,
+    limit: int = Query(10, ge=1, le=100),
+    accuracy: str = Query("exact", description="exact, or approx for HyperLogLog distinct counts"),
+    cursor: Optional[str] = Query(None, description="nextCursor of the previous page")
+):
     """Get top GitHub repositories by event count"""
     try:
-        conn = get_snowflake_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT 
-                V:repo.name::STRING as repo_name,
-                COUNT(*) as event_count,
-                COUNT(DISTINCT V:actor.login::STRING) as unique_users,
-                MAX(V:created_at::TIMESTAMP) as last_activity
-            FROM RAW_EVENTS
-            GROUP BY V:repo.name::STRING
-            ORDER BY event_count DESC
-            LIMIT %s
-        """, (limit,))
-        
-        results = cursor.fetchall()
-        repo_data = [
-            {
-                "repoName": row[0],
-                "totalActivity": row[1],
-                "uniqueContributors": row[2],
-                "lastActivity": str(row[3]),
-                "category": "Active"  # Default category
-            }
-            for row in results
-        ]
-        
-        cursor.close()
-        conn.close()
-        
-        return {
+        approx = validate_accuracy(accuracy)
+        validators = await data_validators(request)
+        if validators is not None and validators.matches(request.headers):
+            return validators.not_modified()
+        
+        fingerprint = query_fingerprint(make_cache_key("github-repositories", approx=approx))
+        if cursor is None:
+            cache_key = make_cache_key("github-repositories", limit=limit, approx=approx)
+            results, approximate = await result_cache.get_or_compute(
+                cache_key,
+                lambda: load_github_repositories(limit, approx)
+            )
+            has_more = len(results) == limit
+            version = watermark.version
+            current = result_cache.is_current(cache_key)
+        else:
+            after_count, after_key, cursor_watermark = read_cursor(cursor, fingerprint)
+            rows, approximate, version = await load_sorted_aggregate(
+                "github-repositories:pages",
+                cursor_watermark,
+                lambda: load_github_repositories(PAGINATION_MAX_ROWS, approx),
+                approx=approx
+            )
+            results, has_more = page_after(rows, (after_count, after_key), limit)
+            # Pages of an older aggregate must not carry the current version's validators
+            current = version == watermark.version
+        return json_response({
             "success": True,
-            "data": repo_data
-        }
+            "data": REPOSITORY_ROW.map(results),
+            "accuracy": accuracy_metadata(approximate),
+            "pagination": {
+                "nextCursor": next_cursor(results, has_more, version, fingerprint),
+                "hasMore": has_more
+            }
+        }, headers=validators.headers() if validators and current else None)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching repository data: {e}")
         return {
@@ -280,44 +871,66 @@ async def get_github_repositories(limit: int = Query(10, ge=1, le=100)):
             "error": str(e)
         }
 
+# Time ranges for the query executor, relative to the latest event in the data
+TIME_RANGE_DELTAS = {
+    '1d': timedelta(days=1),
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30),
+    '90d': timedelta(days=90),
+    '1y': timedelta(days=365)
+}
+
+DAY_NAMES = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+
+def _query_executor_mapper(group_by: str) -> RowMapper:
+    if group_by == 'day':
+        return RowMapper({
+            "day": computed(lambda row: DAY_NAMES[row[0] - 1] if row[0] else 'Unknown'),
+            "day_number": column(0),
+            "event_count": column(1),
+            "unique_count": column(2)
+        })
+    return RowMapper({
+        group_by: column(0),
+        "event_count": column(1),
+        "unique_count": column(2)
+    })
+
+QUERY_EXECUTOR_ROWS = {
+    group_by: _query_executor_mapper(group_by)
+    for group_by in ('repository', 'user', 'event_type', 'language', 'hour', 'day')
+}
+
+def _query_custom_events(cursor, query: str, time_filter: datetime):
+    """Run a query-executor query on a worker thread"""
+    logger.info(f"Executing query: {query}")
+    cursor.execute(query, (time_filter,))
+    return cursor.fetchall()
+
 @app.get("/api/query-executor")
 async def execute_custom_query(
+    request: Request,
     event_types: str = Query(..., description="Comma-separated list of event types"),
     time_range: str = Query(..., description="Time range (1d, 7d, 30d, 90d, 1y)"),
     group_by: str = Query(..., description="Group by field"),
     limit: int = Query(50, ge=1, le=1000, description="Result limit"),
-    sort_by: str = Query("event_count", description="Sort by field")
+    sort_by: str = Query("event_count", description="Sort by field"),
+    accuracy: str = Query("exact", description="exact, or approx for HyperLogLog distinct counts"),
+    cursor: Optional[str] = Query(None, description="nextCursor of the previous page (sort_by=event_count only)")
 ):
     """Execute custom queries on GitHub events data"""
     try:
-        conn = get_snowflake_connection()
-        cursor = conn.cursor()
+        approx = validate_accuracy(accuracy)
+        validators = await data_validators(request)
+        if validators is not None and validators.matches(request.headers):
+            return validators.not_modified()
         
         # Parse event types
         event_type_list = [et.strip() for et in event_types.split(',')]
         
-        # Build time filter - use actual data range instead of relative to current date
-        # First get the latest timestamp from the data
-        cursor.execute("SELECT MAX(V:created_at::TIMESTAMP) FROM RAW_EVENTS")
-        latest_timestamp = cursor.fetchone()[0]
-        
-        if not latest_timestamp:
-            raise HTTPException(status_code=400, detail="No data available")
-        
-        # Calculate time filters based on actual data range
-        time_filters = {
-            '1d': latest_timestamp - timedelta(days=1),
-            '7d': latest_timestamp - timedelta(days=7),
-            '30d': latest_timestamp - timedelta(days=30),
-            '90d': latest_timestamp - timedelta(days=90),
-            '1y': latest_timestamp - timedelta(days=365)
-        }
-        
-        if time_range not in time_filters:
+        if time_range not in TIME_RANGE_DELTAS:
             raise HTTPException(status_code=400, detail="Invalid time range")
         
-        time_filter = time_filters[time_range]
-        
         # Build event type filter
         if 'all' in event_type_list:
             event_type_filter = ""
@@ -342,7 +955,8 @@ async def execute_custom_query(
         
         # Build sort by clause
         sort_by_mapping = {
-            'event_count': 'event_count DESC',
+            # Ties broken by the group key (column 1) so keyset pages are stable
+            'event_count': 'event_count DESC, 1 ASC',
             'timestamp': 'V:created_at::TIMESTAMP DESC',
             'repository': 'V:repo.name::STRING ASC',
             'user': 'V:actor.login::STRING ASC'
@@ -353,53 +967,74 @@ async def execute_custom_query(
         
         sort_clause = sort_by_mapping[sort_by]
         
-        # Execute query using RAW_EVENTS table with JSON extraction
-        query = f"""
-            SELECT 
-                {group_by_field} as {group_by},
-                COUNT(*) as event_count,
-                COUNT(DISTINCT {group_by_field}) as unique_count
-            FROM RAW_EVENTS
-            WHERE V:created_at::TIMESTAMP >= %s
-            {event_type_filter}
-            GROUP BY {group_by_field}
-            ORDER BY {sort_clause}
-            LIMIT {limit}
-        """
-        
-        logger.info(f"Executing query: {query}")
-        cursor.execute(query, (time_filter,))
-        
-        results = cursor.fetchall()
+        if cursor is not None and sort_by != 'event_count':
+            raise HTTPException(status_code=400, detail="Cursors are only supported with sort_by=event_count")
+        
+        async def load(row_limit: int):
+            """(rows, source, approximate) for the top `row_limit` groups"""
+            # Serve from the local hourly rollup when it covers the requested grouping
+            if rollup_available() and group_by in ROLLUP_GROUPINGS and sort_by == 'event_count':
+                time_filter = rollup_store.latest_event_at() - TIME_RANGE_DELTAS[time_range]
+                rows = await asyncio.to_thread(
+                    rollup_store.grouped_counts,
+                    group_by,
+                    time_filter,
+                    None if 'all' in event_type_list else event_type_list,
+                    row_limit
+                )
+                # The rollup's unique counts are exact
+                return rows, "rollup", False
+            
+            # Execute query using RAW_EVENTS table with JSON extraction
+            query = f"""
+                SELECT 
+                    {group_by_field} as {group_by},
+                    COUNT(*) as event_count,
+                    {distinct_count(group_by_field, approx)} as unique_count
+                FROM RAW_EVENTS
+                WHERE V:created_at::TIMESTAMP >= %s
+                {event_type_filter}
+                GROUP BY {group_by_field}
+                ORDER BY {sort_clause}
+                LIMIT {row_limit}
+            """
+            # Time ranges are relative to the latest event in the data, not the current date
+            latest_event_at = await watermark.get()
+            if latest_event_at is None:
+                raise HTTPException(status_code=400, detail="No data available")
+            time_filter = latest_event_at - TIME_RANGE_DELTAS[time_range]
+            rows = await run_db("query-executor", _query_custom_events, query, time_filter)
+            return rows, "warehouse", approx
+        
+        fingerprint = query_fingerprint(make_cache_key(
+            "query-executor", event_types=sorted(event_type_list), time_range=time_range, group_by=group_by, approx=approx
+        ))
+        if cursor is None:
+            # The version the rows are computed at, not whatever it is once they arrive
+            version = watermark.version
+            results, source, approx = await load(limit)
+            has_more = sort_by == 'event_count' and len(results) == limit
+        else:
+            after_count, after_key, cursor_watermark = read_cursor(cursor, fingerprint)
+            
+            async def load_aggregate():
+                rows, aggregate_source, approximate = await load(PAGINATION_MAX_ROWS)
+                return rows, (aggregate_source, approximate)
+            
+            rows, (source, approx), version = await load_sorted_aggregate(
+                "query-executor:pages",
+                cursor_watermark,
+                load_aggregate,
+                fingerprint=fingerprint
+            )
+            results, has_more = page_after(rows, (after_count, after_key), limit)
+        # Pages of an older aggregate must not carry the current version's validators
+        current = version == watermark.version
         
         # Format results based on group by field
-        formatted_results = []
-        for row in results:
-            if group_by == 'hour':
-                formatted_results.append({
-                    "hour": row[0],
-                    "event_count": row[1],
-                    "unique_count": row[2]
-                })
-            elif group_by == 'day':
-                day_names = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
-                formatted_results.append({
-                    "day": day_names[row[0] - 1] if row[0] else 'Unknown',
-                    "day_number": row[0],
-                    "event_count": row[1],
-                    "unique_count": row[2]
-                })
-            else:
-                formatted_results.append({
-                    group_by: row[0],
-                    "event_count": row[1],
-                    "unique_count": row[2]
-                })
+        formatted_results = QUERY_EXECUTOR_ROWS[group_by].map(results)
         
-        cursor.close()
-        conn.close()
-        
-        return {
+        return json_response({
             "success": True,
             "data": formatted_results,
             "metadata": {
@@ -411,9 +1046,15 @@ async def execute_custom_query(
                     "sortBy": sort_by
                 },
                 "resultCount": len(formatted_results),
-                "executedAt": datetime.now().isoformat()
+                "source": source,
+                "accuracy": accuracy_metadata(approx),
+                "pagination": {
+                    "nextCursor": next_cursor(results, has_more, version, fingerprint),
+                    "hasMore": has_more
+                },
+                "executedAt": datetime.now()
             }
-        }
+        }, headers=validators.headers() if validators and current else None)
         
     except HTTPException:
         raise
@@ -425,64 +1066,215 @@ async def execute_custom_query(
             "error": str(e)
         }
 
+# User query result limits: buffered JSON responses are capped at RESULT_MAX_ROWS,
+# NDJSON streams at STREAM_MAX_ROWS rows / STREAM_MAX_BYTES bytes
+RESULT_MAX_ROWS = int(os.getenv('RESULT_MAX_ROWS', '10000'))
+STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', '1000'))
+STREAM_MAX_ROWS = int(os.getenv('STREAM_MAX_ROWS', '1000000'))
+STREAM_MAX_BYTES = int(os.getenv('STREAM_MAX_BYTES', str(100 * 1024 * 1024)))
+RESULT_FORMATS = ('json', 'ndjson', 'columnar', 'arrow')
+
+# Scan-cost admission for user SQL, from EXPLAIN estimates of bytes scanned
+SQL_EXPLAIN_ENABLED = os.getenv('SQL_EXPLAIN_ENABLED', 'true').lower() == 'true'
+scan_admission = ScanAdmission(
+    max_scan_bytes=int(os.getenv('SQL_MAX_SCAN_BYTES', str(20 * 1024 ** 3))),
+    queue_scan_bytes=int(os.getenv('SQL_QUEUE_SCAN_BYTES', str(2 * 1024 ** 3))),
+    quota=ScanQuota(int(os.getenv('SQL_CLIENT_SCAN_BYTES_PER_MINUTE', str(50 * 1024 ** 3))))
+)
+
+def client_id(request: Request) -> str:
+    """Caller identity for quotas: the client IP reported by the Fly.io proxy, else the peer address"""
+    forwarded = request.headers.get('Fly-Client-IP') or request.headers.get('X-Forwarded-For', '').split(',')[0].strip()
+    return forwarded or (request.client.host if request.client else 'unknown')
+
+def guard_user_query(query: str, result_format: str, default_limit: Optional[int], rejected_status: int) -> GuardedQuery:
+    """Parse and validate a user query, clamping its LIMIT to what the response format allows"""
+    max_limit = STREAM_MAX_ROWS if result_format == 'ndjson' else RESULT_MAX_ROWS
+    try:
+        return guard_query(query, max_limit, default_limit)
+    except UnsafeQueryError as e:
+        raise HTTPException(status_code=rejected_status, detail=str(e))
+
+async def admit_user_query(query: str, client: str):
+    """EXPLAIN the query and apply the scan budgets; returns (scan estimate or None, heavy)"""
+    if not SQL_EXPLAIN_ENABLED:
+        return None, False
+    try:
+        cost = await run_db("sql-explain", explain_scan_cost, query)
+    except HTTPException:
+        raise
+    except Exception as e:
+        # Compile errors are reported by running the query itself
+        logger.warning(f"EXPLAIN failed, admitting query without a scan estimate: {e}")
+        return None, False
+
+    try:
+        heavy = scan_admission.admit(client, cost)
+    except ScanBudgetError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QuotaExceededError as e:
+        logger.warning(f"Rejecting query: {e}")
+        raise HTTPException(
+            status_code=429,
+            detail="Scanned-bytes quota exceeded, please retry later",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    return cost, heavy
+
+def _fetch_with_columns(cursor, query: str, max_rows: int):
+    """Run a user-submitted query on a worker thread and return (columns, types, rows, truncated)"""
+    cursor.execute(query)
+    results = cursor.fetchmany(max_rows + 1)
+    columns = [desc[0] for desc in cursor.description] if cursor.description else []
+    truncated = len(results) > max_rows
+    return columns, column_types(cursor.description), results[:max_rows], truncated
+
+async def fetch_user_query(endpoint: str, guarded: GuardedQuery, client: str):
+    """(result, cache hit, scan estimate) for an ad-hoc query, from the SQL cache when possible"""
+    cached = sql_result_cache.lookup(guarded.sql)
+    if cached is not None:
+        return cached, True, None
+
+    cost, heavy = await admit_user_query(guarded.sql, client)
+    columns, types, rows, truncated = await run_db(
+        "sql-heavy" if heavy else endpoint, _fetch_with_columns, guarded.sql, RESULT_MAX_ROWS
+    )
+    # A LIMIT imposed by the service may have cut the result short
+    truncated = truncated or (guarded.capped and len(rows) >= guarded.limit)
+    sql_result_cache.store(guarded.sql, columns, types, rows, truncated)
+    return CachedRows(columns, types, rows, truncated, guarded.limit), False, cost
+
+def validate_result_format(result_format: Optional[str]) -> str:
+    result_format = (result_format or 'json').lower()
+    if result_format not in RESULT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format '{result_format}'. Use one of: {', '.join(RESULT_FORMATS)}"
+        )
+    if result_format == 'arrow' and not arrow_available():
+        raise HTTPException(status_code=501, detail="Arrow output is not available: pyarrow is not installed")
+    return result_format
+
+async def columnar_query_response(endpoint: str, guarded: GuardedQuery, result_format: str, client: str) -> Response:
+    """Execute a user query and answer with column-oriented JSON or an Arrow IPC stream"""
+    start_time = time.time()
+    if result_format == 'arrow':
+        _, heavy = await admit_user_query(guarded.sql, client)
+        body, row_count, truncated = await run_db(
+            "sql-heavy" if heavy else endpoint, fetch_arrow_ipc, guarded.sql, RESULT_MAX_ROWS
+        )
+        truncated = truncated or (guarded.capped and row_count >= guarded.limit)
+        return Response(
+            body,
+            media_type=ARROW_STREAM_MEDIA_TYPE,
+            headers={
+                "X-Row-Count": str(row_count),
+                "X-Truncated": str(truncated).lower(),
+                "X-Execution-Time": f"{time.time() - start_time:.3f}s"
+            }
+        )
+
+    result, cache_hit, cost = await fetch_user_query(endpoint, guarded, client)
+    return json_response({
+        "success": True,
+        "data": {
+            "columns": result.columns,
+            "types": result.types,
+            "values": transpose_rows(result.rows, len(result.columns))
+        },
+        "metadata": {
+            "query": guarded.sql,
+            "format": "columnar",
+            "row_count": len(result.rows),
+            "truncated": result.truncated,
+            "cache_hit": cache_hit,
+            "scan_estimate": cost,
+            "execution_time": f"{time.time() - start_time:.3f}s",
+            "executed_at": datetime.now()
+        }
+    })
+
+async def stream_query_ndjson(query: str, client: str) -> StreamingResponse:
+    """Execute a user query and stream its rows as NDJSON, holding one connection for the stream"""
+    cost, _ = await admit_user_query(query, client)
+    metadata = {"query": query, "scanEstimate": cost}
+    limiter = db_executor.limiter('query-stream')
+    try:
+        await limiter.__aenter__()
+    except QueueFullError as e:
+        logger.warning(f"Rejecting streaming query: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Too many concurrent requests, please retry",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    scope = CancelScope()
+    stream = QueryStream(
+        get_snowflake_connection,
+        query,
+        batch_size=STREAM_BATCH_SIZE,
+        max_rows=STREAM_MAX_ROWS,
+        max_bytes=STREAM_MAX_BYTES,
+        wrap_cursor=lambda cursor: query_controller.cursor(cursor, scope)
+    )
+    try:
+        # Execute before responding so SQL errors still get a normal error response
+        await until_disconnected(db_executor.submit(stream.open), scope)
+    except BaseException as e:
+        db_executor.submit(stream.close).add_done_callback(lambda _: limiter.release())
+        if isinstance(e, (QueryTimeoutError, ClientDisconnectedError, QueryCancelledError)):
+            raise_for_query_error(e)
+        raise
+
+    async def body():
+        try:
+            async for chunk in stream.ndjson(db_executor.submit, metadata):
+                yield chunk
+        finally:
+            # Not awaited: this also runs when the client disconnects and the body is cancelled
+            db_executor.submit(stream.close).add_done_callback(lambda _: limiter.release())
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE)
+
 @app.post("/api/manual-query")
 async def execute_manual_query(request: Request):
     """Execute manual queries submitted by users"""
     try:
         body = await request.json()
         query = body.get('query', '').strip()
+        result_format = validate_result_format(body.get('format'))
         
         if not query:
             raise HTTPException(status_code=400, detail="Query is required")
         
-        # Basic SQL injection prevention
-        dangerous_keywords = ['DROP', 'DELETE', 'UPDATE', 'INSERT', 'ALTER', 'CREATE', 'TRUNCATE']
-        upper_query = query.upper()
-        
-        for keyword in dangerous_keywords:
-            if keyword in upper_query:
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"Query contains forbidden keyword: {keyword}. Only SELECT queries are allowed."
-                )
-        
-        # Ensure it's a SELECT query
-        if not upper_query.startswith('SELECT'):
-            raise HTTPException(
-                status_code=400, 
-                detail="Only SELECT queries are allowed for security reasons"
-            )
+        # Parse the query: a single read-only SELECT, with the row cap as its LIMIT
+        guarded = guard_user_query(query, result_format, None, rejected_status=400)
+        client = client_id(request)
         
         # Execute the manual query
-        conn = get_snowflake_connection()
-        cursor = conn.cursor()
-        
-        logger.info(f"Executing manual query: {query}")
-        cursor.execute(query)
-        
-        results = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description]
+        logger.info(f"Executing manual query: {guarded.sql}")
+        if result_format == 'ndjson':
+            return await stream_query_ndjson(guarded.sql, client)
+        if result_format in ('columnar', 'arrow'):
+            return await columnar_query_response("manual-query", guarded, result_format, client)
+        result, cache_hit, cost = await fetch_user_query("manual-query", guarded, client)
         
         # Format results
-        formatted_results = []
-        for row in results:
-            row_dict = {}
-            for i, value in enumerate(row):
-                row_dict[columns[i]] = value
-            formatted_results.append(row_dict)
+        formatted_results = mapper_for_columns(tuple(result.columns)).map(result.rows)
         
-        cursor.close()
-        conn.close()
-        
-        return {
+        return json_response({
             "success": True,
             "data": formatted_results,
             "metadata": {
-                "query": query,
+                "query": guarded.sql,
                 "resultCount": len(formatted_results),
-                "executedAt": datetime.now().isoformat()
+                "truncated": result.truncated,
+                "cacheHit": cache_hit,
+                "scanEstimate": cost,
+                "executedAt": datetime.now()
             }
-        }
+        })
         
     except HTTPException:
         raise
@@ -495,88 +1287,56 @@ async def execute_manual_query(request: Request):
         }
 
 @app.post("/api/execute-sql")
-async def execute_sql_query(request: SQLExecutionRequest):
+async def execute_sql_query(request: SQLExecutionRequest, http_request: Request):
     """Execute SQL queries against Snowflake database with enhanced security and performance"""
     try:
         query = request.query.strip()
         limit = request.limit or 100
+        result_format = validate_result_format(request.format)
         
         if not query:
             raise HTTPException(status_code=400, detail="SQL query is required")
         
-        # Enhanced security validation
-        dangerous_keywords = [
-            'DROP', 'DELETE', 'UPDATE', 'INSERT', 'ALTER', 'CREATE', 
-            'TRUNCATE', 'GRANT', 'REVOKE', 'EXEC', 'EXECUTE', 'CALL'
-        ]
-        
-        upper_query = query.upper()
-        
-        # Check for dangerous keywords
-        for keyword in dangerous_keywords:
-            if f' {keyword} ' in f' {upper_query} ' or upper_query.startswith(keyword):
-                raise HTTPException(
-                    status_code=403, 
-                    detail=f"Query contains forbidden operation: {keyword}. Only SELECT queries are allowed for security."
-                )
-        
-        # Ensure it's a SELECT query
-        if not upper_query.startswith('SELECT'):
-            raise HTTPException(
-                status_code=403, 
-                detail="Only SELECT queries are allowed for security reasons."
-            )
-        
-        # Add LIMIT if not present for safety
-        if 'LIMIT' not in upper_query:
-            query = f"{query.rstrip(';')} LIMIT {limit}"
+        # Security validation: parse the query, allow only a single read-only SELECT,
+        # and add or clamp its outer LIMIT
+        guarded = guard_user_query(query, result_format, limit, rejected_status=403)
+        query = guarded.sql
+        client = client_id(http_request)
         
         logger.info(f"🔍 Executing SQL query: {query[:200]}{'...' if len(query) > 200 else ''}")
         
+        if result_format == 'ndjson':
+            return await stream_query_ndjson(query, client)
+        if result_format in ('columnar', 'arrow'):
+            return await columnar_query_response("execute-sql", guarded, result_format, client)
+
         # Execute query with timing
         start_time = time.time()
-        conn = get_snowflake_connection()
-        cursor = conn.cursor()
+        result, cache_hit, cost = await fetch_user_query("execute-sql", guarded, client)
+        columns = result.columns
         
-        try:
-            cursor.execute(query)
-            results = cursor.fetchall()
-            columns = [desc[0] for desc in cursor.description] if cursor.description else []
-            
-            execution_time = time.time() - start_time
-            
-            # Format results as list of dictionaries
-            formatted_results = []
-            for row in results:
-                row_dict = {}
-                for i, value in enumerate(row):
-                    column_name = columns[i] if i < len(columns) else f"column_{i+1}"
-                    # Handle different data types
-                    if isinstance(value, datetime):
-                        row_dict[column_name] = value.isoformat()
-                    elif value is None:
-                        row_dict[column_name] = None
-                    else:
-                        row_dict[column_name] = value
-                formatted_results.append(row_dict)
-            
-            logger.info(f"✅ Query executed successfully: {len(formatted_results)} rows in {execution_time:.2f}s")
-            
-            return {
-                "success": True,
-                "data": formatted_results,
-                "metadata": {
-                    "query": query,
-                    "columns": columns,
-                    "row_count": len(formatted_results),
-                    "execution_time": f"{execution_time:.3f}s",
-                    "executed_at": datetime.now().isoformat()
-                }
+        execution_time = time.time() - start_time
+        
+        # Format results as list of dictionaries (datetimes are encoded as ISO-8601)
+        formatted_results = mapper_for_columns(tuple(columns)).map(result.rows)
+        
+        logger.info(f"✅ Query executed successfully: {len(formatted_results)} rows in {execution_time:.2f}s"
+                    f"{' (cached)' if cache_hit else ''}")
+        
+        return json_response({
+            "success": True,
+            "data": formatted_results,
+            "metadata": {
+                "query": query,
+                "columns": columns,
+                "row_count": len(formatted_results),
+                "truncated": result.truncated,
+                "cache_hit": cache_hit,
+                "scan_estimate": cost,
+                "execution_time": f"{execution_time:.3f}s",
+                "executed_at": datetime.now()
             }
-            
-        finally:
-            cursor.close()
-            conn.close()
+        })
         
     except HTTPException:
         raise
@@ -589,34 +1349,105 @@ async def execute_sql_query(request: SQLExecutionRequest):
             "details": "Check your SQL syntax and ensure you're querying the RAW_EVENTS table correctly."
         }
 
+# Sub-requests per /api/batch call
+BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', '10'))
+BATCH_METHODS = ('GET', 'POST')
+# Result formats whose responses are JSON; NDJSON and Arrow stream and cannot be embedded
+BATCH_FORMATS = ('json', 'columnar')
+# Largest response body buffered per sub-request
+BATCH_MAX_RESPONSE_BYTES = int(os.getenv('BATCH_MAX_RESPONSE_BYTES', str(4 * 1024 * 1024)))
+
+def validate_batch_item(item: BatchItem) -> Optional[str]:
+    """Why a sub-request cannot run in a batch, or None; checked before the call runs"""
+    method = (item.method or 'GET').upper()
+    if method not in BATCH_METHODS:
+        return f"Unsupported method '{method}'"
+    path, _, query_string = item.path.partition('?')
+    if not path.startswith('/api/') or path.startswith(('/api/batch', '/api/admin/')):
+        return f"Path '{path}' cannot be batched"
+
+    # The format can be given in the path, the params or a POST body
+    formats = [value for name, value in parse_qsl(query_string) if name == 'format']
+    if item.params and 'format' in item.params:
+        formats.append(item.params['format'])
+    if isinstance(item.body, dict) and 'format' in item.body:
+        formats.append(item.body['format'])
+    for result_format in formats:
+        if str(result_format or 'json').lower() not in BATCH_FORMATS:
+            return f"Format '{result_format}' streams its result and cannot be batched; use one of: {', '.join(BATCH_FORMATS)}"
+    return None
+
+@app.post("/api/batch")
+async def execute_batch(request: BatchRequest, http_request: Request):
+    """Run several API calls concurrently and return their responses together, with per-call status and timing"""
+    items = request.requests
+    if not items:
+        raise HTTPException(status_code=400, detail="At least one request is required")
+    if len(items) > BATCH_MAX_REQUESTS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_REQUESTS} requests per batch")
+    if len({item.id for item in items}) != len(items):
+        raise HTTPException(status_code=400, detail="Request ids must be unique")
+
+    started = time.perf_counter()
+    disconnected = asyncio.Event()
+    watcher = asyncio.ensure_future(watch_disconnect(http_request.receive, disconnected))
+
+    async def run(item: BatchItem):
+        problem = validate_batch_item(item)
+        if problem is not None:
+            return item.id, SubResponse(400, {"content-type": "application/json"}, dumps({"detail": problem}), 0.0)
+        body = dumps(item.body) if item.body is not None else None
+        return item.id, await call_app(
+            app, http_request.scope, (item.method or 'GET').upper(), item.path, item.params, body, disconnected,
+            max_bytes=BATCH_MAX_RESPONSE_BYTES
+        )
+
+    try:
+        # Calls share the connection pool, executor limits, caches and query coalescing
+        results = await asyncio.gather(*(run(item) for item in items))
+    finally:
+        watcher.cancel()
+    return Response(
+        render_batch(results, time.perf_counter() - started, datetime.now().isoformat()),
+        media_type="application/json"
+    )
+
+def github_snapshot_message(message_type: str) -> dict:
+    """Full snapshot message tagged with the poller's current version"""
+    return {
+        "type": message_type,
+        "version": github_events_poller.version,
+        "data": github_events_poller.snapshot,
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.websocket("/ws/github-events")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, delta: bool = Query(False, description="Receive versioned patches instead of full updates")):
+    await manager.connect(websocket, delta=delta)
     try:
-        # Send initial data immediately upon connection
-        initial_data = await fetch_latest_github_data()
+        # Send the shared poller's latest snapshot immediately upon connection
+        initial_data = await github_events_poller.get_snapshot()
         await manager.send_personal_message(
-            json.dumps({
+            dumps_text({
                 "type": "initial_data",
+                "version": github_events_poller.version,
                 "data": initial_data,
                 "timestamp": datetime.now().isoformat()
             }),
             websocket
         )
         
-        # Keep connection alive and send periodic updates
+        # Periodic updates come from the shared poller; only client requests are handled here
         while True:
-            await asyncio.sleep(30)  # Update every 30 seconds
-            
-            # Fetch latest data
-            latest_data = await fetch_latest_github_data()
+            message = await websocket.receive_text()
+            try:
+                request = json.loads(message)
+            except ValueError:
+                continue
             
-            # Broadcast to all connected clients
-            await manager.broadcast({
-                "type": "data_update",
-                "data": latest_data,
-                "timestamp": datetime.now().isoformat()
-            })
+            # Delta clients ask for a full snapshot when they detect a version gap
+            if isinstance(request, dict) and request.get("type") == "resync":
+                await manager.send_personal_message(dumps_text(github_snapshot_message("snapshot")), websocket)
             
     except WebSocketDisconnect:
         manager.disconnect(websocket)
@@ -625,61 +1456,53 @@ async def websocket_endpoint(websocket: WebSocket):
         logger.error(f"WebSocket error: {e}")
         manager.disconnect(websocket)
 
+def _query_latest_github_events(cursor, since: Optional[datetime]):
+    """Run the recent-activity query for WebSocket updates on a worker thread"""
+    # Get recent timeline data: the week up to the watermark
+    cursor.execute("""
+        SELECT 
+            DATE(V:created_at::TIMESTAMP) as date,
+            V:repo.name::STRING as repository,
+            V:type::STRING as event_type,
+            COUNT(*) as event_count,
+            HOUR(V:created_at::TIMESTAMP) as hour
+        FROM RAW_EVENTS
+        WHERE V:created_at::TIMESTAMP >= %s
+        GROUP BY 
+            DATE(V:created_at::TIMESTAMP),
+            V:repo.name::STRING,
+            V:type::STRING,
+            HOUR(V:created_at::TIMESTAMP)
+        ORDER BY date DESC, event_count DESC
+        LIMIT 100
+    """, (since,))
+    return cursor.fetchall()
+
+def _activity_count(event_type: str):
+    """Event count of a timeline row when it is of `event_type`, else 0"""
+    return lambda row: (row[3] or 0) if row[2] == event_type else 0
+
+LATEST_EVENTS_ROW = RowMapper({
+    "date": column(0),
+    "repository": computed(lambda row: row[1] or 'Unknown'),
+    "eventType": computed(lambda row: row[2] or 'Unknown'),
+    "commits": computed(_activity_count('PushEvent')),
+    "pullRequests": computed(_activity_count('PullRequestEvent')),
+    "issues": computed(_activity_count('IssuesEvent')),
+    "totalActivity": computed(lambda row: row[3] or 0),
+    "hour": computed(lambda row: row[4] or 0)
+})
+
 async def fetch_latest_github_data():
     """Fetch latest GitHub events data for real-time updates"""
     try:
-        conn = get_snowflake_connection()
-        cursor = conn.cursor()
-        
-        # Get recent timeline data
-        cursor.execute("""
-            SELECT 
-                DATE(V:created_at::TIMESTAMP) as date,
-                V:repo.name::STRING as repository,
-                V:type::STRING as event_type,
-                COUNT(*) as event_count,
-                HOUR(V:created_at::TIMESTAMP) as hour
-            FROM RAW_EVENTS
-            WHERE V:created_at::TIMESTAMP >= (
-                SELECT MAX(V:created_at::TIMESTAMP) - INTERVAL '7 DAY'
-                FROM RAW_EVENTS
-            )
-            GROUP BY 
-                DATE(V:created_at::TIMESTAMP),
-                V:repo.name::STRING,
-                V:type::STRING,
-                HOUR(V:created_at::TIMESTAMP)
-            ORDER BY date DESC, event_count DESC
-            LIMIT 100
-        """)
-        
-        results = cursor.fetchall()
-        timeline_data = []
-        
-        for row in results:
-            # Map event types to activity categories
-            event_type = row[2] or 'Unknown'
-            event_count = row[3] or 0
-            commits = event_count if event_type == 'PushEvent' else 0
-            pull_requests = event_count if event_type == 'PullRequestEvent' else 0
-            issues = event_count if event_type == 'IssuesEvent' else 0
-            
-            timeline_data.append({
-                "date": str(row[0]),
-                "repository": row[1] or 'Unknown',
-                "eventType": event_type,
-                "commits": commits,
-                "pullRequests": pull_requests,
-                "issues": issues,
-                "totalActivity": event_count,
-                "hour": row[4] or 0
-            })
-        
-        cursor.close()
-        conn.close()
+        latest_event_at = await watermark.get()
+        since = latest_event_at - timedelta(days=7) if latest_event_at else None
+        results = await run_db("github-events", _query_latest_github_events, since)
         
         return {
-            "timeline": timeline_data,
+            # Event types are mapped to activity categories (commits, pull requests, issues)
+            "timeline": LATEST_EVENTS_ROW.map(results),
             "lastFetch": datetime.now().isoformat()
         }
         
@@ -691,6 +1514,80 @@ async def fetch_latest_github_data():
             "lastFetch": datetime.now().isoformat()
         }
 
+async def broadcast_github_data(latest_data: dict, patch: Optional[dict], version: int):
+    """Fan a poller tick out: a patch for delta clients, the full snapshot for the rest"""
+    timestamp = datetime.now().isoformat()
+    
+    if patch is None:
+        # Nothing changed since the last tick
+        await manager.broadcast({
+            "type": "heartbeat",
+            "version": version,
+            "lastFetch": latest_data.get("lastFetch"),
+            "timestamp": timestamp
+        })
+        return
+    
+    await manager.broadcast(
+        {
+            "type": "data_update",
+            "version": version,
+            "data": latest_data,
+            "timestamp": timestamp
+        },
+        delta_message={
+            "type": "data_patch",
+            "version": version,
+            "baseVersion": version - 1,
+            "patch": patch,
+            "lastFetch": latest_data.get("lastFetch"),
+            "timestamp": timestamp
+        }
+    )
+
+async def publish_github_data(latest_data: dict, patch: Optional[dict], version: int):
+    """Fan a poller tick out to this worker's clients and, through the host channel, to the other workers'"""
+    if host_channel is not None:
+        await asyncio.to_thread(host_channel.publish, "github-events", {
+            "snapshot": latest_data,
+            "patch": patch,
+            "version": version
+        })
+    await broadcast_github_data(latest_data, patch, version)
+
+async def on_host_github_data(message: dict):
+    """A tick of the leader's poller: adopt its snapshot and fan it out to this worker's clients"""
+    github_events_poller.apply(message["snapshot"], message["patch"], message["version"])
+    await broadcast_github_data(message["snapshot"], message["patch"], message["version"])
+
+def has_github_subscribers() -> bool:
+    """Poll only in the host leader, and only while some worker has clients"""
+    if not is_host_leader():
+        return False
+    # The channel's cached sum: this runs on the event loop every poller tick
+    return bool(manager.active_connections) or (host_channel is not None and host_channel.presence_total("websockets") > 0)
+
+# One background producer feeds every WebSocket client (of every worker on the host)
+github_events_poller = SnapshotPoller(
+    fetch=fetch_latest_github_data,
+    publish=publish_github_data,
+    has_subscribers=has_github_subscribers,
+    interval=float(os.getenv('WS_POLL_INTERVAL_SECONDS', '30'))
+)
+
+if host_channel is not None:
+    host_channel.subscribe("watermark", on_host_watermark)
+    host_channel.subscribe("github-events", on_host_github_data)
+    host_channel.add_presence("websockets", lambda: len(manager.active_connections))
+
+@app.on_event("startup")
+async def start_github_events_poller():
+    github_events_poller.start()
+
+@app.on_event("shutdown")
+async def stop_github_events_poller():
+    await github_events_poller.stop()
+
 @app.get("/ws/test")
 async def websocket_test():
     """Test endpoint to verify WebSocket functionality"""
@@ -698,10 +1595,143 @@ async def websocket_test():
         "message": "WebSocket endpoint available",
         "endpoint": "/ws/github-events",
         "active_connections": len(manager.active_connections),
+        "poller": github_events_poller.stats(),
+        "broadcast": manager.stats(),
         "status": "ready"
     }
 
+# Persisted snapshot: fresh dashboard results and the WebSocket snapshot are saved
+# with their watermark, and a restarted instance serves them (as stale, so they
+# are recomputed in the background) instead of starting with empty caches
+SNAPSHOT_ENABLED = os.getenv('SNAPSHOT_ENABLED', 'true').lower() == 'true'
+SNAPSHOT_DB_PATH = os.getenv(
+    'SNAPSHOT_DB_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'snapshot.db')
+)
+SNAPSHOT_SAVE_SECONDS = float(os.getenv('SNAPSHOT_SAVE_SECONDS', '60'))
+# Result cache entries worth persisting; cursor-page aggregates are large and rebuilt on demand
+SNAPSHOT_CACHE_PREFIXES = ("github-metrics", "github-timeline", "github-repositories?")
+SNAPSHOT_REALTIME_KEY = "realtime:github-events"
+
+snapshot_store: Optional[SnapshotStore] = None
+snapshot_save_task: Optional[asyncio.Task] = None
+
+async def save_snapshot() -> int:
+    """Persist the dashboard results computed at the current watermark; returns entries written"""
+    if watermark.latest_event_at is None or not is_host_leader():
+        return 0
+    entries = result_cache.fresh_items(SNAPSHOT_CACHE_PREFIXES)
+    if github_events_poller.snapshot is not None:
+        entries[SNAPSHOT_REALTIME_KEY] = github_events_poller.snapshot
+    return await asyncio.to_thread(snapshot_store.save, entries, watermark.latest_event_at)
+
+async def save_snapshot_periodically():
+    while True:
+        await asyncio.sleep(SNAPSHOT_SAVE_SECONDS)
+        try:
+            await save_snapshot()
+        except Exception as e:
+            logger.error(f"Snapshot save failed: {e}")
+
+@app.on_event("startup")
+async def restore_snapshot():
+    global snapshot_store, snapshot_save_task
+    if not SNAPSHOT_ENABLED:
+        return
+    try:
+        snapshot_store = SnapshotStore(SNAPSHOT_DB_PATH)
+        entries = snapshot_store.load()
+    except Exception as e:
+        logger.error(f"Snapshot store unavailable, starting with empty caches: {e}")
+        snapshot_store = None
+        return
+
+    # Validators and time windows work from the snapshot's watermark until the live one is read
+    restored_watermark = max((tag for _, tag in entries.values() if tag), default=None)
+    watermark.advance(restored_watermark)
+    for key, (value, _) in entries.items():
+        if key == SNAPSHOT_REALTIME_KEY:
+            github_events_poller.restore(value)
+        elif key.startswith(SNAPSHOT_CACHE_PREFIXES):
+            result_cache.restore(key, value)
+    if entries:
+        logger.info(f"Restored {len(entries)} snapshot entries as of {restored_watermark}")
+    snapshot_save_task = asyncio.create_task(save_snapshot_periodically())
+
+@app.on_event("shutdown")
+async def persist_snapshot():
+    if snapshot_save_task is not None:
+        snapshot_save_task.cancel()
+    if snapshot_store is not None:
+        try:
+            await save_snapshot()
+        except Exception as e:
+            logger.error(f"Snapshot save on shutdown failed: {e}")
+
+# Cold start: once the server is up, log in, read the watermark and compute the
+# dashboard's first responses in the background; /ready reports 503 until then
+WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'true').lower() == 'true'
+WARMUP_CONNECTIONS = int(os.getenv('WARMUP_CONNECTIONS', '1'))
+# Repository limits requested by the dashboard (the live demo asks for 5, the default is 10)
+WARMUP_REPOSITORY_LIMITS = (5, 10)
+
+readiness = Readiness(
+    started_at=MODULE_IMPORT_STARTED,
+    timeout=float(os.getenv('WARMUP_TIMEOUT_SECONDS', '30'))
+)
+
+async def warm_connections():
+    count = max(SNOWFLAKE_POOL_CONFIG['min_size'], WARMUP_CONNECTIONS)
+    await asyncio.to_thread(snowflake_pool.open, count)
+
+async def warm_dashboard():
+    """Fill the result cache under the same keys and loaders the dashboard endpoints use"""
+    if not is_host_leader():
+        # Workers starting together would each compute these; followers read the leader's from the shared cache
+        return
+    await asyncio.gather(
+        result_cache.get_or_compute(make_cache_key("github-metrics", approx=False), lambda: load_github_metrics(False)),
+        result_cache.get_or_compute(make_cache_key("github-timeline", approx=False), lambda: load_github_timeline(False)),
+        *(
+            result_cache.get_or_compute(
+                make_cache_key("github-repositories", limit=limit, approx=False),
+                lambda limit=limit: load_github_repositories(limit, False)
+            )
+            for limit in WARMUP_REPOSITORY_LIMITS
+        )
+    )
+
+async def warm_realtime():
+    """Fetch a WebSocket snapshot in the leader (a restored one may be old); followers take the leader's"""
+    if is_host_leader():
+        await github_events_poller.refresh()
+        return
+    latest = await asyncio.to_thread(host_channel.latest, "github-events")
+    if latest is not None:
+        github_events_poller.apply(latest["snapshot"], latest["patch"], latest["version"])
+    else:
+        await github_events_poller.get_snapshot()
+
+# Registered after every other start-up handler, so the pool, executor and poller exist
+@app.on_event("startup")
+async def start_warmup():
+    phases = [
+        ("connections", warm_connections),
+        ("watermark", watermark.get),
+        ("dashboard", warm_dashboard),
+        ("realtime", warm_realtime),
+        ("sqlParser", lambda: asyncio.to_thread(preload_parser)),
+    ] if WARMUP_ENABLED else []
+    readiness.start(phases)
+
+@app.on_event("shutdown")
+async def stop_warmup():
+    await readiness.stop()
+
+readiness.imported()
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # Several workers need the app as an import string, so each process imports it
+    uvicorn.run("main:app", host="0.0.0.0", port=port, workers=WEB_CONCURRENCY)
@@ -0,0 +1,211 @@
+"""Prometheus text-format metrics: latency histograms plus gauges collected from component stats"""
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.routing import Match
+
+# Starlette appends "; charset=utf-8" to text media types
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Seconds; the upper buckets cover warehouse queries that run up to the statement timeout
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Route template of the HTTP request being handled, set by MetricsMiddleware
+_current_route: ContextVar[str] = ContextVar("current_route", default="background")
+
+_CAMEL_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+def current_route() -> str:
+    return _current_route.get()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, one series per label combination; thread-safe"""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, **labels: str) -> "_Timer":
+        """Context manager observing the duration of its block"""
+        return _Timer(self, labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        for key, counts, total, count in sorted(series):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(float(bound))}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """Histograms recorded in-process plus collectors sampled at scrape time.
+
+    A collector returns `(prefix, stats, labels)` triples; every numeric
+    value in the (possibly nested) stats dict becomes a gauge named
+    `<prefix>_<snake_case_path>`, so the existing `stats()` methods are
+    exported without a second set of counters.
+    """
+
+    def __init__(self):
+        self._histograms: List[Histogram] = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, Optional[Dict[str, Any]], Dict[str, str]]]]] = []
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        histogram = Histogram(name, help, labelnames, buckets)
+        self._histograms.append(histogram)
+        return histogram
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, Optional[Dict[str, Any]], Dict[str, str]]]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for histogram in self._histograms:
+            lines.extend(histogram.render())
+
+        # Group samples by metric name so each gets a single TYPE line
+        gauges: Dict[str, List[str]] = {}
+        for collector in self._collectors:
+            for prefix, stats, labels in collector():
+                if stats:
+                    _flatten(prefix, stats, labels, gauges)
+        for name, samples in gauges.items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+def _flatten(prefix: str, stats: Dict[str, Any], labels: Dict[str, str], out: Dict[str, List[str]]) -> None:
+    for key, value in stats.items():
+        name = f"{prefix}_{_CAMEL_BOUNDARY.sub('_', key).lower()}"
+        if isinstance(value, dict):
+            _flatten(name, value, labels, out)
+        elif isinstance(value, bool):
+            out.setdefault(name, []).append(f"{name}{_format_labels(list(labels), list(labels.values()))} {int(value)}")
+        elif isinstance(value, (int, float)):
+            out.setdefault(name, []).append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing each HTTP request by route template, method and status"""
+
+    def __init__(self, app, router, histogram: Histogram):
+        self.app = app
+        self.router = router
+        self.histogram = histogram
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = self._route_template(scope)
+        token = _current_route.set(route)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.histogram.observe(
+                time.perf_counter() - started, route=route, method=scope["method"], status=str(status["code"])
+            )
+            _current_route.reset(token)
+
+    def _route_template(self, scope) -> str:
+        # Label by template, not raw path, to keep the series count bounded
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", "unmatched")
+        return "unmatched"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("route", "method", "status")
+)
+DB_STAGE_SECONDS = REGISTRY.histogram(
+    "snowflake_stage_duration_seconds",
+    "Time per database call stage: queue (executor admission), acquire (pool), execute, fetch",
+    ("endpoint", "stage"),
+)
+SERIALIZE_SECONDS = REGISTRY.histogram(
+    "response_serialize_duration_seconds", "JSON encoding time of response bodies", ("route",)
+)
+WS_SEND_SECONDS = REGISTRY.histogram(
+    "websocket_send_latency_seconds", "Time from enqueueing a WebSocket message to writing it to the socket"
+)
+WS_FANOUT_SECONDS = REGISTRY.histogram(
+    "websocket_broadcast_fanout_seconds", "Time from a broadcast until every connected client has received it"
+)
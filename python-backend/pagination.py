@@ -0,0 +1,70 @@
+"""Keyset pagination over aggregates sorted by (event count descending, group key ascending)"""
+import base64
+import json
+from hashlib import blake2b
+from typing import Any, List, Optional, Sequence, Tuple
+
+
+class InvalidCursorError(ValueError):
+    """Raised for a cursor that is malformed or was issued for a different query"""
+
+
+def query_fingerprint(query_key: str) -> str:
+    """Short digest of a query's parameters, so a cursor only continues the query it came from"""
+    return blake2b(query_key.encode("utf-8"), digest_size=6).hexdigest()
+
+
+def encode_cursor(event_count: int, key: Any, watermark: str, fingerprint: str) -> str:
+    """Opaque cursor pointing just past the row (event_count, key) of the aggregate at `watermark`"""
+    payload = json.dumps([event_count, key, watermark, fingerprint], separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, fingerprint: str) -> Tuple[int, Any, str]:
+    """(event_count, key, watermark) of a cursor issued for the query with `fingerprint`"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        event_count, key, watermark, cursor_fingerprint = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Malformed cursor") from e
+    if cursor_fingerprint != fingerprint:
+        raise InvalidCursorError("Cursor belongs to a different query")
+    if not isinstance(event_count, int):
+        raise InvalidCursorError("Malformed cursor")
+    return event_count, key, watermark
+
+
+def _sort_key(event_count: int, key: Any) -> Tuple[Any, ...]:
+    # Busiest first, then by key with NULL keys last, matching `ORDER BY event_count DESC, key ASC`
+    return (-(event_count or 0), key is None, key if key is not None else 0)
+
+
+def sort_aggregate(rows: Sequence[Sequence[Any]], key_index: int = 0, count_index: int = 1) -> List[Sequence[Any]]:
+    return sorted(rows, key=lambda row: _sort_key(row[count_index], row[key_index]))
+
+
+def page_after(
+    rows: Sequence[Sequence[Any]],
+    after: Tuple[int, Any],
+    size: int,
+    key_index: int = 0,
+    count_index: int = 1,
+) -> Tuple[Sequence[Sequence[Any]], bool]:
+    """(up to `size` rows following `after`, whether more remain) from a `sort_aggregate`-ordered list"""
+    target = _sort_key(*after)
+    low, high = 0, len(rows)
+    while low < high:
+        middle = (low + high) // 2
+        if _sort_key(rows[middle][count_index], rows[middle][key_index]) <= target:
+            low = middle + 1
+        else:
+            high = middle
+    return rows[low:low + size], low + size < len(rows)
+
+
+def next_cursor(page: Sequence[Sequence[Any]], has_more: bool, watermark: str, fingerprint: str,
+                key_index: int = 0, count_index: int = 1) -> Optional[str]:
+    if not has_more or not page:
+        return None
+    last = page[-1]
+    return encode_cursor(last[count_index], last[key_index], watermark, fingerprint)
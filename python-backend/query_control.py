@@ -0,0 +1,239 @@
+"""Statement timeouts and cancellation of Snowflake queries whose callers went away"""
+import asyncio
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Snowflake error code for "Statement reached its statement or warehouse timeout"
+STATEMENT_TIMEOUT_ERRNO = 630
+
+# The ASGI `receive` of the HTTP request being handled and the task handling it,
+# set by DisconnectWatchMiddleware
+_current_request: ContextVar[Optional[Tuple[Callable[[], Awaitable[Dict[str, Any]]], "asyncio.Task"]]] = ContextVar(
+    "current_request", default=None
+)
+
+
+class QueryCancelledError(Exception):
+    """Raised on the worker thread when a query is cancelled because its callers disconnected"""
+
+
+class QueryTimeoutError(Exception):
+    """Raised when a query runs past the statement timeout"""
+
+    def __init__(self, timeout: float):
+        super().__init__(f"Query exceeded the {timeout:g}s statement timeout")
+        self.timeout = timeout
+
+
+class ClientDisconnectedError(Exception):
+    """Raised to a request handler whose client closed the connection while it waited on a query"""
+
+
+class CancelScope:
+    """Cancellation flag shared by every caller waiting on one execution.
+
+    Coalesced callers share a query, so the query is only cancelled once
+    every attached waiter has abandoned it. The flag is a threading.Event so
+    the worker thread polling the query wakes up as soon as it is set.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._waiters = 0
+        self._abandoned = 0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def attach(self) -> None:
+        self._waiters += 1
+
+    def abandon(self) -> None:
+        self._abandoned += 1
+        if self._abandoned >= self._waiters:
+            self._event.set()
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to `timeout` seconds; returns True early if the scope is cancelled"""
+        return self._event.wait(timeout)
+
+
+class DisconnectWatchMiddleware:
+    """Pure ASGI middleware exposing each HTTP request's `receive` to `until_disconnected`"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _current_request.set((receive, asyncio.current_task()))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_request.reset(token)
+
+
+async def _wait_for_disconnect(receive: Callable[[], Awaitable[Dict[str, Any]]]) -> None:
+    # Handlers have already read their body, so only the disconnect message is left to arrive
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def until_disconnected(awaitable: Awaitable[Any], scope: CancelScope) -> Any:
+    """Await `awaitable` unless the current HTTP client disconnects first.
+
+    On disconnect the scope is abandoned (cancelling the query once no other
+    caller is waiting on it) and ClientDisconnectedError is raised. Outside
+    an HTTP request, and in background tasks spawned by one (which inherit its
+    context but must outlive its response), there is no client to watch: the
+    caller still attaches, so the query keeps running for it.
+    """
+    scope.attach()
+    request = _current_request.get()
+    if request is None or request[1] is not asyncio.current_task():
+        try:
+            return await awaitable
+        except asyncio.CancelledError:
+            scope.abandon()
+            raise
+    receive = request[0]
+
+    work = asyncio.ensure_future(awaitable)
+    watcher = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        await asyncio.wait({work, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        scope.abandon()
+        raise
+    finally:
+        watcher.cancel()
+
+    if work.done():
+        return work.result()
+    scope.abandon()
+    # The worker notices the cancellation at its next poll; retrieve its outcome so it is not logged
+    work.add_done_callback(lambda done: done.cancelled() or done.exception())
+    raise ClientDisconnectedError("Client closed the connection before the query finished")
+
+
+class CancellableCursor:
+    """Cursor proxy that runs each statement asynchronously and polls for completion.
+
+    `execute` submits with `execute_async` and polls the query status, so
+    between polls it can cancel the query by ID when the scope is cancelled or
+    the client-side deadline passes. Everything else, including fetching the
+    results, is delegated to the wrapped cursor.
+    """
+
+    def __init__(self, cursor, scope: Optional[CancelScope], controller: "QueryController"):
+        self._cursor = cursor
+        self._scope = scope
+        self._controller = controller
+        # Time spent waiting for statements to finish, for the per-stage latency metrics
+        self.execute_seconds = 0.0
+
+    def execute(self, command: str, params: Any = None):
+        controller = self._controller
+        cursor = self._cursor
+        started = time.perf_counter()
+        cursor.execute_async(command, params)
+        query_id = cursor.sfqid
+        connection = cursor.connection
+        deadline = time.monotonic() + controller.statement_timeout + controller.timeout_grace
+        delay = controller.min_poll_interval
+
+        controller._track(1)
+        try:
+            while True:
+                try:
+                    status = connection.get_query_status_throw_if_error(query_id)
+                except Exception as e:
+                    if getattr(e, "errno", None) == STATEMENT_TIMEOUT_ERRNO:
+                        controller._count("timedOut")
+                        raise QueryTimeoutError(controller.statement_timeout) from e
+                    raise
+                if not connection.is_still_running(status):
+                    break
+                if self._scope is not None and self._scope.cancelled:
+                    controller._cancel(connection, query_id)
+                    controller._count("cancelled")
+                    raise QueryCancelledError(f"Query {query_id} cancelled: every caller disconnected")
+                if time.monotonic() > deadline:
+                    # The server-side timeout should have fired already; don't leave the query running
+                    controller._cancel(connection, query_id)
+                    controller._count("timedOut")
+                    raise QueryTimeoutError(controller.statement_timeout)
+                if self._scope is not None:
+                    self._scope.wait(delay)
+                else:
+                    time.sleep(delay)
+                delay = min(delay * 2, controller.max_poll_interval)
+        finally:
+            controller._track(-1)
+            self.execute_seconds += time.perf_counter() - started
+
+        cursor.get_results_from_sfqid(query_id)
+        return self
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+
+class QueryController:
+    """Statement-timeout settings and counters for cancellable cursors.
+
+    `statement_timeout` is also set as STATEMENT_TIMEOUT_IN_SECONDS on every
+    session, so Snowflake aborts runaway statements on its own; the
+    client-side deadline (`statement_timeout + timeout_grace`) only catches
+    queries the server failed to stop.
+    """
+
+    def __init__(self, statement_timeout: float, min_poll_interval: float = 0.05,
+                 max_poll_interval: float = 1.0, timeout_grace: float = 5.0):
+        self.statement_timeout = statement_timeout
+        self.min_poll_interval = min_poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.timeout_grace = timeout_grace
+        self._lock = threading.Lock()
+        self._counters = {"running": 0, "executed": 0, "cancelled": 0, "timedOut": 0, "cancelFailures": 0}
+
+    def cursor(self, cursor, scope: Optional[CancelScope] = None) -> CancellableCursor:
+        return CancellableCursor(cursor, scope, self)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"statementTimeoutSeconds": self.statement_timeout, **self._counters}
+
+    def _track(self, delta: int) -> None:
+        with self._lock:
+            self._counters["running"] += delta
+            if delta > 0:
+                self._counters["executed"] += 1
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _cancel(self, connection, query_id: str) -> None:
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT SYSTEM$CANCEL_QUERY(%s)", (query_id,))
+            logger.info(f"Cancelled Snowflake query {query_id}")
+        except Exception as e:
+            logger.warning(f"Failed to cancel Snowflake query {query_id}: {e}")
+            self._count("cancelFailures")
+        finally:
+            cursor.close()
@@ -0,0 +1,112 @@
+"""Start-up timing and the warm-up behind the /ready probe"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+WarmupPhase = Tuple[str, Callable[[], Awaitable[Any]]]
+
+
+class Readiness:
+    """Runs warm-up phases once the server is up and reports when it is warm.
+
+    `/health` only says the process is alive. A machine started from zero
+    still has to log in to Snowflake, read the watermark and compute the
+    dashboard aggregates before its responses are fast, so `/ready` answers
+    503 until the warm-up phases have run. Phases run in order in the
+    background and are timed; a failed phase is logged and recorded but does
+    not hold readiness back, and after `timeout` seconds the instance is
+    ready whatever is left, so a slow warehouse cannot keep it out of
+    rotation. Times are measured from `started_at`, the perf_counter()
+    reading taken when the application module began importing.
+    """
+
+    def __init__(self, started_at: float, timeout: float = 30.0):
+        self.started_at = started_at
+        self.timeout = timeout
+        self._imported_at: Optional[float] = None
+        self._serving_at: Optional[float] = None
+        self._ready_at: Optional[float] = None
+        self._current: Optional[str] = None
+        self._phases: Dict[str, Dict[str, Any]] = {}
+        self._timed_out = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready_at is not None
+
+    def imported(self) -> None:
+        """Mark the end of the application's module imports"""
+        self._imported_at = time.perf_counter()
+
+    def start(self, phases: Sequence[WarmupPhase]) -> None:
+        """Begin the warm-up; called from the last start-up handler, once everything it uses exists"""
+        self._serving_at = time.perf_counter()
+        if not phases:
+            self._mark_ready()
+        elif self._task is None:
+            self._task = asyncio.create_task(self._run(phases))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "importSeconds": self._since_start(self._imported_at),
+            "startupSeconds": self._since_start(self._serving_at),
+            "readySeconds": self._since_start(self._ready_at),
+            "warmingPhase": self._current,
+            "timedOut": self._timed_out,
+            "phases": dict(self._phases),
+        }
+
+    async def _run(self, phases: Sequence[WarmupPhase]) -> None:
+        warmup = asyncio.ensure_future(self._run_phases(phases))
+        try:
+            done, _ = await asyncio.wait({warmup}, timeout=self.timeout)
+            if not done:
+                # Serve anyway; the phase keeps going and its result still lands in the caches
+                self._timed_out = True
+                logger.warning(f"Warm-up still in phase '{self._current}' after {self.timeout}s; reporting ready")
+                self._mark_ready()
+            await warmup
+        finally:
+            warmup.cancel()
+        self._current = None
+        if not self._timed_out:
+            self._mark_ready()
+
+    async def _run_phases(self, phases: Sequence[WarmupPhase]) -> None:
+        for name, warm in phases:
+            self._current = name
+            started = time.perf_counter()
+            try:
+                await warm()
+            except Exception as e:
+                logger.error(f"Warm-up phase '{name}' failed: {e}")
+                self._phases[name] = {"seconds": round(time.perf_counter() - started, 3), "error": str(e)}
+            else:
+                self._phases[name] = {"seconds": round(time.perf_counter() - started, 3)}
+
+    def _mark_ready(self) -> None:
+        self._ready_at = time.perf_counter()
+        timings = ", ".join(f"{name} {phase['seconds']}s" for name, phase in self._phases.items())
+        logger.info(
+            f"Ready {self._since_start(self._ready_at)}s after start "
+            f"(imports {self._since_start(self._imported_at)}s, "
+            f"start-up handlers done at {self._since_start(self._serving_at)}s"
+            + (f"; warm-up: {timings})" if timings else ")")
+        )
+
+    def _since_start(self, at: Optional[float]) -> Optional[float]:
+        return round(at - self.started_at, 3) if at is not None else None
@@ -0,0 +1,319 @@
+"""Real-time GitHub events feed: shared snapshot poller and WebSocket fan-out"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from fastapi import WebSocket
+
+from metrics import WS_FANOUT_SECONDS, WS_SEND_SECONDS
+from serialization import dumps_text
+
+logger = logging.getLogger(__name__)
+
+
+def timeline_row_key(row: Dict[str, Any]) -> str:
+    """Identity of a real-time timeline row: date|repository|eventType|hour"""
+    return f"{row.get('date')}|{row.get('repository')}|{row.get('eventType')}|{row.get('hour')}"
+
+
+def diff_timeline(previous: Optional[Dict[str, Any]], current: Dict[str, Any]) -> Optional[Dict[str, List[Any]]]:
+    """Rows added, changed and removed between two snapshots, or None if the timeline is identical"""
+    old_rows = {timeline_row_key(row): row for row in (previous or {}).get("timeline", [])}
+    new_rows = {timeline_row_key(row): row for row in current.get("timeline", [])}
+
+    added = [row for key, row in new_rows.items() if key not in old_rows]
+    changed = [row for key, row in new_rows.items() if key in old_rows and old_rows[key] != row]
+    removed = [key for key in old_rows if key not in new_rows]
+
+    if not (added or changed or removed):
+        return None
+    return {"added": added, "changed": changed, "removed": removed}
+
+
+class SnapshotPoller:
+    """Fetches one snapshot per interval and hands it to `publish` for fan-out.
+
+    A single poller serves every connected client, so the warehouse sees one
+    query per interval regardless of how many sockets are open. Ticks are
+    skipped while `has_subscribers()` is false so an idle server lets the
+    warehouse suspend.
+
+    Snapshots are versioned: the version only advances when `diff` reports a
+    change, and `publish(snapshot, patch, version)` receives the patch from the
+    previous version, or None when nothing changed.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[Dict[str, Any]]],
+        publish: Callable[[Dict[str, Any], Optional[Dict[str, Any]], int], Awaitable[None]],
+        has_subscribers: Callable[[], bool],
+        interval: float = 30.0,
+        diff: Callable[[Optional[Dict[str, Any]], Dict[str, Any]], Optional[Dict[str, Any]]] = diff_timeline,
+    ):
+        self._fetch = fetch
+        self._publish = publish
+        self._has_subscribers = has_subscribers
+        self._diff = diff
+        self.interval = interval
+        self.version = 0
+        self._patch: Optional[Dict[str, Any]] = None
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._snapshot_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._polls = 0
+        self._failures = 0
+
+    @property
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        return self._snapshot
+
+    def start(self) -> None:
+        if self._task is None:
+            self._refresh_lock = asyncio.Lock()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def restore(self, snapshot: Dict[str, Any]) -> None:
+        """Serve `snapshot`, e.g. persisted by a previous process, until a fetch replaces it"""
+        if self._snapshot is None:
+            self._snapshot = snapshot
+            self.version += 1
+
+    def apply(self, snapshot: Dict[str, Any], patch: Optional[Dict[str, Any]], version: int) -> None:
+        """Adopt a snapshot fetched by another process, with its patch and version"""
+        self._snapshot = snapshot
+        self._patch = patch
+        self.version = version
+        self._snapshot_at = time.monotonic()
+
+    async def refresh(self) -> None:
+        """Fetch a snapshot now and publish it, outside the interval"""
+        async with self._refresh_lock:
+            snapshot = await self._refresh()
+            # Taken with the snapshot: another refresh or apply() may replace them before publishing
+            patch, version = self._patch, self.version
+        if not snapshot.get("error"):
+            await self._publish(snapshot, patch, version)
+
+    async def get_snapshot(self) -> Dict[str, Any]:
+        """Latest good snapshot, fetching one only if nothing has been fetched yet"""
+        if self._snapshot is None:
+            async with self._refresh_lock:
+                if self._snapshot is None:
+                    return await self._refresh()
+        return self._snapshot
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "intervalSeconds": self.interval,
+            "version": self.version,
+            "running": self._task is not None and not self._task.done(),
+            "polls": self._polls,
+            "failures": self._failures,
+            "snapshotAgeSeconds": round(time.monotonic() - self._snapshot_at, 1) if self._snapshot_at else None,
+        }
+
+    async def _refresh(self) -> Dict[str, Any]:
+        snapshot = await self._fetch()
+        self._polls += 1
+        if snapshot.get("error"):
+            # Keep serving the last good snapshot; failed fetches are not stored
+            self._failures += 1
+            return snapshot
+        self._patch = self._diff(self._snapshot, snapshot)
+        if self._patch is not None or self._snapshot is None:
+            self.version += 1
+        self._snapshot = snapshot
+        self._snapshot_at = time.monotonic()
+        return snapshot
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            if not self._has_subscribers():
+                continue
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failures += 1
+                logger.error(f"Real-time poller tick failed: {e}")
+
+
+class ClientConnection:
+    """One WebSocket client with its own bounded send queue and writer task"""
+
+    __slots__ = ("websocket", "delta", "queue", "writer", "missed", "dropped", "sent")
+
+    def __init__(self, websocket: WebSocket, delta: bool, queue_size: int):
+        self.websocket = websocket
+        self.delta = delta
+        self.queue: "asyncio.Queue[Tuple[str, float, Optional[int]]]" = asyncio.Queue(maxsize=queue_size)
+        self.writer: Optional[asyncio.Task] = None
+        self.missed = 0
+        self.dropped = 0
+        self.sent = 0
+
+
+class ConnectionManager:
+    """Fans messages out to WebSocket clients without letting one slow socket stall the rest.
+
+    `broadcast` serializes each message once and only enqueues it; every
+    connection has a writer task draining its own bounded queue. When a queue
+    is full the oldest pending update is dropped (delta clients will see the
+    version gap and resync), and a client that falls `max_missed_updates`
+    updates behind without catching up is disconnected.
+    """
+
+    def __init__(self, queue_size: int = 4, max_missed_updates: int = 3, latency_window: int = 4096):
+        self.queue_size = queue_size
+        self.max_missed_updates = max_missed_updates
+        self.active_connections: Dict[WebSocket, ClientConnection] = {}
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+        self._fanout_latencies: Deque[float] = deque(maxlen=256)
+        self._pending_fanouts: Dict[int, List[Any]] = {}
+        self._broadcast_seq = 0
+        self._broadcasts = 0
+        self._dropped = 0
+        self._slow_disconnects = 0
+
+    async def connect(self, websocket: WebSocket, delta: bool = False):
+        await websocket.accept()
+        client = ClientConnection(websocket, delta, self.queue_size)
+        client.writer = asyncio.create_task(self._writer(client))
+        self.active_connections[websocket] = client
+        logger.info(f"WebSocket connected. Total connections: {len(self.active_connections)}")
+
+    def disconnect(self, websocket: WebSocket):
+        client = self.active_connections.pop(websocket, None)
+        if client is None:
+            return
+        # Account for undelivered messages so fan-out tracking does not leak
+        while not client.queue.empty():
+            _, _, seq = client.queue.get_nowait()
+            self._delivered(seq, None)
+        if client.writer is not None and client.writer is not asyncio.current_task():
+            client.writer.cancel()
+        logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
+
+    async def send_personal_message(self, message: str, websocket: WebSocket):
+        """Queue a message for one client, in order with its broadcasts"""
+        client = self.active_connections.get(websocket)
+        if client is not None:
+            self._enqueue(client, message, time.monotonic(), None)
+
+    async def broadcast(self, message: dict, delta_message: Optional[dict] = None):
+        """Queue `message` for every client, or `delta_message` for delta clients when given"""
+        if not self.active_connections:
+            return
+
+        message_str = dumps_text(message)
+        delta_message_str = dumps_text(delta_message) if delta_message is not None else message_str
+        enqueued_at = time.monotonic()
+
+        self._broadcasts += 1
+        self._broadcast_seq += 1
+        # [remaining deliveries, enqueue time] for the fan-out latency of this broadcast
+        self._pending_fanouts[self._broadcast_seq] = [len(self.active_connections), enqueued_at]
+
+        for client in list(self.active_connections.values()):
+            payload = delta_message_str if client.delta else message_str
+            self._enqueue(client, payload, enqueued_at, self._broadcast_seq)
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+        fanouts = sorted(self._fanout_latencies)
+        return {
+            "connections": len(self.active_connections),
+            "deltaConnections": sum(1 for client in self.active_connections.values() if client.delta),
+            "queued": sum(client.queue.qsize() for client in self.active_connections.values()),
+            "broadcasts": self._broadcasts,
+            "droppedUpdates": self._dropped,
+            "slowConsumerDisconnects": self._slow_disconnects,
+            "sendLatencyMs": _percentiles_ms(latencies),
+            "fanoutLatencyMs": _percentiles_ms(fanouts),
+        }
+
+    def _enqueue(self, client: ClientConnection, payload: str, enqueued_at: float, seq: Optional[int]) -> None:
+        if client.queue.full():
+            # Drop the oldest intermediate update rather than block the broadcaster
+            _, _, dropped_seq = client.queue.get_nowait()
+            self._delivered(dropped_seq, None)
+            client.missed += 1
+            client.dropped += 1
+            self._dropped += 1
+            if client.missed >= self.max_missed_updates:
+                self._disconnect_slow(client)
+                self._delivered(seq, None)
+                return
+        client.queue.put_nowait((payload, enqueued_at, seq))
+
+    def _delivered(self, seq: Optional[int], sent_at: Optional[float]) -> None:
+        pending = self._pending_fanouts.get(seq) if seq is not None else None
+        if pending is None:
+            return
+        pending[0] -= 1
+        if pending[0] <= 0:
+            del self._pending_fanouts[seq]
+            if sent_at is not None:
+                self._fanout_latencies.append(sent_at - pending[1])
+                WS_FANOUT_SECONDS.observe(sent_at - pending[1])
+
+    def _disconnect_slow(self, client: ClientConnection) -> None:
+        logger.warning(f"Disconnecting slow WebSocket consumer after {client.missed} missed updates")
+        self._slow_disconnects += 1
+        self.disconnect(client.websocket)
+        asyncio.create_task(self._close_quietly(client.websocket, 1013))
+
+    async def _writer(self, client: ClientConnection) -> None:
+        try:
+            while True:
+                payload, enqueued_at, seq = await client.queue.get()
+                try:
+                    await client.websocket.send_text(payload)
+                except BaseException:
+                    self._delivered(seq, None)
+                    raise
+                sent_at = time.monotonic()
+                client.sent += 1
+                self._latencies.append(sent_at - enqueued_at)
+                WS_SEND_SECONDS.observe(sent_at - enqueued_at)
+                self._delivered(seq, sent_at)
+                if client.queue.empty():
+                    # Caught up with the feed again
+                    client.missed = 0
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error sending to WebSocket client: {e}")
+            self.disconnect(client.websocket)
+
+    @staticmethod
+    async def _close_quietly(websocket: WebSocket, code: int) -> None:
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass
+
+
+def _percentiles_ms(sorted_values: List[float]) -> Dict[str, float]:
+    def pick(fraction: float) -> float:
+        if not sorted_values:
+            return 0.0
+        index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+        return round(sorted_values[index] * 1000, 3)
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "samples": len(sorted_values)}
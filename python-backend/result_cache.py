@@ -0,0 +1,280 @@
+"""In-process TTL result cache with a byte-bounded LRU and stale-while-revalidate"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from serialization import dumps
+from shared_cache import SharedCache
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(endpoint: str, **params: Any) -> str:
+    """Stable cache key for an endpoint and its query parameters"""
+    if not params:
+        return endpoint
+    return f"{endpoint}?{json.dumps(params, sort_keys=True, default=str, separators=(',', ':'))}"
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory cost of a cached value as its serialized JSON length"""
+    return len(dumps(value))
+
+
+class _CacheEntry:
+    __slots__ = ("value", "size", "fresh_until", "stale_until", "version")
+
+    def __init__(self, value: Any, size: int, fresh_until: float, stale_until: float, version: Optional[str]):
+        self.value = value
+        self.size = size
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+        self.version = version
+
+
+class ResultCache:
+    """Caches computed results per key for `ttl` seconds.
+
+    After the TTL an entry is still served for `stale_ttl` more seconds while a
+    background task recomputes it, so readers never wait on a refresh. Entries
+    are evicted least-recently-used first once their total size exceeds
+    `max_bytes`. Only successful computations are stored.
+
+    With a `version` callable (the data watermark's version), each value is
+    tagged with the version current when its computation started; a value
+    whose version moved on while it was computed is stored already stale,
+    and `is_current` tells callers whether a value matches the data now.
+
+    With a `shared` cache, misses and background refreshes first look for
+    a value another worker process computed, and computed values are
+    written through to it. Its calls block on SQLite, so they all run on a
+    thread; `invalidate` and `expire` apply to memory at once and to the
+    shared cache in the background, and lookups wait for those writes.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 32 * 1024 * 1024,
+        ttl: float = 60.0,
+        stale_ttl: float = 600.0,
+        shared: Optional[SharedCache] = None,
+        version: Optional[Callable[[], str]] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.shared = shared
+        self._version = version
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._shared_writes: Set[asyncio.Task] = set()
+
+        self._hits = 0
+        self._shared_hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._refreshes = 0
+        self._refresh_failures = 0
+        self._evictions = 0
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+    ) -> Any:
+        """Return the cached value for `key`, computing (or revalidating) it as needed"""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if now < entry.fresh_until:
+                self._hits += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            if now < entry.stale_until:
+                self._stale_hits += 1
+                self._entries.move_to_end(key)
+                self._schedule_refresh(key, compute, ttl)
+                return entry.value
+
+        if self.shared is not None:
+            found = await self._shared_get(key)
+            if found is not None:
+                value, fresh_for, stale_for, version = found
+                if version != self._current_version():
+                    fresh_for = 0.0
+                self._insert(key, value, len(dumps(value)), fresh_for, stale_for, version)
+                self._shared_hits += 1
+                if fresh_for <= 0:
+                    self._schedule_refresh(key, compute, ttl)
+                return value
+
+        self._misses += 1
+        version = self._current_version()
+        value = await compute()
+        await self._store(key, value, ttl, version)
+        return value
+
+    def get(self, key: str) -> Any:
+        """Return a fresh or stale cached value without computing, or None"""
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() >= entry.stale_until:
+            return None
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        self._insert(key, value, estimate_size(value), ttl, ttl + self.stale_ttl, None)
+
+    def _insert(
+        self, key: str, value: Any, size: int, fresh_for: float, stale_for: float, version: Optional[str]
+    ) -> None:
+        self._remove(key)
+        if size > self.max_bytes:
+            logger.debug(f"Not caching {key}: {size} bytes exceeds cache budget")
+            return
+        now = time.monotonic()
+        self._entries[key] = _CacheEntry(value, size, now + fresh_for, now + stale_for, version)
+        self._bytes += size
+        while self._bytes > self.max_bytes and self._entries:
+            evicted_key, _ = next(iter(self._entries.items()))
+            self._remove(evicted_key)
+            self._evictions += 1
+
+    def invalidate(self, prefix: Optional[str] = None) -> int:
+        """Drop every entry, or only those whose key starts with `prefix`"""
+        keys = [key for key in self._entries if prefix is None or key.startswith(prefix)]
+        for key in keys:
+            self._remove(key)
+        if self.shared is not None:
+            self._update_shared(self.shared.invalidate, prefix)
+        return len(keys)
+
+    def is_current(self, key: str) -> bool:
+        """True when `key` is cached within its TTL and was computed at the current data version"""
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() >= entry.fresh_until:
+            return False
+        return self._version is None or (entry.version is not None and entry.version == self._version())
+
+    def fresh_items(self, prefixes: Tuple[str, ...]) -> Dict[str, Any]:
+        """Values of the fresh entries whose keys start with any of `prefixes`, e.g. to persist them"""
+        now = time.monotonic()
+        return {
+            key: entry.value for key, entry in self._entries.items()
+            if key.startswith(prefixes) and now < entry.fresh_until
+        }
+
+    def restore(self, key: str, value: Any) -> None:
+        """Add `value` as already stale: served while the first lookup recomputes it in the background"""
+        if key not in self._entries:
+            self.set(key, value, ttl=0)
+
+    def expire(self, prefix: Optional[str] = None, local_only: bool = False) -> int:
+        """Mark entries stale so they are served once more while a background refresh runs.
+
+        `local_only` leaves the shared cache alone, for an expiry another
+        worker has already applied to it.
+        """
+        now = time.monotonic()
+        expired = 0
+        for key, entry in self._entries.items():
+            if (prefix is None or key.startswith(prefix)) and entry.fresh_until > now:
+                entry.fresh_until = now
+                expired += 1
+        if self.shared is not None and not local_only:
+            self._update_shared(self.shared.expire, prefix)
+        return expired
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._shared_hits + self._stale_hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "maxBytes": self.max_bytes,
+            "ttlSeconds": self.ttl,
+            "staleTtlSeconds": self.stale_ttl,
+            "hits": self._hits,
+            "sharedHits": self._shared_hits,
+            "staleHits": self._stale_hits,
+            "misses": self._misses,
+            "hitRate": round((self._hits + self._shared_hits + self._stale_hits) / lookups, 4) if lookups else 0.0,
+            "refreshes": self._refreshes,
+            "refreshFailures": self._refresh_failures,
+            "evictions": self._evictions,
+            "shared": self.shared.stats() if self.shared is not None else None,
+        }
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _schedule_refresh(self, key: str, compute: Callable[[], Awaitable[Any]], ttl: Optional[float]) -> None:
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        task = asyncio.create_task(self._refresh(key, compute, ttl))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _update_shared(self, update: Callable[[Optional[str]], int], prefix: Optional[str]) -> None:
+        """Run a shared-cache invalidation or expiry on a thread, tracked until it lands"""
+        task = asyncio.create_task(self._run_shared_update(update, prefix))
+        self._shared_writes.add(task)
+        task.add_done_callback(self._shared_writes.discard)
+
+    async def _run_shared_update(self, update: Callable[[Optional[str]], int], prefix: Optional[str]) -> None:
+        try:
+            await asyncio.to_thread(update, prefix)
+        except Exception as e:
+            logger.warning(f"Could not {update.__name__} shared entries under {prefix!r}: {e}")
+
+    async def _shared_get(self, key: str) -> Optional[Tuple[Any, float, float, Optional[str]]]:
+        if self._shared_writes:
+            # A value read before a pending expiry lands would look fresh
+            await asyncio.wait(set(self._shared_writes))
+        return await asyncio.to_thread(self.shared.get, key)
+
+    def _current_version(self) -> Optional[str]:
+        return self._version() if self._version is not None else None
+
+    async def _store(self, key: str, value: Any, ttl: Optional[float], version: Optional[str]) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        stale_for = ttl + self.stale_ttl
+        if version != self._current_version():
+            # The data moved on while this was computed: serve it stale and recompute
+            ttl = 0
+        payload = dumps(value)
+        self._insert(key, value, len(payload), ttl, stale_for, version)
+        if self.shared is not None:
+            try:
+                await asyncio.to_thread(self.shared.put, key, payload, ttl, stale_for, version)
+            except Exception as e:
+                logger.warning(f"Could not share {key}: {e}")
+
+    async def _refresh(self, key: str, compute: Callable[[], Awaitable[Any]], ttl: Optional[float]) -> None:
+        try:
+            if self.shared is not None:
+                found = await self._shared_get(key)
+                if found is not None and found[1] > 0 and found[3] == self._current_version():
+                    # Another worker already recomputed it
+                    value, fresh_for, stale_for, version = found
+                    self._insert(key, value, len(dumps(value)), fresh_for, stale_for, version)
+                    return
+            version = self._current_version()
+            value = await compute()
+            await self._store(key, value, ttl, version)
+            self._refreshes += 1
+        except Exception as e:
+            # Keep serving the stale value until it ages out
+            self._refresh_failures += 1
+            logger.warning(f"Background refresh of {key} failed: {e}")
+        finally:
+            self._refreshing.discard(key)
@@ -0,0 +1,89 @@
+"""Column-oriented JSON and Arrow IPC encodings of user query results"""
+import io
+from importlib.util import find_spec
+from typing import Any, List, Optional, Sequence, Tuple
+
+# The connector's constants and pyarrow are imported when first needed: both
+# load pyarrow, a sizeable share of process start-up that few requests use.
+# Arrow output is optional.
+_ARROW_INSTALLED = find_spec("pyarrow") is not None
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+class ArrowUnavailableError(Exception):
+    """Raised when Arrow output is requested but pyarrow is not installed"""
+
+
+def arrow_available() -> bool:
+    return _ARROW_INSTALLED
+
+
+def column_types(description: Optional[Sequence[Sequence[Any]]]) -> List[Optional[str]]:
+    """Snowflake type names (FIXED, TEXT, TIMESTAMP_NTZ, ...) for a cursor description"""
+    from snowflake.connector.constants import FIELD_ID_TO_NAME
+
+    return [FIELD_ID_TO_NAME.get(desc[1]) for desc in description or []]
+
+
+def transpose_rows(rows: Sequence[Sequence[Any]], width: int) -> List[list]:
+    """Per-column value lists for result rows.
+
+    Rows are transposed with zip(), so there is no per-cell Python work and
+    each column name appears once in a columnar response instead of once per row.
+    """
+    return [list(column) for column in zip(*rows)] if rows else [[] for _ in range(width)]
+
+
+def fetch_arrow_ipc(cursor, query: str, max_rows: int) -> Tuple[bytes, int, bool]:
+    """Run a query and return (Arrow IPC stream bytes, row count, truncated).
+
+    Uses the connector's native Arrow batches when the result is in Arrow
+    format, and builds the table from fetched rows otherwise.
+    """
+    if not _ARROW_INSTALLED:
+        raise ArrowUnavailableError("Arrow output requires the pyarrow package")
+    import pyarrow as pa
+    from snowflake.connector.errors import NotSupportedError
+
+    cursor.execute(query)
+    try:
+        tables = cursor.fetch_arrow_batches()
+    except NotSupportedError:
+        tables = None
+
+    sink = io.BytesIO()
+    writer = None
+    row_count = 0
+    truncated = False
+    for table in tables or ():
+        if row_count + table.num_rows > max_rows:
+            table = table.slice(0, max_rows - row_count)
+            truncated = True
+        if writer is None:
+            writer = pa.ipc.new_stream(sink, table.schema)
+        writer.write_table(table)
+        row_count += table.num_rows
+        if truncated:
+            break
+
+    if writer is None:
+        # JSON-format result set, or no rows at all: build the table from Python rows
+        if tables is None:
+            columns, _, values, row_count, truncated = _read_columnar(cursor, max_rows)
+        else:
+            columns = [desc[0] for desc in cursor.description] if cursor.description else []
+            values = [[] for _ in columns]
+        table = pa.table({name: pa.array(column) for name, column in zip(columns, values)})
+        writer = pa.ipc.new_stream(sink, table.schema)
+        writer.write_table(table)
+    writer.close()
+    return sink.getvalue(), row_count, truncated
+
+
+def _read_columnar(cursor, max_rows: int) -> Tuple[List[str], List[Optional[str]], List[list], int, bool]:
+    rows = cursor.fetchmany(max_rows + 1)
+    truncated = len(rows) > max_rows
+    rows = rows[:max_rows]
+    columns = [desc[0] for desc in cursor.description] if cursor.description else []
+    return columns, column_types(cursor.description), transpose_rows(rows, len(columns)), len(rows), truncated
@@ -0,0 +1,120 @@
+"""Incremental NDJSON streaming of user query results"""
+import logging
+import threading
+import time
+from contextlib import ExitStack
+from typing import Any, AsyncIterator, Awaitable, Callable, ContextManager, Dict, List, Optional, Sequence
+
+from serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def ndjson_line(message: Dict[str, Any]) -> bytes:
+    return dumps(message) + b"\n"
+
+
+class QueryStream:
+    """A query whose rows are read in `fetchmany` batches and written out as they arrive.
+
+    The body is one JSON object per line: a `meta` line with the columns, one
+    `row` line per result row and a closing `end` line (or `error` if the
+    warehouse fails mid-stream). Output stops after `max_rows` rows or
+    `max_bytes` bytes of row lines, and the `end` line says which limit was
+    hit. Only one batch is held in memory at a time.
+
+    `open`, `fetch` and `close` block and belong on a worker thread; the
+    connection from `connect()` is held from `open` until `close`. A
+    `wrap_cursor` callable, if given, wraps the cursor before it executes.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], ContextManager[Any]],
+        query: str,
+        batch_size: int = 1000,
+        max_rows: int = 1_000_000,
+        max_bytes: int = 100 * 1024 * 1024,
+        wrap_cursor: Optional[Callable[[Any], Any]] = None,
+    ):
+        self.query = query
+        self.batch_size = batch_size
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.columns: List[str] = []
+        self._connect = connect
+        self._wrap_cursor = wrap_cursor
+        self._stack = ExitStack()
+        self._cursor = None
+        # Serializes fetches with a close scheduled after the client went away
+        self._lock = threading.Lock()
+
+    def open(self) -> None:
+        with self._lock:
+            conn = self._stack.enter_context(self._connect())
+            cursor = conn.cursor()
+            self._stack.callback(cursor.close)
+            if self._wrap_cursor is not None:
+                cursor = self._wrap_cursor(cursor)
+            cursor.execute(self.query)
+            self.columns = [desc[0] for desc in cursor.description] if cursor.description else []
+            self._cursor = cursor
+
+    def fetch(self) -> Sequence[Sequence[Any]]:
+        with self._lock:
+            if self._cursor is None:
+                return []
+            return self._cursor.fetchmany(self.batch_size)
+
+    def close(self) -> None:
+        with self._lock:
+            self._cursor = None
+            self._stack.close()
+
+    async def ndjson(
+        self,
+        run: Callable[[Callable[[], Any]], Awaitable[Any]],
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[bytes]:
+        """Yield the NDJSON body, calling `run(self.fetch)` to read each batch off the event loop"""
+        started = time.monotonic()
+        yield ndjson_line({"type": "meta", "columns": self.columns, **(metadata or {})})
+
+        row_count = 0
+        byte_count = 0
+        truncated_by = None
+        try:
+            while truncated_by is None:
+                batch = await run(self.fetch)
+                if not batch:
+                    break
+                chunk = []
+                for row in batch:
+                    if row_count >= self.max_rows:
+                        truncated_by = "maxRows"
+                        break
+                    line = ndjson_line({"type": "row", "data": dict(zip(self.columns, row))})
+                    if byte_count + len(line) > self.max_bytes:
+                        truncated_by = "maxBytes"
+                        break
+                    chunk.append(line)
+                    row_count += 1
+                    byte_count += len(line)
+                if chunk:
+                    yield b"".join(chunk)
+        except Exception as e:
+            logger.error(f"Streaming query failed after {row_count} rows: {e}")
+            yield ndjson_line({"type": "error", "message": "Query failed while streaming", "error": str(e),
+                               "rowCount": row_count})
+            return
+
+        yield ndjson_line({
+            "type": "end",
+            "rowCount": row_count,
+            "bytes": byte_count,
+            "truncated": truncated_by is not None,
+            "truncatedBy": truncated_by,
+            "executionTime": f"{time.monotonic() - started:.3f}s",
+        })
@@ -0,0 +1,366 @@
+"""Local SQLite store of hourly RAW_EVENTS aggregates for the analytical endpoints"""
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from hll import HyperLogLog
+
+logger = logging.getLogger(__name__)
+
+# NULL dimension values are stored as '' so they can take part in the primary key
+_NULL = ''
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS hourly_events (
+        hour TEXT NOT NULL,
+        event_type TEXT NOT NULL,
+        repo_name TEXT NOT NULL,
+        event_count INTEGER NOT NULL,
+        last_event_at TEXT NOT NULL,
+        PRIMARY KEY (hour, event_type, repo_name)
+    );
+    CREATE INDEX IF NOT EXISTS idx_hourly_events_repo ON hourly_events (repo_name);
+    CREATE TABLE IF NOT EXISTS daily_actors (
+        day TEXT PRIMARY KEY,
+        actor_count INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS daily_sketches (
+        day TEXT NOT NULL,
+        dimension TEXT NOT NULL,
+        registers BLOB NOT NULL,
+        PRIMARY KEY (day, dimension)
+    );
+    CREATE TABLE IF NOT EXISTS rollup_state (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+"""
+
+# Query-executor groupings the rollup can answer, as SQLite expressions
+ROLLUP_GROUPINGS = {
+    'repository': "NULLIF(repo_name, '')",
+    'event_type': "NULLIF(event_type, '')",
+    'hour': "CAST(substr(hour, 12, 2) AS INTEGER)",
+    'day': "CAST(strftime('%w', hour) AS INTEGER)",
+}
+
+_HOUR_FORMAT = "%Y-%m-%d %H:00:00"
+_DAY_FORMAT = "%Y-%m-%d"
+
+# Distinct-count sketch dimensions, kept per day
+SKETCH_DIMENSIONS = ('repo', 'actor')
+
+
+class RollupStore:
+    """Hourly (event type, repository) counts mirrored from Snowflake.
+
+    Refreshes are incremental: only events at or after the hour containing
+    `high-water mark - lookback` are re-aggregated, and those hour buckets are
+    replaced wholesale, so late-arriving events inside the lookback window are
+    picked up without double counting. Time windows answered from the rollup
+    are resolved at hour granularity.
+
+    Actors are not part of the hourly key: with them it is nearly as fine
+    as the raw events. Each refresh instead streams the distinct (day,
+    actor) pairs of the days it touched into an exact per-day actor count
+    and a per-day HyperLogLog sketch, and rebuilds the repository sketches
+    of those days from the hourly rows, so approximate distinct counts over
+    any span of days are a merge of small sketches. Per-actor groupings and
+    per-repository user counts are left to the warehouse.
+    """
+
+    def __init__(self, path: str, lookback_hours: float = 2.0, batch_size: int = 10000):
+        self.path = path
+        self.lookback = timedelta(hours=lookback_hours)
+        self.batch_size = batch_size
+        self._refreshes = 0
+        self._rows_loaded = 0
+        self._last_refresh_seconds: Optional[float] = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            columns = [row[1] for row in db.execute("PRAGMA table_info(hourly_events)")]
+            if "actor_login" in columns:
+                # Stores keyed by actor are reloaded from scratch in the smaller shape
+                logger.info("Dropping the per-actor rollup; the next refresh reloads it")
+                with db:
+                    db.execute("DROP TABLE IF EXISTS hourly_events")
+                    db.execute("DROP TABLE IF EXISTS daily_sketches")
+                    db.execute("DELETE FROM rollup_state WHERE key = 'high_water_mark'")
+            db.executescript(_SCHEMA)
+        self.high_water_mark = self._read_state("high_water_mark")
+        self._hourly_rows = self._count_rows()
+
+    def reload_state(self) -> None:
+        """Pick up a refresh made by another process sharing the file"""
+        self.high_water_mark = self._read_state("high_water_mark")
+        self._hourly_rows = self._count_rows()
+
+    @property
+    def ready(self) -> bool:
+        """True once at least one refresh has loaded data"""
+        return self.high_water_mark is not None
+
+    # ------------------------------------------------------------------
+    # Incremental refresh (runs on a database executor thread)
+    # ------------------------------------------------------------------
+    def refresh_from_snowflake(self, cursor) -> int:
+        """Re-aggregate events since the high-water mark minus lookback and replace those hours"""
+        started = time.monotonic()
+        since = None
+        if self.high_water_mark is not None:
+            since = _parse_timestamp(self.high_water_mark) - self.lookback
+            since = since.replace(minute=0, second=0, microsecond=0)
+
+        query = """
+            SELECT
+                DATE_TRUNC('HOUR', V:created_at::TIMESTAMP) as hour,
+                V:type::STRING as event_type,
+                V:repo.name::STRING as repo_name,
+                COUNT(*) as event_count,
+                MAX(V:created_at::TIMESTAMP) as last_event_at
+            FROM RAW_EVENTS
+            {where}
+            GROUP BY 1, 2, 3
+        """.format(where="WHERE V:created_at::TIMESTAMP >= %s" if since else "WHERE V:created_at::TIMESTAMP IS NOT NULL")
+        cursor.execute(query, (since,) if since else None)
+
+        loaded = 0
+        high_water_mark = self.high_water_mark
+        with closing(self._connect()) as db:
+            with db:
+                if since is not None:
+                    db.execute("DELETE FROM hourly_events WHERE hour >= ?", (since.strftime(_HOUR_FORMAT),))
+                else:
+                    db.execute("DELETE FROM hourly_events")
+                while True:
+                    rows = cursor.fetchmany(self.batch_size)
+                    if not rows:
+                        break
+                    batch = []
+                    for hour, event_type, repo_name, event_count, last_event_at in rows:
+                        last_event_at = str(last_event_at)
+                        batch.append((
+                            _format_hour(hour),
+                            event_type or _NULL,
+                            repo_name or _NULL,
+                            event_count,
+                            last_event_at,
+                        ))
+                        if high_water_mark is None or last_event_at > high_water_mark:
+                            high_water_mark = last_event_at
+                    db.executemany(
+                        "INSERT OR REPLACE INTO hourly_events VALUES (?, ?, ?, ?, ?)",
+                        batch
+                    )
+                    loaded += len(batch)
+                since_day = since.replace(hour=0) if since is not None else None
+                self._load_actor_days(db, cursor, since_day)
+                self._rebuild_repo_sketches(db, since_day.strftime(_DAY_FORMAT) if since_day is not None else None)
+                if high_water_mark is not None:
+                    db.execute(
+                        "INSERT OR REPLACE INTO rollup_state VALUES ('high_water_mark', ?)",
+                        (high_water_mark,)
+                    )
+
+        self.high_water_mark = high_water_mark
+        self._hourly_rows = self._count_rows()
+        self._refreshes += 1
+        self._rows_loaded += loaded
+        self._last_refresh_seconds = time.monotonic() - started
+        logger.info(f"Rollup refresh loaded {loaded} hourly rows in {self._last_refresh_seconds:.2f}s "
+                    f"(high-water mark {high_water_mark})")
+        return loaded
+
+    # ------------------------------------------------------------------
+    # Reads (blocking; call from a worker thread)
+    # ------------------------------------------------------------------
+    def timeline(self, approx: bool = False) -> List[Tuple[Any, ...]]:
+        """(date, event_count, repo_count, user_count) per day, newest first"""
+        if approx:
+            days = self._query("""
+                SELECT substr(hour, 1, 10) as date, SUM(event_count) as event_count
+                FROM hourly_events
+                GROUP BY substr(hour, 1, 10)
+                ORDER BY date DESC
+            """)
+            sketches = self._daily_sketches()
+            return [
+                (date, event_count, _estimate(sketches, date, 'repo'), _estimate(sketches, date, 'actor'))
+                for date, event_count in days
+            ]
+        return self._query("""
+            SELECT
+                substr(hourly.hour, 1, 10) as date,
+                SUM(hourly.event_count) as event_count,
+                COUNT(DISTINCT NULLIF(hourly.repo_name, '')) as repo_count,
+                COALESCE(MAX(actors.actor_count), 0) as user_count
+            FROM hourly_events hourly
+            LEFT JOIN daily_actors actors ON actors.day = substr(hourly.hour, 1, 10)
+            GROUP BY substr(hourly.hour, 1, 10)
+            ORDER BY date DESC
+        """)
+
+    def approximate_metrics(self, since_24h: datetime) -> Dict[str, Any]:
+        """Dashboard KPIs with distinct repositories and users merged from the daily sketches"""
+        total_events, events_24h, days_operational = self._query("""
+            SELECT
+                COALESCE(SUM(event_count), 0),
+                COALESCE(SUM(CASE WHEN hour >= ? THEN event_count ELSE 0 END), 0),
+                COUNT(DISTINCT substr(hour, 1, 10))
+            FROM hourly_events
+        """, (since_24h.replace(minute=0, second=0, microsecond=0).strftime(_HOUR_FORMAT),))[0]
+        peak_daily_events = self._query("""
+            SELECT COALESCE(MAX(daily_events), 0) FROM (
+                SELECT SUM(event_count) as daily_events FROM hourly_events GROUP BY substr(hour, 1, 10)
+            )
+        """)[0][0]
+        merged = {dimension: HyperLogLog() for dimension in SKETCH_DIMENSIONS}
+        for (_, dimension), sketch in self._daily_sketches().items():
+            merged[dimension].merge(sketch)
+        return {
+            "totalEvents": total_events,
+            "uniqueRepos": merged['repo'].estimate(),
+            "uniqueUsers": merged['actor'].estimate(),
+            "events24h": events_24h,
+            "peakDailyEvents": peak_daily_events,
+            "daysOperational": days_operational,
+        }
+
+    def latest_event_at(self) -> Optional[datetime]:
+        return _parse_timestamp(self.high_water_mark) if self.high_water_mark else None
+
+    def grouped_counts(
+        self,
+        group_by: str,
+        since: datetime,
+        event_types: Optional[Sequence[str]],
+        limit: int,
+    ) -> List[Tuple[Any, ...]]:
+        """(group, event_count, unique_count) for the query executor, busiest groups first"""
+        expression = ROLLUP_GROUPINGS[group_by]
+        params: List[Any] = [since.replace(minute=0, second=0, microsecond=0).strftime(_HOUR_FORMAT)]
+        event_type_filter = ""
+        if event_types:
+            event_type_filter = f"AND event_type IN ({','.join('?' for _ in event_types)})"
+            params.extend(event_types)
+        params.append(limit)
+        return self._query(f"""
+            SELECT
+                {expression} as group_key,
+                SUM(event_count) as event_count,
+                COUNT(DISTINCT {expression}) as unique_count
+            FROM hourly_events
+            WHERE hour >= ?
+            {event_type_filter}
+            GROUP BY {expression}
+            ORDER BY event_count DESC, group_key IS NULL, group_key
+            LIMIT ?
+        """, params)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "ready": self.ready,
+            "highWaterMark": self.high_water_mark,
+            "hourlyRows": self._hourly_rows,
+            "sketchDays": self._query("SELECT COUNT(DISTINCT day) FROM daily_sketches")[0][0],
+            "refreshes": self._refreshes,
+            "rowsLoaded": self._rows_loaded,
+            "lastRefreshSeconds": round(self._last_refresh_seconds, 3) if self._last_refresh_seconds else None,
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _query(self, sql: str, params: Sequence[Any] = ()) -> List[Tuple[Any, ...]]:
+        with closing(self._connect()) as db:
+            return db.execute(sql, params).fetchall()
+
+    def _load_actor_days(self, db: sqlite3.Connection, cursor, since_day: Optional[datetime]) -> None:
+        """Replace the actor counts and sketches of every day from `since_day` (all days when None)"""
+        query = """
+            SELECT DATE(V:created_at::TIMESTAMP) as day, V:actor.login::STRING as actor_login
+            FROM RAW_EVENTS
+            {where}
+            GROUP BY 1, 2
+        """.format(where="WHERE V:created_at::TIMESTAMP >= %s" if since_day else "WHERE V:created_at::TIMESTAMP IS NOT NULL")
+        cursor.execute(query, (since_day,) if since_day else None)
+
+        # Each row is a distinct (day, actor) pair, so counting rows counts actors exactly
+        counts: Dict[str, int] = {}
+        sketches: Dict[str, HyperLogLog] = {}
+        while True:
+            rows = cursor.fetchmany(self.batch_size)
+            if not rows:
+                break
+            for day, actor_login in rows:
+                if not actor_login:
+                    continue
+                day = str(day)[:10]
+                counts[day] = counts.get(day, 0) + 1
+                sketches.setdefault(day, HyperLogLog()).add(actor_login)
+
+        day_filter, params = ("WHERE day >= ?", (since_day.strftime(_DAY_FORMAT),)) if since_day else ("", ())
+        db.execute(f"DELETE FROM daily_actors {day_filter}", params)
+        db.execute(f"DELETE FROM daily_sketches {day_filter + ' AND' if day_filter else 'WHERE'} dimension = 'actor'", params)
+        db.executemany("INSERT INTO daily_actors VALUES (?, ?)", counts.items())
+        db.executemany(
+            "INSERT INTO daily_sketches VALUES (?, 'actor', ?)",
+            [(day, sketch.to_bytes()) for day, sketch in sketches.items()]
+        )
+
+    def _rebuild_repo_sketches(self, db: sqlite3.Connection, since_day: Optional[str]) -> None:
+        """Recompute the repository sketches of every day from `since_day` (all days when None)"""
+        hour_filter, params = ("WHERE hour >= ?", (since_day,)) if since_day else ("", ())
+        db.execute(f"DELETE FROM daily_sketches WHERE dimension = 'repo' {'AND day >= ?' if since_day else ''}", params)
+        sketches: Dict[str, HyperLogLog] = {}
+        rows = db.execute(f"""
+            SELECT DISTINCT substr(hour, 1, 10), repo_name
+            FROM hourly_events
+            {hour_filter}
+        """, params)
+        for day, value in rows:
+            if value != _NULL:
+                sketches.setdefault(day, HyperLogLog()).add(value)
+        db.executemany(
+            "INSERT INTO daily_sketches VALUES (?, 'repo', ?)",
+            [(day, sketch.to_bytes()) for day, sketch in sketches.items()]
+        )
+
+    def _daily_sketches(self) -> Dict[Tuple[str, str], HyperLogLog]:
+        rows = self._query("SELECT day, dimension, registers FROM daily_sketches")
+        return {(day, dimension): HyperLogLog.from_bytes(registers) for day, dimension, registers in rows}
+
+    def _count_rows(self) -> int:
+        return self._query("SELECT COUNT(*) FROM hourly_events")[0][0]
+
+    def _read_state(self, key: str) -> Optional[str]:
+        with closing(self._connect()) as db:
+            row = db.execute("SELECT value FROM rollup_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+
+def _estimate(sketches: Dict[Tuple[str, str], HyperLogLog], day: str, dimension: str) -> int:
+    sketch = sketches.get((day, dimension))
+    return sketch.estimate() if sketch is not None else 0
+
+
+def _format_hour(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.strftime(_HOUR_FORMAT)
+    return _parse_timestamp(str(value)).strftime(_HOUR_FORMAT)
+
+
+def _parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value)
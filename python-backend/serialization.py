@@ -0,0 +1,121 @@
+"""Shared row mapping and JSON encoding for HTTP responses and WebSocket messages"""
+import json
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi.responses import JSONResponse
+
+from metrics import SERIALIZE_SECONDS, current_route
+
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib encoder
+    orjson = None
+
+
+def json_default(value: Any) -> Any:
+    """JSON fallback for connector types: ISO-8601 dates, floats for decimals"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+if orjson is not None:
+    def dumps(value: Any) -> bytes:
+        """Encode to compact JSON bytes; datetimes and dates become ISO-8601 strings"""
+        return orjson.dumps(value, default=json_default)
+else:
+    def dumps(value: Any) -> bytes:
+        """Encode to compact JSON bytes; datetimes and dates become ISO-8601 strings"""
+        return json.dumps(value, default=json_default, separators=(',', ':')).encode()
+
+
+def dumps_text(value: Any) -> str:
+    """`dumps` as a str, for WebSocket text frames"""
+    return dumps(value).decode()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with `dumps`.
+
+    Handlers that return an instance directly also skip FastAPI's
+    jsonable_encoder pass, which walks every value of the payload in Python.
+    """
+
+    def render(self, content: Any) -> bytes:
+        started = time.perf_counter()
+        body = dumps(content)
+        SERIALIZE_SECONDS.observe(time.perf_counter() - started, route=current_route())
+        return body
+
+
+def json_response(content: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> FastJSONResponse:
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
+
+
+# ----------------------------------------------------------------------
+# Row mappers
+# ----------------------------------------------------------------------
+# A field spec says where an output value comes from: ("column", index, convert),
+# ("constant", value, None) or ("computed", fn, None) where fn receives the whole row.
+FieldSpec = Tuple[str, Any, Optional[Callable[[Any], Any]]]
+
+
+def column(index: int, convert: Optional[Callable[[Any], Any]] = None) -> FieldSpec:
+    return ("column", index, convert)
+
+
+def constant(value: Any) -> FieldSpec:
+    return ("constant", value, None)
+
+
+def computed(fn: Callable[[Sequence[Any]], Any]) -> FieldSpec:
+    return ("computed", fn, None)
+
+
+class RowMapper:
+    """Turns result tuples into dicts with a function generated once per output layout.
+
+    The generated function is a single dict display such as
+    `{'date': row[0], 'totalEvents': row[1]}`, so mapping a row costs one
+    call with no per-field loop or type checks.
+    """
+
+    def __init__(self, fields: Dict[str, FieldSpec]):
+        self.keys = list(fields)
+        namespace: Dict[str, Any] = {}
+        items = []
+        for position, (key, (kind, source, convert)) in enumerate(fields.items()):
+            if kind == "column":
+                expression = f"row[{int(source)}]"
+                if convert is not None:
+                    namespace[f"_f{position}"] = convert
+                    expression = f"_f{position}({expression})"
+            elif kind == "constant":
+                namespace[f"_c{position}"] = source
+                expression = f"_c{position}"
+            elif kind == "computed":
+                namespace[f"_f{position}"] = source
+                expression = f"_f{position}(row)"
+            else:
+                raise ValueError(f"Unknown field kind: {kind}")
+            items.append(f"{key!r}: {expression}")
+        exec(f"def _map(row):\n    return {{{', '.join(items)}}}\n", namespace)
+        self._map: Callable[[Sequence[Any]], Dict[str, Any]] = namespace["_map"]
+
+    def __call__(self, row: Sequence[Any]) -> Dict[str, Any]:
+        return self._map(row)
+
+    def map(self, rows: Iterable[Sequence[Any]]) -> List[Dict[str, Any]]:
+        return list(map(self._map, rows))
+
+
+@lru_cache(maxsize=256)
+def mapper_for_columns(columns: Tuple[str, ...]) -> RowMapper:
+    """Positional mapper keyed by column name, cached per result layout"""
+    return RowMapper({name: column(index) for index, name in enumerate(columns)})
@@ -0,0 +1,107 @@
+"""Result cache entries shared by the worker processes of one host, in SQLite"""
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import Any, Dict, Optional, Tuple
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS entries (
+        key TEXT PRIMARY KEY,
+        payload BLOB NOT NULL,
+        fresh_until REAL NOT NULL,
+        stale_until REAL NOT NULL,
+        version TEXT
+    );
+"""
+
+
+class SharedCache:
+    """Second tier behind each worker's in-memory `ResultCache`.
+
+    A worker that misses in memory looks here before computing, and every
+    value it computes is written here, so several workers compute each
+    dashboard result about once instead of once each. Expiry times are
+    wall-clock so they mean the same in every process. Values are stored as
+    JSON: dates come back as the ISO strings the endpoints render them as,
+    and tuples as lists. Calls block; run them off the event loop.
+    """
+
+    def __init__(self, path: str, prune_interval: float = 60.0):
+        self.path = path
+        self.prune_interval = prune_interval
+        self._pruned_at = 0.0
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+            columns = [row[1] for row in db.execute("PRAGMA table_info(entries)")]
+            if "version" not in columns:
+                try:
+                    db.execute("ALTER TABLE entries ADD COLUMN version TEXT")
+                except sqlite3.OperationalError:
+                    pass  # another worker added it first
+
+    def get(self, key: str) -> Optional[Tuple[Any, float, float, Optional[str]]]:
+        """(value, seconds it stays fresh, seconds it stays servable, data version) for `key`, or None"""
+        now = time.time()
+        with closing(self._connect()) as db:
+            row = db.execute(
+                "SELECT payload, fresh_until, stale_until, version FROM entries WHERE key = ? AND stale_until > ?",
+                (key, now)
+            ).fetchone()
+        if row is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        payload, fresh_until, stale_until, version = row
+        return json.loads(payload), max(fresh_until - now, 0.0), stale_until - now, version
+
+    def put(self, key: str, payload: bytes, fresh_for: float, stale_for: float, version: Optional[str] = None) -> None:
+        """Store serialized `payload` computed at data `version`, fresh for `fresh_for` seconds and servable for `stale_for`"""
+        now = time.time()
+        with closing(self._connect()) as db:
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO entries (key, payload, fresh_until, stale_until, version) VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, now + fresh_for, now + stale_for, version)
+                )
+                if now - self._pruned_at >= self.prune_interval:
+                    db.execute("DELETE FROM entries WHERE stale_until <= ?", (now,))
+                    self._pruned_at = now
+        self._writes += 1
+
+    def expire(self, prefix: Optional[str] = None) -> int:
+        """Mark entries stale, like `ResultCache.expire`"""
+        now = time.time()
+        with closing(self._connect()) as db:
+            with db:
+                return db.execute(
+                    "UPDATE entries SET fresh_until = ? WHERE fresh_until > ? AND substr(key, 1, ?) = ?",
+                    (now, now, len(prefix or ""), prefix or "")
+                ).rowcount
+
+    def invalidate(self, prefix: Optional[str] = None) -> int:
+        with closing(self._connect()) as db:
+            with db:
+                return db.execute(
+                    "DELETE FROM entries WHERE substr(key, 1, ?) = ?", (len(prefix or ""), prefix or "")
+                ).rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "hits": self._hits,
+            "misses": self._misses,
+            "writes": self._writes,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
@@ -0,0 +1,58 @@
+"""Single-flight coalescing of identical concurrent query executions"""
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict
+
+from sql_cache import canonicalize_sql
+
+
+def normalize_query(query: str) -> str:
+    """Canonical SQL text, so formatting differences share a flight but string literals stay distinct"""
+    canonical, limit = canonicalize_sql(query)
+    return canonical if limit is None else f"{canonical} LIMIT {limit}"
+
+
+def make_flight_key(name: str, *args: Any) -> str:
+    """Key for a unit of work: its name plus normalized SQL text and bound parameters"""
+    parts = [normalize_query(arg) if isinstance(arg, str) else arg for arg in args]
+    return f"{name}:{json.dumps(parts, default=str, separators=(',', ':'))}"
+
+
+class SingleFlight:
+    """Runs at most one execution per key; concurrent callers await and share its result.
+
+    The shared work runs in its own task, so a caller that goes away (e.g. a
+    cancelled request) does not cancel the execution other callers are waiting on.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._executions = 0
+        self._coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            self._executions += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self._coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every waiter went away
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self._executions + self._coalesced
+        return {
+            "inFlight": len(self._inflight),
+            "executions": self._executions,
+            "coalesced": self._coalesced,
+            "savedRatio": round(self._coalesced / requests, 4) if requests else 0.0,
+        }
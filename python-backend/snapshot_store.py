@@ -0,0 +1,108 @@
+"""Last computed dashboard results persisted to SQLite, so a restarted instance can serve them at once"""
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+from datetime import datetime
+from hashlib import blake2b
+from typing import Any, Dict, Optional, Tuple
+
+from serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS snapshots (
+        key TEXT PRIMARY KEY,
+        watermark TEXT,
+        payload BLOB NOT NULL,
+        saved_at REAL NOT NULL
+    );
+"""
+
+
+class SnapshotStore:
+    """Named results, each tagged with the data watermark it was computed at.
+
+    `save` upserts only entries whose serialized form or watermark changed
+    since the last save, so a periodic save of unchanged aggregates is a
+    no-op.
+    Values are stored as JSON: dates and timestamps come back as the ISO
+    strings the endpoints render them as, and tuples as lists.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._digests: Dict[str, bytes] = {}
+        self._saves = 0
+        self._entries_written = 0
+        self._entries_loaded = 0
+        self._last_saved_at: Optional[float] = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+
+    def load(self) -> Dict[str, Tuple[Any, Optional[datetime]]]:
+        """Every stored entry as key -> (value, watermark it was computed at)"""
+        with closing(self._connect()) as db:
+            rows = db.execute("SELECT key, watermark, payload FROM snapshots").fetchall()
+        entries = {}
+        for key, watermark, payload in rows:
+            try:
+                value = json.loads(payload)
+            except ValueError as e:
+                logger.warning(f"Skipping unreadable snapshot entry {key}: {e}")
+                continue
+            entries[key] = (value, datetime.fromisoformat(watermark) if watermark else None)
+            self._digests[key] = _digest(payload, watermark)
+        self._entries_loaded = len(entries)
+        return entries
+
+    def save(self, entries: Dict[str, Any], watermark: Optional[datetime]) -> int:
+        """Store `entries` computed at `watermark`; returns how many changed"""
+        tag = watermark.isoformat() if watermark else None
+        changed = []
+        for key, value in entries.items():
+            payload = dumps(value)
+            digest = _digest(payload, tag)
+            if self._digests.get(key) != digest:
+                changed.append((key, payload, digest))
+        if not changed:
+            return 0
+
+        saved_at = time.time()
+        with closing(self._connect()) as db:
+            with db:
+                db.executemany(
+                    "INSERT OR REPLACE INTO snapshots (key, watermark, payload, saved_at) VALUES (?, ?, ?, ?)",
+                    [(key, tag, payload, saved_at) for key, payload, _ in changed]
+                )
+        for key, _, digest in changed:
+            self._digests[key] = digest
+        self._saves += 1
+        self._entries_written += len(changed)
+        self._last_saved_at = saved_at
+        return len(changed)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "entries": len(self._digests),
+            "entriesLoaded": self._entries_loaded,
+            "saves": self._saves,
+            "entriesWritten": self._entries_written,
+            "lastSavedAt": datetime.fromtimestamp(self._last_saved_at).isoformat() if self._last_saved_at else None,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+
+def _digest(payload: bytes, watermark: Optional[str]) -> bytes:
+    return blake2b(payload + (watermark or "").encode("utf-8"), digest_size=16).digest()
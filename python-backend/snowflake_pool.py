@@ -0,0 +1,299 @@
+"""Bounded, thread-safe pool of reusable Snowflake connections"""
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PoolError(Exception):
+    """Base class for connection pool errors"""
+
+
+class PoolTimeoutError(PoolError):
+    """Raised when no connection becomes available within the acquire timeout"""
+
+
+class PoolClosedError(PoolError):
+    """Raised when acquiring from a pool that has been shut down"""
+
+
+class _PooledConnection:
+    """Bookkeeping wrapper around a raw connector connection"""
+
+    __slots__ = ("conn", "created_at", "last_used_at", "last_checked_at")
+
+    def __init__(self, conn: Any):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used_at = now
+        self.last_checked_at = now
+
+
+class SnowflakePool:
+    """Keeps up to `max_size` logged-in sessions and hands them out one borrower at a time.
+
+    Idle connections are recycled once they exceed `max_idle_seconds` or
+    `max_lifetime_seconds`, and are pinged with `SELECT 1` before reuse when
+    they have not been checked for `health_check_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        max_size: int = 4,
+        min_size: int = 0,
+        acquire_timeout: float = 10.0,
+        max_idle_seconds: float = 600.0,
+        max_lifetime_seconds: float = 3600.0,
+        health_check_interval: float = 60.0,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._connect = connect
+        self.max_size = max_size
+        self.min_size = min(min_size, max_size)
+        self.acquire_timeout = acquire_timeout
+        self.max_idle_seconds = max_idle_seconds
+        self.max_lifetime_seconds = max_lifetime_seconds
+        self.health_check_interval = health_check_interval
+
+        self._lock = threading.Condition()
+        self._idle: Deque[_PooledConnection] = deque()
+        self._in_use: Dict[int, _PooledConnection] = {}
+        self._opening = 0
+        # Connections between idle and in use (health check, release), still counted against max_size
+        self._checking = 0
+        self._waiting = 0
+        self._closed = False
+
+        # Counters for sizing the pool
+        self._acquires = 0
+        self._created = 0
+        self._recycled = 0
+        self._failed_health_checks = 0
+        self._timeouts = 0
+        self._wait_times: Deque[float] = deque(maxlen=1000)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def open(self, count: Optional[int] = None) -> None:
+        """Pre-open `count` connections (default `min_size`) so the first requests skip the login"""
+        target = min(self.min_size if count is None else count, self.max_size)
+        for _ in range(target):
+            with self._lock:
+                if self._closed or self._total() >= target:
+                    return
+                self._opening += 1
+            try:
+                entry = self._create()
+            finally:
+                with self._lock:
+                    self._opening -= 1
+            with self._lock:
+                self._idle.append(entry)
+                self._lock.notify()
+
+    def acquire(self, timeout: Optional[float] = None) -> Any:
+        """Borrow a healthy connection, opening a new one if the pool has room"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        while True:
+            entry = None
+            should_open = False
+            with self._lock:
+                while True:
+                    if self._closed:
+                        raise PoolClosedError("Connection pool is closed")
+                    if self._idle:
+                        entry = self._idle.pop()
+                        self._checking += 1
+                        break
+                    if self._total() < self.max_size:
+                        self._opening += 1
+                        should_open = True
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f"No Snowflake connection available after {timeout:.1f}s "
+                            f"(max_size={self.max_size})"
+                        )
+                    self._waiting += 1
+                    try:
+                        self._lock.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+            if should_open:
+                try:
+                    entry = self._create()
+                except BaseException:
+                    with self._lock:
+                        self._opening -= 1
+                        # Let another waiter try if the login failed
+                        self._lock.notify()
+                    raise
+            elif not self._is_usable(entry):
+                with self._lock:
+                    self._checking -= 1
+                self._discard(entry)
+                continue
+
+            with self._lock:
+                # Hand over from opening/checking to in use in one step so _total() never dips
+                if should_open:
+                    self._opening -= 1
+                else:
+                    self._checking -= 1
+                entry.last_used_at = time.monotonic()
+                self._in_use[id(entry.conn)] = entry
+                self._acquires += 1
+                self._wait_times.append(entry.last_used_at - started)
+            return entry.conn
+
+    def release(self, conn: Any, discard: bool = False) -> None:
+        """Return a borrowed connection; broken or expired sessions are closed instead"""
+        with self._lock:
+            entry = self._in_use.pop(id(conn), None)
+            if entry is not None:
+                self._checking += 1
+        if entry is None:
+            logger.warning("Released a connection that does not belong to the pool")
+            return
+
+        expired = time.monotonic() - entry.created_at > self.max_lifetime_seconds
+        if discard or expired or self._closed or self._is_closed(conn):
+            with self._lock:
+                self._checking -= 1
+            self._discard(entry)
+            return
+
+        with self._lock:
+            self._checking -= 1
+            entry.last_used_at = time.monotonic()
+            self._idle.append(entry)
+            self._lock.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """Context manager that borrows a connection and always hands it back"""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            # A failed query leaves a usable session unless the connector dropped it
+            self.release(conn)
+
+    def close(self) -> None:
+        """Close idle connections and refuse new borrowers; in-use ones close on release"""
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._lock.notify_all()
+        for entry in idle:
+            self._close_quietly(entry.conn)
+
+    def stats(self) -> Dict[str, Any]:
+        """Occupancy and wait-time statistics for sizing the pool"""
+        with self._lock:
+            waits: List[float] = sorted(self._wait_times)
+            in_use = len(self._in_use)
+            idle = len(self._idle)
+            return {
+                "maxSize": self.max_size,
+                "minSize": self.min_size,
+                "open": in_use + idle,
+                "inUse": in_use,
+                "idle": idle,
+                "opening": self._opening,
+                "checking": self._checking,
+                "waiting": self._waiting,
+                "totalAcquires": self._acquires,
+                "totalCreated": self._created,
+                "totalRecycled": self._recycled,
+                "failedHealthChecks": self._failed_health_checks,
+                "acquireTimeouts": self._timeouts,
+                "waitTimeMs": {
+                    "avg": round(sum(waits) / len(waits) * 1000, 3) if waits else 0.0,
+                    "p95": round(_percentile(waits, 0.95) * 1000, 3),
+                    "max": round(waits[-1] * 1000, 3) if waits else 0.0,
+                },
+            }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _total(self) -> int:
+        return len(self._idle) + len(self._in_use) + self._opening + self._checking
+
+    def _create(self) -> _PooledConnection:
+        started = time.monotonic()
+        conn = self._connect()
+        with self._lock:
+            self._created += 1
+        logger.info(f"Opened Snowflake connection in {time.monotonic() - started:.2f}s")
+        return _PooledConnection(conn)
+
+    def _is_expired(self, entry: _PooledConnection, now: float) -> bool:
+        return (
+            now - entry.created_at > self.max_lifetime_seconds
+            or now - entry.last_used_at > self.max_idle_seconds
+        )
+
+    def _is_usable(self, entry: _PooledConnection) -> bool:
+        now = time.monotonic()
+        if self._is_closed(entry.conn) or self._is_expired(entry, now):
+            return False
+        if now - entry.last_checked_at < self.health_check_interval:
+            return True
+        try:
+            cursor = entry.conn.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            finally:
+                cursor.close()
+        except Exception as e:
+            logger.warning(f"Snowflake connection failed health check: {e}")
+            with self._lock:
+                self._failed_health_checks += 1
+            return False
+        entry.last_checked_at = now
+        return True
+
+    def _discard(self, entry: _PooledConnection) -> None:
+        with self._lock:
+            self._recycled += 1
+            self._lock.notify()
+        self._close_quietly(entry.conn)
+
+    @staticmethod
+    def _is_closed(conn: Any) -> bool:
+        try:
+            return bool(conn.is_closed())
+        except Exception:
+            return True
+
+    @staticmethod
+    def _close_quietly(conn: Any) -> None:
+        try:
+            conn.close()
+        except Exception as e:
+            logger.debug(f"Error closing Snowflake connection: {e}")
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
@@ -0,0 +1,145 @@
+"""Result cache for ad-hoc SQL keyed on a canonical form of the query text"""
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from result_cache import ResultCache
+
+_TOKEN = re.compile(r"""
+      (?P<space>\s+)
+    | (?P<comment>--[^\n]*|//[^\n]*|/\*.*?(?:\*/|$))
+    | (?P<string>'(?:[^'\\]|\\.|'')*'?|\$\$.*?(?:\$\$|$))
+    | (?P<quoted>"(?:[^"]|"")*"?)
+    | (?P<cast>::)
+    | (?P<number>\d+(?:\.\d*)?)
+    | (?P<word>[A-Za-z_$][A-Za-z0-9_$]*)
+    | (?P<symbol>.)
+""", re.VERBOSE | re.DOTALL)
+
+
+def canonicalize_sql(query: str) -> Tuple[str, Optional[int]]:
+    """Canonical text of a query plus its folded trailing LIMIT.
+
+    Comments are dropped, tokens are re-joined with single spaces and unquoted
+    words are upper-cased, as Snowflake resolves them. String literals
+    (`'...'` and `$$...$$`), quoted identifiers and VARIANT path segments
+    (`V:repo.name`) are case-sensitive and kept verbatim. A trailing `LIMIT n` is removed and returned separately
+    so the same query with different limits shares one entry.
+    """
+    tokens: List[str] = []
+    in_path = False
+    for match in _TOKEN.finditer(query):
+        kind = match.lastgroup
+        text = match.group()
+        if kind in ("space", "comment"):
+            in_path = False
+            continue
+        if kind == "word":
+            if not in_path:
+                text = text.upper()
+        elif kind == "symbol":
+            if text == ":":
+                in_path = True
+            elif text not in ".[]":
+                in_path = False
+        elif kind not in ("number", "string", "quoted"):
+            in_path = False
+        tokens.append(text)
+
+    while tokens and tokens[-1] == ";":
+        tokens.pop()
+
+    limit = None
+    if len(tokens) >= 2 and tokens[-2] == "LIMIT" and tokens[-1].isdigit():
+        limit = int(tokens[-1])
+        tokens = tokens[:-2]
+    return " ".join(tokens), limit
+
+
+class CachedRows:
+    __slots__ = ("columns", "types", "rows", "truncated", "limit")
+
+    def __init__(self, columns: List[str], types: List[Optional[str]], rows: Sequence[Sequence[Any]],
+                 truncated: bool, limit: Optional[int]):
+        self.columns = columns
+        self.types = types
+        self.rows = rows
+        self.truncated = truncated
+        self.limit = limit
+
+
+class SQLResultCache:
+    """Byte-budgeted LRU of fetched rows for ad-hoc queries.
+
+    Entries are keyed on `canonicalize_sql`, so whitespace, comment and
+    keyword-case variants of a query share one entry. A cached result also
+    answers the same query with a smaller LIMIT, or any LIMIT when the cached
+    result was already complete. `invalidate()` is called when the source
+    data's load watermark advances.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, ttl: float = 300.0):
+        self._cache = ResultCache(max_bytes=max_bytes, ttl=ttl, stale_ttl=0)
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def lookup(self, query: str) -> Optional[CachedRows]:
+        """Cached rows answering `query`, already cut to its LIMIT, or None"""
+        canonical, limit = canonicalize_sql(query)
+        entry = self._get(canonical)
+        if entry is None or not _covers(entry, limit):
+            self._misses += 1
+            return None
+
+        self._hits += 1
+        if limit is not None and limit <= len(entry.rows):
+            # The result is cut by this query's LIMIT, not by the row cap
+            rows = entry.rows if limit == len(entry.rows) else entry.rows[:limit]
+            return CachedRows(entry.columns, entry.types, rows, False, limit)
+        return entry
+
+    def store(self, query: str, columns: List[str], types: List[Optional[str]],
+              rows: Sequence[Sequence[Any]], truncated: bool) -> None:
+        canonical, limit = canonicalize_sql(query)
+        existing = self._get(canonical)
+        if existing is not None and _covers(existing, limit):
+            return
+        # Stored as a plain dict so the cache can size it by its JSON encoding
+        self._cache.set(canonical, {
+            "columns": columns,
+            "types": types,
+            "rows": rows,
+            "truncated": truncated,
+            "limit": limit,
+        })
+
+    def invalidate(self) -> int:
+        self._invalidations += 1
+        return self._cache.invalidate()
+
+    def _get(self, canonical: str) -> Optional[CachedRows]:
+        value = self._cache.get(canonical)
+        if value is None:
+            return None
+        return CachedRows(value["columns"], value["types"], value["rows"], value["truncated"], value["limit"])
+
+    def stats(self) -> Dict[str, Any]:
+        cache_stats = self._cache.stats()
+        lookups = self._hits + self._misses
+        return {
+            "entries": cache_stats["entries"],
+            "bytes": cache_stats["bytes"],
+            "maxBytes": cache_stats["maxBytes"],
+            "ttlSeconds": cache_stats["ttlSeconds"],
+            "hits": self._hits,
+            "misses": self._misses,
+            "hitRate": round(self._hits / lookups, 4) if lookups else 0.0,
+            "evictions": cache_stats["evictions"],
+            "invalidations": self._invalidations,
+        }
+
+
+def _covers(entry: CachedRows, limit: Optional[int]) -> bool:
+    """Whether a cached result holds every row a query with `limit` would return"""
+    complete = not entry.truncated and (entry.limit is None or len(entry.rows) < entry.limit)
+    return complete or (limit is not None and limit <= len(entry.rows))
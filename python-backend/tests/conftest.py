@@ -0,0 +1,38 @@
+"""Shared fixtures: the API served in-process against the fake warehouse (fake_snowflake.py)"""
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# main reads its configuration at import time; nothing here needs credentials, files or background warm-up
+os.environ.update(
+    SNOWFLAKE_FAKE="true",
+    FAKE_SNOWFLAKE_ROWS="5000",
+    FAKE_SNOWFLAKE_QUERY_LATENCY_MS="0",
+    FAKE_SNOWFLAKE_CONNECT_LATENCY_MS="0",
+    ROLLUP_ENABLED="false",
+    SNAPSHOT_ENABLED="false",
+    WARMUP_ENABLED="false",
+    MULTI_WORKER_ENABLED="false",
+    ADMIN_TOKEN="test-token",
+    BATCH_MAX_RESPONSE_BYTES="20000",
+)
+
+ADMIN_HEADERS = {"X-Admin-Token": "test-token"}
+
+
+@pytest.fixture(scope="session")
+def main_module():
+    import main
+    return main
+
+
+@pytest.fixture(scope="session")
+def client(main_module):
+    from fastapi.testclient import TestClient
+
+    with TestClient(main_module.app) as test_client:
+        yield test_client
@@ -0,0 +1,55 @@
+import pytest
+
+SQL = "SELECT V:type::STRING AS type FROM RAW_EVENTS"
+
+
+def run_batch(client, *requests):
+    response = client.post("/api/batch", json={"requests": list(requests)})
+    assert response.status_code == 200
+    return response.json()["data"]
+
+
+def test_calls_run_together(client):
+    data = run_batch(
+        client,
+        {"id": "metrics", "path": "/api/github-metrics"},
+        {"id": "sql", "method": "POST", "path": "/api/execute-sql", "body": {"query": SQL, "limit": 5}},
+    )
+    assert data["metrics"]["status"] == 200
+    assert data["metrics"]["body"]["success"]
+    assert len(data["sql"]["body"]["data"]) == 5
+
+
+@pytest.mark.parametrize("request_item", [
+    {"path": "/api/execute-sql", "method": "POST", "body": {"query": SQL, "format": "ndjson"}},
+    {"path": "/api/execute-sql?format=arrow", "method": "POST", "body": {"query": SQL}},
+    {"path": "/api/manual-query", "method": "POST", "params": {"format": "NDJSON"}, "body": {"query": SQL}},
+    {"path": "/api/admin/cache/invalidate", "method": "POST"},
+    {"path": "/api/batch", "method": "POST"},
+    {"path": "/health"},
+    {"path": "/api/github-metrics", "method": "DELETE"},
+])
+def test_unbatchable_calls_are_rejected_before_they_run(client, main_module, request_item):
+    executed = main_module.query_controller.stats()["executed"]
+    data = run_batch(client, {"id": "x", **request_item})
+    assert data["x"]["status"] == 400
+    assert data["x"]["durationMs"] == 0.0
+    assert main_module.query_controller.stats()["executed"] == executed
+
+
+def test_oversized_response_is_aborted(client):
+    # BATCH_MAX_RESPONSE_BYTES is 20000 in conftest
+    data = run_batch(client, {"id": "big", "method": "POST", "path": "/api/execute-sql", "body": {"query": SQL, "limit": 1000}})
+    assert data["big"]["status"] == 413
+    assert "exceeded" in data["big"]["body"]["detail"]
+
+
+@pytest.mark.parametrize("requests, detail", [
+    ([], "At least one request"),
+    ([{"id": str(index), "path": "/api/github-metrics"} for index in range(11)], "At most 10"),
+    ([{"id": "a", "path": "/api/github-metrics"}, {"id": "a", "path": "/api/github-timeline"}], "unique"),
+])
+def test_malformed_batches_are_refused(client, requests, detail):
+    response = client.post("/api/batch", json={"requests": requests})
+    assert response.status_code == 400
+    assert detail in response.json()["detail"]
@@ -0,0 +1,60 @@
+import time
+from datetime import timedelta
+
+from conftest import ADMIN_HEADERS
+
+
+def advance_watermark(client, main_module):
+    latest = main_module.watermark.latest_event_at + timedelta(minutes=1)
+    response = client.post("/api/admin/ingest-notify", params={"latest_event_at": latest.isoformat()}, headers=ADMIN_HEADERS)
+    assert response.json()["data"]["advanced"]
+
+
+def current_etag(client, path):
+    """ETag of `path` once its cached result is current (stale responses carry none)"""
+    for _ in range(50):
+        response = client.get(path)
+        if "etag" in response.headers:
+            return response.headers["etag"]
+        time.sleep(0.05)
+    raise AssertionError(f"{path} never became current")
+
+
+def test_if_none_match_is_answered_with_304(client):
+    etag = current_etag(client, "/api/github-timeline")
+    response = client.get("/api/github-timeline", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_etag_turns_over_when_the_watermark_advances(client, main_module):
+    etag = current_etag(client, "/api/github-metrics")
+    advance_watermark(client, main_module)
+
+    # The old ETag is no longer current, and the stale result is served without validators
+    response = client.get("/api/github-metrics", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+
+    new_etag = current_etag(client, "/api/github-metrics")
+    assert new_etag != etag
+    assert client.get("/api/github-metrics", headers={"If-None-Match": new_etag}).status_code == 304
+
+
+def test_result_computed_across_an_advance_gets_no_etag(client, main_module, monkeypatch):
+    load = main_module.load_github_timeline
+
+    async def load_then_advance(approx):
+        rows = await load(approx)
+        main_module.watermark.advance(main_module.watermark.latest_event_at + timedelta(minutes=1))
+        return rows
+
+    main_module.result_cache.invalidate("github-timeline")
+    monkeypatch.setattr(main_module, "load_github_timeline", load_then_advance)
+    response = client.get("/api/github-timeline")
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+    monkeypatch.undo()
+
+    # It was stored stale, so the next lookups recompute it at the new version
+    assert current_etag(client, "/api/github-timeline")
@@ -0,0 +1,53 @@
+import pytest
+
+from pagination import InvalidCursorError, decode_cursor, encode_cursor, next_cursor, page_after, sort_aggregate
+
+ROWS = sort_aggregate([("b", 5), ("a", 5), ("c", 9), (None, 5), ("d", 1), ("e", 1)])
+
+
+def test_sort_aggregate_orders_by_count_then_key_with_nulls_last():
+    assert [key for key, _ in ROWS] == ["c", "a", "b", None, "d", "e"]
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(5, "a", "2026-01-01T00:00:00", "fp")
+    assert decode_cursor(cursor, "fp") == (5, "a", "2026-01-01T00:00:00")
+
+
+def test_cursor_is_bound_to_its_query():
+    cursor = encode_cursor(5, "a", "v1", "fp")
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, "other")
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", encode_cursor("5", "a", "v1", "fp")])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, "fp")
+
+
+def test_pages_walk_the_aggregate_once():
+    seen = []
+    page, has_more = ROWS[:2], True
+    seen.extend(page)
+    while has_more:
+        cursor = next_cursor(page, has_more, "v1", "fp")
+        after_count, after_key, _ = decode_cursor(cursor, "fp")
+        page, has_more = page_after(ROWS, (after_count, after_key), 2)
+        seen.extend(page)
+    assert seen == ROWS
+    assert next_cursor(page, has_more, "v1", "fp") is None
+
+
+def test_repository_pages_through_the_api(client):
+    first = client.get("/api/github-repositories", params={"limit": 3}).json()
+    cursor = first["pagination"]["nextCursor"]
+    assert first["pagination"]["hasMore"] and cursor
+
+    second = client.get("/api/github-repositories", params={"limit": 3, "cursor": cursor}).json()
+    names = [row["repoName"] for row in first["data"] + second["data"]]
+    assert len(second["data"]) == 3
+    assert len(set(names)) == 6
+
+    rejected = client.get("/api/github-repositories", params={"limit": 3, "cursor": cursor, "accuracy": "approx"})
+    assert rejected.status_code == 400
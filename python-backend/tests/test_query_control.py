@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from query_control import CancelScope, ClientDisconnectedError, QueryCancelledError, _current_request, until_disconnected
+from single_flight import SingleFlight
+
+
+async def query(scope, seconds=0.2):
+    """Stand-in for a warehouse query polling its cancel scope"""
+    for _ in range(int(seconds / 0.01)):
+        if scope.cancelled:
+            raise QueryCancelledError("cancelled")
+        await asyncio.sleep(0.01)
+    return "rows"
+
+
+async def disconnect_soon():
+    await asyncio.sleep(0.02)
+    return {"type": "http.disconnect"}
+
+
+async def request(flights, scope):
+    _current_request.set((disconnect_soon, asyncio.current_task()))
+    return await until_disconnected(flights.do("k", lambda: query(scope)), scope)
+
+
+def test_last_disconnecting_request_cancels_the_query():
+    async def scenario():
+        flights, scope = SingleFlight(), CancelScope()
+        with pytest.raises(ClientDisconnectedError):
+            await asyncio.create_task(request(flights, scope))
+        return scope
+
+    assert asyncio.run(scenario()).cancelled
+
+
+def test_background_caller_keeps_a_shared_query_alive():
+    async def scenario():
+        flights, scope = SingleFlight(), CancelScope()
+        background = asyncio.create_task(until_disconnected(flights.do("k", lambda: query(scope)), scope))
+        await asyncio.sleep(0)
+        with pytest.raises(ClientDisconnectedError):
+            await asyncio.create_task(request(flights, scope))
+        return await background, scope
+
+    rows, scope = asyncio.run(scenario())
+    assert rows == "rows"
+    assert not scope.cancelled
@@ -0,0 +1,27 @@
+import asyncio
+
+from realtime import SnapshotPoller
+
+
+def test_each_publish_carries_its_own_patch_and_version():
+    snapshots = iter([{"n": 1}, {"n": 2}])
+    published = []
+
+    async def fetch():
+        return next(snapshots)
+
+    async def publish(snapshot, patch, version):
+        # A slow fan-out lets the next refresh land before this one is recorded
+        await asyncio.sleep(0.01 if snapshot["n"] == 1 else 0)
+        published.append((snapshot["n"], patch, version))
+
+    def diff(old, new):
+        return None if old is None else {"from": old["n"], "to": new["n"]}
+
+    async def scenario():
+        poller = SnapshotPoller(fetch, publish, lambda: True, diff=diff)
+        poller._refresh_lock = asyncio.Lock()
+        await asyncio.gather(poller.refresh(), poller.refresh())
+
+    asyncio.run(scenario())
+    assert sorted(published) == [(1, None, 1), (2, {"from": 1, "to": 2}, 2)]
@@ -0,0 +1,23 @@
+import re
+from datetime import date, datetime
+
+from serialization import dumps
+
+SQL_TIMESTAMP = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$")
+
+
+def test_dates_and_datetimes_encode_as_iso_8601():
+    assert dumps({"d": date(2024, 1, 2), "t": datetime(2024, 1, 2, 3, 4, 5)}) == b'{"d":"2024-01-02","t":"2024-01-02T03:04:05"}'
+
+
+def test_last_activity_keeps_the_sql_timestamp_format(client):
+    rows = client.get("/api/github-repositories", params={"limit": 5}).json()["data"]
+    assert rows
+    assert all(SQL_TIMESTAMP.match(row["lastActivity"]) for row in rows)
+
+
+def test_last_activity_format_survives_a_json_round_trip(main_module):
+    row = ("r", 1, 1, datetime(2024, 1, 1, 12, 0))
+    cached = ("r", 1, 1, "2024-01-01T12:00:00")
+    assert main_module.REPOSITORY_ROW(row)["lastActivity"] == "2024-01-01 12:00:00"
+    assert main_module.REPOSITORY_ROW(cached)["lastActivity"] == "2024-01-01 12:00:00"
@@ -0,0 +1,40 @@
+import asyncio
+
+from single_flight import SingleFlight, make_flight_key
+
+
+def test_formatting_differences_share_a_key():
+    assert make_flight_key("q", "SELECT *\n  FROM t  WHERE x = 1;") == make_flight_key("q", "select * from t where x = 1")
+
+
+def test_string_literals_keep_their_whitespace():
+    assert make_flight_key("q", "SELECT * FROM t WHERE x = 'a  b'") != make_flight_key("q", "SELECT * FROM t WHERE x = 'a b'")
+
+
+def test_dollar_quoted_literals_are_kept_distinct():
+    assert make_flight_key("f", "SELECT $$a$$ AS x") != make_flight_key("f", "SELECT $$A$$ AS x")
+    assert make_flight_key("f", "SELECT $$a  b$$ AS x") != make_flight_key("f", "SELECT $$a b$$ AS x")
+
+
+def test_limits_and_parameters_are_part_of_the_key():
+    assert make_flight_key("q", "SELECT 1 LIMIT 5") != make_flight_key("q", "SELECT 1 LIMIT 6")
+    assert make_flight_key("q", "SELECT 1", 1) != make_flight_key("q", "SELECT 1", 2)
+    assert make_flight_key("q", "SELECT 1") != make_flight_key("r", "SELECT 1")
+
+
+def test_concurrent_callers_share_one_execution():
+    flights = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    async def scenario():
+        return await asyncio.gather(*(flights.do("k", work) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == [1] * 5
+    assert flights.stats()["executions"] == 1
+    assert flights.stats()["coalesced"] == 4
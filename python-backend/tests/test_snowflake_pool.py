@@ -0,0 +1,76 @@
+import threading
+import time
+
+from snowflake_pool import SnowflakePool
+
+
+class FakeConnection:
+    def __init__(self, tracker):
+        self.tracker = tracker
+        self.closed = False
+
+    def cursor(self):
+        return self
+
+    def execute(self, command):
+        # A slow health check widens the window between leaving idle and entering in-use
+        time.sleep(0.002)
+
+    def fetchone(self):
+        return (1,)
+
+    def is_closed(self):
+        return self.closed
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.tracker.opened(-1)
+
+
+class Tracker:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.open = 0
+        self.peak = 0
+
+    def opened(self, delta):
+        with self.lock:
+            self.open += delta
+            self.peak = max(self.peak, self.open)
+
+    def connect(self):
+        self.opened(1)
+        return FakeConnection(self)
+
+
+def test_health_checks_do_not_let_the_pool_grow_past_max_size():
+    tracker = Tracker()
+    pool = SnowflakePool(tracker.connect, max_size=3, health_check_interval=0)
+    peak_total = 0
+    stop = threading.Event()
+
+    def watch():
+        nonlocal peak_total
+        while not stop.is_set():
+            with pool._lock:
+                peak_total = max(peak_total, pool._total())
+
+    def borrow():
+        for _ in range(30):
+            with pool.connection():
+                pass
+
+    watcher = threading.Thread(target=watch)
+    watcher.start()
+    borrowers = [threading.Thread(target=borrow) for _ in range(8)]
+    for thread in borrowers:
+        thread.start()
+    for thread in borrowers:
+        thread.join()
+    stop.set()
+    watcher.join()
+
+    assert tracker.peak <= pool.max_size
+    assert peak_total <= pool.max_size
+    assert pool.stats()["totalAcquires"] == 240
@@ -0,0 +1,39 @@
+import pytest
+
+from sql_cache import SQLResultCache, canonicalize_sql
+
+
+@pytest.mark.parametrize("first, second", [
+    ("SELECT *\n  FROM t -- comment\n WHERE x = 1;", "select * from t where x = 1"),
+    ("select V:repo.name as x from t", "SELECT V:repo.name AS x FROM t"),
+    ("select V:repo.name /* path */ as x from t", "SELECT V:repo.name AS x FROM t"),
+])
+def test_formatting_and_keyword_case_variants_share_a_form(first, second):
+    assert canonicalize_sql(first) == canonicalize_sql(second)
+
+
+@pytest.mark.parametrize("first, second", [
+    ("SELECT 'a  b' AS x", "SELECT 'a b' AS x"),
+    ("SELECT 'a' AS x", "SELECT 'A' AS x"),
+    ("SELECT $$a  b$$ AS x", "SELECT $$A B$$ AS x"),
+    ("SELECT $$a$$ AS x", "SELECT $$A$$ AS x"),
+    ("SELECT V:repo.name FROM t", "SELECT V:repo.Name FROM t"),
+    ('SELECT "a" FROM t', 'SELECT "A" FROM t'),
+])
+def test_case_sensitive_text_is_kept_verbatim(first, second):
+    assert canonicalize_sql(first) != canonicalize_sql(second)
+
+
+def test_dollar_quoted_strings_hide_keywords_and_limits():
+    assert canonicalize_sql("SELECT $$x -- limit 5$$ AS y") == ("SELECT $$x -- limit 5$$ AS Y", None)
+
+
+def test_trailing_limit_is_folded_out():
+    assert canonicalize_sql("select 1 limit 5;") == ("SELECT 1", 5)
+
+
+def test_dollar_quoted_variants_do_not_share_rows():
+    cache = SQLResultCache()
+    cache.store("SELECT $$a$$ AS x", ["X"], ["TEXT"], [["a"]], False)
+    assert cache.lookup("SELECT $$A$$ AS x") is None
+    assert cache.lookup("select $$a$$ as x").rows == [["a"]]
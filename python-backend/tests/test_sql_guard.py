@@ -0,0 +1,66 @@
+import pytest
+
+from sql_guard import QuotaExceededError, ScanAdmission, ScanBudgetError, ScanQuota, UnsafeQueryError, guard_query
+
+
+@pytest.mark.parametrize("query", [
+    "DELETE FROM RAW_EVENTS",
+    "DROP TABLE RAW_EVENTS",
+    "INSERT INTO RAW_EVENTS SELECT * FROM RAW_EVENTS",
+    "UPDATE RAW_EVENTS SET V = NULL",
+    "SELECT 1; DROP TABLE RAW_EVENTS",
+    "SELECT SYSTEM$CANCEL_QUERY('x')",
+    "SELECT * FROM RAW_EVENTS a, RAW_EVENTS b",
+    "SELECT * FROM RAW_EVENTS CROSS JOIN RAW_EVENTS",
+    "SHOW TABLES",
+    "SELECT FROM WHERE",
+])
+def test_rejects_anything_but_one_read_only_select(query):
+    with pytest.raises(UnsafeQueryError):
+        guard_query(query, max_limit=100)
+
+
+def test_appends_default_limit():
+    guarded = guard_query("SELECT V:type::STRING AS t FROM RAW_EVENTS", max_limit=1000, default_limit=50)
+    assert guarded.sql.endswith("LIMIT 50")
+    assert guarded.limit == 50
+    assert not guarded.capped
+
+
+def test_keeps_a_limit_within_the_maximum():
+    query = "SELECT * FROM RAW_EVENTS LIMIT 10"
+    guarded = guard_query(query, max_limit=100)
+    assert guarded.sql == query
+    assert guarded.limit == 10
+
+
+def test_clamps_only_the_outer_limit():
+    guarded = guard_query(
+        "SELECT * FROM (SELECT * FROM RAW_EVENTS LIMIT 5000) LIMIT 5000 -- trailing comment",
+        max_limit=100
+    )
+    assert guarded.sql == "SELECT * FROM (SELECT * FROM RAW_EVENTS LIMIT 5000) LIMIT 100 -- trailing comment"
+    assert guarded.capped
+
+
+def test_limit_is_not_swallowed_by_a_trailing_comment():
+    guarded = guard_query("SELECT 1 -- no limit here", max_limit=100)
+    assert guarded.sql == "SELECT 1 LIMIT 100"
+
+
+def test_scan_admission_budget_and_heavy_flag():
+    admission = ScanAdmission(max_scan_bytes=1000, queue_scan_bytes=100, quota=ScanQuota(10 ** 9))
+    assert admission.admit("a", {"bytesAssigned": 50}) is False
+    assert admission.admit("a", {"bytesAssigned": 500}) is True
+    with pytest.raises(ScanBudgetError):
+        admission.admit("a", {"bytesAssigned": 5000})
+
+
+def test_scan_quota_refuses_past_the_window_budget():
+    quota = ScanQuota(bytes_per_window=100, window=60)
+    quota.charge("a", 80)
+    with pytest.raises(QuotaExceededError) as raised:
+        quota.charge("a", 30)
+    assert raised.value.retry_after >= 1
+    # Other clients have their own budget
+    quota.charge("b", 80)
@@ -0,0 +1,143 @@
+"""Latest RAW_EVENTS timestamp, tracked once instead of recomputed by every query"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WatermarkService:
+    """Tracks MAX(created_at) over RAW_EVENTS for queries, caches and HTTP validators.
+
+    Time windows in the API are relative to the latest event rather than the
+    wall clock, so queries used to aggregate the whole table for that maximum
+    first. This service fetches it in the background every `interval`
+    seconds, or right away on `notify()` from an ingest job, and queries take
+    it as a bind parameter. The watermark only moves forward; listeners get
+    `(previous, current)` on every advance, and `version` changes with it so
+    anything keyed on the version turns over with the data. Periodic
+    fetches are skipped while `should_poll()` is false, e.g. in a worker
+    that learns of advances from another process.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[Optional[datetime]]],
+        interval: float = 60.0,
+        should_poll: Optional[Callable[[], bool]] = None,
+    ):
+        self._fetch = fetch
+        self.interval = interval
+        self._should_poll = should_poll
+        self._latest: Optional[datetime] = None
+        self._listeners: List[Callable[[Optional[datetime], datetime], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._refreshed_at: Optional[float] = None
+        self._refreshes = 0
+        self._failures = 0
+        self._advances = 0
+        self._notifications = 0
+
+    @property
+    def latest_event_at(self) -> Optional[datetime]:
+        return self._latest
+
+    @property
+    def version(self) -> str:
+        """Opaque token that changes whenever the watermark advances"""
+        return self._latest.isoformat() if self._latest else "empty"
+
+    def add_listener(self, listener: Callable[[Optional[datetime], datetime], None]) -> None:
+        self._listeners.append(listener)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._refresh_lock = asyncio.Lock()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def get(self) -> Optional[datetime]:
+        """Current watermark, fetching it first if nothing has been loaded yet (None for an empty table)"""
+        if self._latest is None:
+            await self.refresh()
+        return self._latest
+
+    async def refresh(self) -> bool:
+        """Fetch the watermark now; concurrent callers share one fetch. True if it advanced"""
+        lock = self._refresh_lock or asyncio.Lock()
+        if lock.locked():
+            # Someone is already fetching; their result is as fresh as ours would be
+            async with lock:
+                return False
+        async with lock:
+            try:
+                latest = await self._fetch()
+            except Exception:
+                self._failures += 1
+                raise
+            self._refreshes += 1
+            self._refreshed_at = time.monotonic()
+            return self.advance(latest)
+
+    def advance(self, latest: Optional[datetime]) -> bool:
+        """Move the watermark forward to `latest` (e.g. from the rollup refresh); True if it moved"""
+        if latest is None or (self._latest is not None and latest <= self._latest):
+            return False
+        previous, self._latest = self._latest, latest
+        self._advances += 1
+        logger.info(f"RAW_EVENTS watermark advanced to {latest}")
+        for listener in self._listeners:
+            try:
+                listener(previous, latest)
+            except Exception as e:
+                logger.error(f"Watermark listener failed: {e}")
+        return True
+
+    def notify(self, latest: Optional[datetime] = None) -> bool:
+        """Ingest notification: advance to `latest` when given, else refresh without waiting for the interval"""
+        self._notifications += 1
+        if latest is not None:
+            return self.advance(latest)
+        if self._wake is not None:
+            self._wake.set()
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "latestEventAt": self._latest.isoformat() if self._latest else None,
+            "intervalSeconds": self.interval,
+            "running": self._task is not None and not self._task.done(),
+            "refreshes": self._refreshes,
+            "failures": self._failures,
+            "advances": self._advances,
+            "notifications": self._notifications,
+            "ageSeconds": round(time.monotonic() - self._refreshed_at, 1) if self._refreshed_at else None,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if self._should_poll is None or self._should_poll():
+                    await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Watermark refresh failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
@@ -0,0 +1,276 @@
+"""Coordination between the uvicorn worker processes of one host: leader election and pub/sub"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from serialization import dumps
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: every process leads, as with a single worker
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS messages (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        topic TEXT NOT NULL,
+        origin INTEGER NOT NULL,
+        payload BLOB NOT NULL,
+        created_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS presence (
+        worker INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        value INTEGER NOT NULL,
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (worker, name)
+    );
+"""
+
+
+class HostLeader:
+    """Elects one worker per host through an exclusive lock on a file.
+
+    The leader runs the host's background polling (WebSocket snapshots,
+    rollup refreshes, watermark re-reads) so adding workers does not
+    multiply warehouse queries. The lock is released by the OS when the
+    leader exits, however it exits, and the other workers retry every
+    `retry_interval` seconds, so a new leader takes over within that time.
+    """
+
+    def __init__(self, path: str, retry_interval: float = 5.0):
+        self.path = path
+        self.retry_interval = retry_interval
+        self._file = None
+        self._task: Optional[asyncio.Task] = None
+        self._elected_at: Optional[float] = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def is_leader(self) -> bool:
+        return self._file is not None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._try_acquire()
+            if not self.is_leader:
+                self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._file is not None:
+            # Closing the file releases the lock for the next leader
+            self._file.close()
+            self._file = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "leader": self.is_leader,
+            "pid": os.getpid(),
+            "leaderSeconds": round(time.monotonic() - self._elected_at, 1) if self._elected_at else None,
+        }
+
+    def _try_acquire(self) -> None:
+        lock_file = open(self.path, "a+")
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return
+        self._file = lock_file
+        self._elected_at = time.monotonic()
+        logger.info(f"Worker {os.getpid()} is the host leader")
+
+    async def _run(self) -> None:
+        while not self.is_leader:
+            await asyncio.sleep(self.retry_interval)
+            self._try_acquire()
+
+
+class HostChannel:
+    """Pub/sub and presence counters for the workers of one host, over a shared SQLite file.
+
+    `publish` appends a JSON message under a topic; every other worker's
+    poll loop reads messages past the last sequence number it saw, every
+    `poll_interval` seconds, and hands each to the topic's handlers. A
+    worker does not receive its own messages. Messages older than
+    `retention` seconds are pruned. Presence counters (e.g. open
+    WebSockets) are summed over workers that reported within `presence_ttl`
+    seconds, so a crashed worker stops counting; the poll loop re-reads the
+    sums whenever it reports, and `presence_total` answers from that copy
+    without touching SQLite.
+    """
+
+    def __init__(self, path: str, poll_interval: float = 0.5, retention: float = 300.0, presence_ttl: float = 30.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.presence_ttl = presence_ttl
+        self.worker = os.getpid()
+        self._handlers: Dict[str, List[Callable[[Any], Awaitable[None]]]] = {}
+        self._last_seq = 0
+        self._pruned_at = 0.0
+        self._presence: Dict[str, Callable[[], int]] = {}
+        self._reported_at = 0.0
+        self._presence_totals: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._published = 0
+        self._publish_failures = 0
+        self._received = 0
+        self._failures = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+            self._last_seq = db.execute("SELECT COALESCE(MAX(seq), 0) FROM messages").fetchone()[0]
+
+    def subscribe(self, topic: str, handler: Callable[[Any], Awaitable[None]]) -> None:
+        self._handlers.setdefault(topic, []).append(handler)
+
+    def add_presence(self, name: str, read: Callable[[], int]) -> None:
+        """Report `read()` as this worker's `name` counter every `presence_ttl / 3` seconds"""
+        self._presence[name] = read
+
+    def presence_total(self, name: str) -> int:
+        """Sum of `name` over live workers as of the last report; does not block"""
+        return self._presence_totals.get(name, 0)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self._clear_presence)
+
+    def _clear_presence(self) -> None:
+        with closing(self._connect()) as db:
+            with db:
+                db.execute("DELETE FROM presence WHERE worker = ?", (self.worker,))
+
+    # ------------------------------------------------------------------
+    # Blocking calls (run them with asyncio.to_thread from the event loop)
+    # ------------------------------------------------------------------
+    def publish(self, topic: str, message: Any) -> None:
+        try:
+            with closing(self._connect()) as db:
+                with db:
+                    db.execute(
+                        "INSERT INTO messages (topic, origin, payload, created_at) VALUES (?, ?, ?, ?)",
+                        (topic, self.worker, dumps(message), time.time())
+                    )
+        except Exception:
+            self._publish_failures += 1
+            raise
+        self._published += 1
+
+    def latest(self, topic: str) -> Optional[Any]:
+        """Most recent message under `topic` from any worker, e.g. to catch up at start-up"""
+        with closing(self._connect()) as db:
+            row = db.execute(
+                "SELECT payload FROM messages WHERE topic = ? ORDER BY seq DESC LIMIT 1", (topic,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_presence(self, name: str, value: int) -> None:
+        with closing(self._connect()) as db:
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO presence (worker, name, value, updated_at) VALUES (?, ?, ?, ?)",
+                    (self.worker, name, value, time.time())
+                )
+
+    def presence(self, name: str) -> int:
+        """Sum of `name` over live workers"""
+        with closing(self._connect()) as db:
+            return db.execute(
+                "SELECT COALESCE(SUM(value), 0) FROM presence WHERE name = ? AND updated_at >= ?",
+                (name, time.time() - self.presence_ttl)
+            ).fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker": self.worker,
+            "lastSeq": self._last_seq,
+            "published": self._published,
+            "publishFailures": self._publish_failures,
+            "received": self._received,
+            "failures": self._failures,
+        }
+
+    def _report_presence(self, counts: Dict[str, int]) -> Dict[str, int]:
+        """Store this worker's counters and return the sums over live workers"""
+        now = time.time()
+        with closing(self._connect()) as db:
+            with db:
+                db.executemany(
+                    "INSERT OR REPLACE INTO presence (worker, name, value, updated_at) VALUES (?, ?, ?, ?)",
+                    [(self.worker, name, value, now) for name, value in counts.items()]
+                )
+            rows = db.execute(
+                "SELECT name, SUM(value) FROM presence WHERE updated_at >= ? GROUP BY name", (now - self.presence_ttl,)
+            ).fetchall()
+        return {name: total for name, total in rows}
+
+    def _read_new(self) -> List[Tuple[str, bytes]]:
+        with closing(self._connect()) as db:
+            rows = db.execute(
+                "SELECT seq, topic, origin, payload FROM messages WHERE seq > ? ORDER BY seq", (self._last_seq,)
+            ).fetchall()
+            now = time.time()
+            if now - self._pruned_at >= self.retention / 10:
+                with db:
+                    db.execute("DELETE FROM messages WHERE created_at < ?", (now - self.retention,))
+                self._pruned_at = now
+        if rows:
+            self._last_seq = rows[-1][0]
+        return [(topic, payload) for _, topic, origin, payload in rows if origin != self.worker]
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if self._presence and time.monotonic() - self._reported_at >= self.presence_ttl / 3:
+                    counts = {name: read() for name, read in self._presence.items()}
+                    self._presence_totals = await asyncio.to_thread(self._report_presence, counts)
+                    self._reported_at = time.monotonic()
+                rows = await asyncio.to_thread(self._read_new)
+                for topic, payload in rows:
+                    self._received += 1
+                    message = json.loads(payload)
+                    for handler in self._handlers.get(topic, ()):
+                        await handler(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failures += 1
+                logger.error(f"Host channel poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)